@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Admission control for the OCR endpoints: a bounded number of requests in
+flight, a bounded FIFO queue behind them, 429 with Retry-After beyond that,
+and a cheaper preprocessing profile while queue waits exceed a latency budget
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Tuple
+
+from fastapi import HTTPException
+
+from eta import eta_model, to_seconds, ETA_ALPHA
+from metrics import metrics
+from ocr_pool import ocr_executor
+
+logger = logging.getLogger(__name__)
+
+# Requests processed at the same time (a batch counts once per document it runs concurrently)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 0)) or 2 * ocr_executor.max_workers
+# Requests waiting for a slot; further requests get 429
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 32))
+# Queue wait in seconds above which requests are downgraded to ADMISSION_DOWNGRADE_PROFILE
+ADMISSION_LATENCY_BUDGET = float(os.getenv("ADMISSION_LATENCY_BUDGET", 15.0))
+ADMISSION_DOWNGRADE_PROFILE = os.getenv("ADMISSION_DOWNGRADE_PROFILE", "fast")
+
+# Preprocessing profiles from cheapest to most expensive
+PROFILE_COST = ("none", "fast", "standard", "heavy")
+
+admission_wait_seconds = metrics.histogram(
+    "admission_queue_wait_seconds", "Time requests waited for an admission slot, by endpoint"
+)
+admission_rejected = metrics.counter(
+    "admission_rejected_total", "Requests rejected with 429 because the admission queue was full, by endpoint"
+)
+admission_downgraded = metrics.counter(
+    "admission_downgraded_total", "Requests downgraded to a cheaper preprocessing profile, by endpoint"
+)
+
+class Admission:
+    """A granted slot: how long the request waited and whether it has to run cheaper"""
+
+    def __init__(self, controller: "AdmissionController", endpoint: str, weight: int,
+                 waited: float, degraded: bool):
+        self.controller = controller
+        self.endpoint = endpoint
+        self.weight = weight
+        self.waited = waited
+        self.degraded = degraded
+        self.downgraded = False
+        self._released = False
+
+    def profile(self, requested: str) -> str:
+        """The preprocessing profile to use instead of requested (a resolved profile name)"""
+        if not self.degraded or requested not in PROFILE_COST:
+            return requested
+        if PROFILE_COST.index(requested) <= PROFILE_COST.index(ADMISSION_DOWNGRADE_PROFILE):
+            return requested
+        if not self.downgraded:
+            self.downgraded = True
+            admission_downgraded.inc(endpoint=self.endpoint)
+        return ADMISSION_DOWNGRADE_PROFILE
+
+    def release(self):
+        """Give the slot back (idempotent)"""
+        if not self._released:
+            self._released = True
+            self.controller._release(self.weight)
+
+class AdmissionController:
+    """
+    Weighted slots handed out in FIFO order on the event loop. The recent
+    queue wait is an exponentially weighted average, so that requests are
+    downgraded while the queue is slow, not only the ones that waited longest.
+    """
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 latency_budget: float = ADMISSION_LATENCY_BUDGET):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.latency_budget = latency_budget
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self.recent_wait = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead has probably drained"""
+        backlog = (self.in_flight + self.queued) / self.max_in_flight
+        return max(1, to_seconds(backlog * eta_model.rate("ocr_document")))
+
+    def _fits(self, weight: int) -> bool:
+        return self.in_flight == 0 or self.in_flight + weight <= self.max_in_flight
+
+    async def enter(self, endpoint: str, weight: int = 1) -> Admission:
+        """Wait for a slot; raises 429 with Retry-After when the queue is full"""
+        weight = max(1, min(weight, self.max_in_flight))
+        start = time.perf_counter()
+        if not self._waiters and self._fits(weight):
+            self.in_flight += weight
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                admission_rejected.inc(endpoint=endpoint)
+                raise HTTPException(
+                    status_code=429,
+                    detail="The OCR service is at capacity, please retry later",
+                    headers={"Retry-After": str(self.retry_after())}
+                )
+            entry = (weight, asyncio.get_running_loop().create_future())
+            self._waiters.append(entry)
+            try:
+                await entry[1]
+            except asyncio.CancelledError:
+                if entry[1].cancelled():
+                    self._waiters.remove(entry)
+                    self._wake()
+                else:
+                    # Granted just before the caller gave up
+                    self._release(weight)
+                raise
+
+        waited = time.perf_counter() - start
+        admission_wait_seconds.observe(waited, endpoint=endpoint)
+        self.recent_wait += ETA_ALPHA * (waited - self.recent_wait)
+        self.admitted += 1
+        degraded = max(waited, self.recent_wait) > self.latency_budget
+        return Admission(self, endpoint, weight, waited, degraded)
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str, weight: int = 1) -> AsyncIterator[Admission]:
+        admission = await self.enter(endpoint, weight)
+        try:
+            yield admission
+        finally:
+            admission.release()
+
+    def _release(self, weight: int):
+        self.in_flight -= weight
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(weight):
+                break
+            self._waiters.popleft()
+            self.in_flight += weight
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "recent_wait_seconds": round(self.recent_wait, 3),
+            "latency_budget_seconds": self.latency_budget,
+            "degraded": self.recent_wait > self.latency_budget
+        }
+
+# Global admission controller instance
+admission_controller = AdmissionController()
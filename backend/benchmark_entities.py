@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared FRA entity engine against the two extractors it replaced
+"""
+
+import random
+import re
+import time
+
+from fra_entities import fra_entity_engine
+
+PAGE_COUNTS = [1, 10, 50]
+REPEATS = 5
+
+def legacy_ocr_patterns(text: str) -> list:
+    """The per-pattern loop of extract_entities_with_ner in backend/ocr.py"""
+    patterns = {
+        "AREA": r'(\d+(?:\.\d+)?)\s*(?:hectares?|acres?|sq\.?\s*(?:km|m|ft))',
+        "DATE": r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})\b',
+        "PHONE": r'\b(?:\+91|91)?[-.\s]?[6-9]\d{9}\b',
+        "VILLAGE": r'\b(?:Village|Gram|Gaon)\s+([A-Za-z\s]+)\b',
+        "DISTRICT": r'\b(?:District|Zilla)\s+([A-Za-z\s]+)\b',
+        "SURVEY_NUMBER": r'\b(?:Survey|S\.?)\s*(?:No\.?|Number)\s*:?\s*(\d+(?:[/-]\d+)*)\b'
+    }
+    entities = []
+    for entity_type, pattern in patterns.items():
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            entities.append((entity_type, match.group(0), match.start(), match.end()))
+    return entities
+
+def legacy_ai_backend(text: str) -> list:
+    """The per-keyword loop of extract_fra_entities in scripts/ai_backend/main.py"""
+    entities = []
+    for match in re.finditer(r'FRA\d{4}\d{3,6}', text):
+        entities.append(("CLAIM_NUMBER", match.group(), match.start(), match.end()))
+    for match in re.finditer(r'(\d+\.?\d*)\s*(hectare|hectares|ha)', text, re.IGNORECASE):
+        entities.append(("FOREST_AREA", match.group(), match.start(), match.end()))
+    for keyword in ['village', 'district', 'tehsil', 'block', 'panchayat']:
+        for match in re.finditer(rf'(\w+)\s+{keyword}', text, re.IGNORECASE):
+            entities.append((f"LOCATION_{keyword.upper()}", match.group(), match.start(), match.end()))
+    return entities
+
+def legacy_both(text: str) -> list:
+    return legacy_ocr_patterns(text) + legacy_ai_backend(text)
+
+def create_ocr_text(pages: int) -> str:
+    """Multi-page claim form text with the noise typical of OCR output"""
+    rng = random.Random(42)
+    villages = ["Ramgarh", "Bansjore", "Kurdeg", "Simdega", "Jaldega"]
+    filler = "the claimant has been cultivating the land for generations as per records of the gram sabha".split()
+    page_texts = []
+    for page in range(pages):
+        lines = []
+        for line in range(40):
+            lines.append(" ".join(rng.choice(filler) for _ in range(12)))
+            if line % 5 == 0:
+                lines.append(
+                    f"Claim FRA2023{rng.randint(1000, 99999)} Village {rng.choice(villages)} District Gumla "
+                    f"Tehsil Sadar Survey No. {rng.randint(1, 999)}/{rng.randint(1, 9)} area {rng.randint(1, 9)}.{rng.randint(0, 9)} hectares "
+                    f"({rng.randint(1, 20)} acres) dated {rng.randint(1, 28)}/{rng.randint(1, 12)}/20{rng.randint(10, 23)} "
+                    f"phone 9{rng.randint(100000000, 999999999)}"
+                )
+        page_texts.append(" ".join(lines))
+    return "\n\n".join(page_texts)
+
+def time_ms(func, text: str) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    print("🧪 Entity extraction benchmark (best of {} runs, ms)".format(REPEATS))
+    print("=" * 60)
+    for pages in PAGE_COUNTS:
+        text = create_ocr_text(pages)
+        print(f"\n📄 {pages} page(s), {len(text):,} characters")
+        baseline = time_ms(legacy_both, text)
+        print(f"   {'legacy (both services)':<24} {baseline:9.1f} ms  {len(legacy_both(text)):6d} entities")
+        elapsed = time_ms(fra_entity_engine.extract, text)
+        speedup = baseline / elapsed if elapsed > 0 else float("inf")
+        print(f"   {'fra_entity_engine':<24} {elapsed:9.1f} ms  {len(fra_entity_engine.extract(text)):6d} entities  "
+              f"({speedup:.1f}x vs legacy)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+WebSocket fan-out with per-document subscriptions, coalesced progress updates
+and eviction of slow or dead connections
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Seconds a single send may take before the connection is considered dead
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 5))
+# Unsent messages a connection may accumulate before it is evicted as too slow
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", 256))
+# Close code sent to evicted connections ("try again later")
+WS_EVICTION_CODE = 1013
+
+class Subscriber:
+    """One WebSocket connection, its channels and its queue of unsent messages"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.channels: Set[str] = set()
+        # Pending serialized messages keyed by coalescing key (or a unique sequence number)
+        self.outbox: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+class ConnectionManager:
+    """
+    Publishing never waits for a socket: a message is serialized once and
+    queued for every subscriber of its channel, and each connection has its
+    own sender task. A queued message with the same coalescing key (e.g. the
+    progress of one document) is replaced by the newer one, so slow clients
+    only get the latest progress instead of stalling OCR.
+    """
+
+    def __init__(self, send_timeout: float = WS_SEND_TIMEOUT, max_pending: int = WS_MAX_PENDING):
+        self.send_timeout = send_timeout
+        self.max_pending = max_pending
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        self.channels: Dict[str, Set[Subscriber]] = {}
+        self._sequence = itertools.count()
+        self.published = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    async def connect(self, websocket: WebSocket, *channels: str) -> Subscriber:
+        await websocket.accept()
+        subscriber = Subscriber(websocket)
+        self.subscribers[websocket] = subscriber
+        for channel in channels:
+            self.subscribe(subscriber, channel)
+        subscriber.task = asyncio.ensure_future(self._sender(subscriber))
+        return subscriber
+
+    def subscribe(self, subscriber: Subscriber, channel: str):
+        subscriber.channels.add(channel)
+        self.channels.setdefault(channel, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, channel: str):
+        subscriber.channels.discard(channel)
+        members = self.channels.get(channel)
+        if members is not None:
+            members.discard(subscriber)
+            if not members:
+                del self.channels[channel]
+
+    def disconnect(self, websocket: WebSocket):
+        """Forget a connection; safe to call more than once"""
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is None:
+            return
+        for channel in list(subscriber.channels):
+            self.unsubscribe(subscriber, channel)
+        subscriber.outbox.clear()
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+
+    def handle_client_message(self, subscriber: Subscriber, text: str):
+        """
+        Clients may follow more documents or batches on one connection with
+        {"action": "subscribe" | "unsubscribe", "document_id": "..."}; other
+        messages (e.g. keep-alive pings) are ignored
+        """
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or not isinstance(message.get("document_id"), str):
+            return
+        if message.get("action") == "subscribe":
+            self.subscribe(subscriber, message["document_id"])
+        elif message.get("action") == "unsubscribe":
+            self.unsubscribe(subscriber, message["document_id"])
+
+    def publish(self, channel: str, message: Dict[str, Any], coalesce_key: Optional[Hashable] = None) -> int:
+        """Queue a message for the channel's subscribers; returns how many there are"""
+        subscribers = self.channels.get(channel)
+        if not subscribers:
+            return 0
+        self.published += 1
+        text = json.dumps(message)
+        key = coalesce_key if coalesce_key is not None else next(self._sequence)
+        for subscriber in list(subscribers):
+            if key in subscriber.outbox:
+                # Re-queue at the end so the update is not delivered before earlier messages
+                del subscriber.outbox[key]
+                self.coalesced += 1
+            elif len(subscriber.outbox) >= self.max_pending:
+                self._evict(subscriber, "too many unsent messages")
+                continue
+            subscriber.outbox[key] = text
+            subscriber.wakeup.set()
+        return len(subscribers)
+
+    async def _sender(self, subscriber: Subscriber):
+        try:
+            while True:
+                await subscriber.wakeup.wait()
+                subscriber.wakeup.clear()
+                while subscriber.outbox:
+                    _, text = subscriber.outbox.popitem(last=False)
+                    await asyncio.wait_for(subscriber.websocket.send_text(text), self.send_timeout)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._evict(subscriber, str(e) or type(e).__name__)
+
+    def _evict(self, subscriber: Subscriber, reason: str):
+        websocket = subscriber.websocket
+        if websocket not in self.subscribers:
+            return
+        logger.info(f"Evicting WebSocket connection: {reason}")
+        self.evicted += 1
+        self.disconnect(websocket)
+        asyncio.ensure_future(self._close(websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=WS_EVICTION_CODE), self.send_timeout)
+        except Exception:
+            pass
+
+    async def send_status_update(self, document_id: str, status: Any):
+        if document_id not in self.channels:
+            return
+        message = {
+            "type": "status_update",
+            "document_id": document_id,
+            "data": status.dict()
+        }
+        self.publish(document_id, message, coalesce_key=("status", document_id))
+
+    async def send_page_result(self, document_id: str, page: Any):
+        if document_id not in self.channels:
+            return
+        message = {
+            "type": "page_result",
+            "document_id": document_id,
+            "data": page.to_dict()
+        }
+        self.publish(document_id, message)
+
+    async def send_page_entities(self, document_id: str, page: Any):
+        """Complete entities of a page once batched NER has run (page_result only has pattern entities)"""
+        if document_id not in self.channels:
+            return
+        message = {
+            "type": "page_entities",
+            "document_id": document_id,
+            "data": {"page_number": page.page_number, "entities": page.entities.to_dicts()}
+        }
+        self.publish(document_id, message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.subscribers),
+            "channels": len(self.channels),
+            "pending_messages": sum(len(subscriber.outbox) for subscriber in self.subscribers.values()),
+            "published": self.published,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Lazy, zero-copy page decoding for uploaded PDFs and images
+"""
+
+import logging
+import math
+import threading
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from fastapi import HTTPException
+from PIL import Image
+
+from metrics import stage
+from text_layer import TextLayerPage, read_text_layer, PDF_TEXT_LAYER
+from uploads import SpooledUpload, check_pixels, MAX_IMAGE_PIXELS, MAX_PDF_PAGES
+
+# Optional PDF processing
+try:
+    import fitz  # PyMuPDF for PDF processing
+    PDF_SUPPORT = True
+except ImportError:
+    print("⚠️  PyMuPDF not found. PDF processing will be disabled.")
+    print("   Install with: pip install PyMuPDF==1.23.14")
+    PDF_SUPPORT = False
+
+logger = logging.getLogger(__name__)
+
+# 2x zoom for better OCR quality
+PDF_ZOOM = 2.0
+
+class _PixmapBuffer:
+    """Exposes a pixmap's sample buffer to numpy and keeps the pixmap alive"""
+
+    def __init__(self, pix):
+        self._pix = pix
+        self.__array_interface__ = {
+            "shape": (pix.height, pix.width, pix.n),
+            "typestr": "|u1",
+            "data": (pix.samples_ptr, False),
+            "strides": (pix.stride, pix.n, 1),
+            "version": 3
+        }
+
+def pixmap_to_bgr(pix) -> np.ndarray:
+    """
+    Wrap an RGB pixmap as a numpy array without copying and swap it to BGR in place
+    """
+    image = np.asarray(_PixmapBuffer(pix))
+    cv2.cvtColor(image, cv2.COLOR_RGB2BGR, dst=image)
+    return image
+
+def image_dimensions(upload: SpooledUpload) -> Optional[Tuple[int, int]]:
+    """
+    Width and height from the image header, without decoding the pixels;
+    None for formats PIL does not recognise (OpenCV still gets to try them)
+    """
+    try:
+        with upload.open() as f, Image.open(f) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=413, detail="Image exceeds the decompression size limit")
+    except Exception:
+        return None
+
+def decode_image_bgr(upload: SpooledUpload) -> np.ndarray:
+    """
+    Check the image dimensions, then decode it straight into a BGR array
+    from memory or a memory map of the spooled file
+    """
+    dimensions = image_dimensions(upload)
+    if dimensions is not None:
+        check_pixels(*dimensions)
+    with stage("decode"), upload.buffer() as buffer:
+        encoded = np.frombuffer(buffer, dtype=np.uint8)
+        try:
+            image = cv2.imdecode(encoded, cv2.IMREAD_COLOR) if encoded.size else None
+        except cv2.error:
+            image = None
+        # The view must be released before the memory map is closed
+        del encoded
+    if image is None:
+        raise HTTPException(status_code=400, detail="Error processing image: unsupported or corrupt image data")
+    return image
+
+def page_zoom(page, zoom: float = PDF_ZOOM) -> float:
+    """
+    zoom, reduced for oversized pages so that the rendered page stays
+    within MAX_IMAGE_PIXELS
+    """
+    area = page.rect.width * page.rect.height
+    if area <= 0 or area * zoom ** 2 <= MAX_IMAGE_PIXELS:
+        return zoom
+    return math.sqrt(MAX_IMAGE_PIXELS / area)
+
+class RenderedPage(NamedTuple):
+    """How a PDF page was rasterized; standard_zoom is the zoom of the result coordinates"""
+    zoom: float
+    standard_zoom: float
+    width: float  # points
+    height: float
+    rotation: int
+
+class DocumentPages:
+    """
+    Lazily decoded pages of an uploaded document. Iterating yields
+    (page_number, BGR array) one page at a time, so only the pages that are
+    currently being worked on are held in memory. PDF pages with a usable
+    text layer yield (page_number, TextLayerPage) instead and are never
+    rasterized. PDF pages are rasterized at zoom (capped like PDF_ZOOM),
+    and regions of them can be rendered again at another zoom.
+    """
+
+    def __init__(self, upload: SpooledUpload, text_layer: bool = PDF_TEXT_LAYER, zoom: float = PDF_ZOOM):
+        self._upload = upload
+        self._text_layer = text_layer
+        self.zoom = zoom
+        self.rendered: Dict[int, RenderedPage] = {}
+        # MuPDF documents must not be used from two threads at once
+        self._lock = threading.Lock()
+        self._pdf_document = None
+
+        if upload.content_type == "application/pdf":
+            if not PDF_SUPPORT:
+                raise HTTPException(
+                    status_code=400,
+                    detail="PDF processing not available. Please install PyMuPDF: pip install PyMuPDF==1.23.14"
+                )
+            try:
+                # Spooled files are opened by path so MuPDF reads pages on demand
+                if upload.in_memory:
+                    self._pdf_document = fitz.open(stream=upload.data, filetype="pdf")
+                else:
+                    self._pdf_document = fitz.open(upload.path, filetype="pdf")
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
+            self.page_count = len(self._pdf_document)
+            if self.page_count == 0:
+                self.close()
+                raise HTTPException(status_code=400, detail="No pages found in PDF")
+            if self.page_count > MAX_PDF_PAGES:
+                self.close()
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"PDF has {self.page_count} pages; the limit is {MAX_PDF_PAGES}"
+                )
+        else:
+            self.page_count = 1
+
+    @property
+    def is_pdf(self) -> bool:
+        return self._pdf_document is not None
+
+    def __iter__(self) -> Iterator[Tuple[int, Union[np.ndarray, TextLayerPage]]]:
+        if not self.is_pdf:
+            yield 1, decode_image_bgr(self._upload)
+            return
+
+        for page_index in range(self.page_count):
+            try:
+                with self._lock:
+                    page = self._pdf_document.load_page(page_index)
+                    standard_zoom = page_zoom(page)
+                    text_page = None
+                    if self._text_layer:
+                        with stage("text_layer"):
+                            text_page = read_text_layer(page, standard_zoom)
+                    if text_page is None:
+                        zoom = page_zoom(page, self.zoom)
+                        with stage("pdf_rasterize"):
+                            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+                            image = pixmap_to_bgr(pix)
+                        self.rendered[page_index + 1] = RenderedPage(zoom, standard_zoom, page.rect.width,
+                                                                     page.rect.height, page.rotation)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Error processing PDF page {page_index + 1}: {str(e)}")
+            yield page_index + 1, image if text_page is None else text_page
+
+    def render_region(self, page_number: int, clip: Tuple[float, float, float, float],
+                      zoom: float) -> Tuple[np.ndarray, float]:
+        """
+        Rasterize the clip (x0, y0, x1, y1 in points) of a page at zoom,
+        reduced so that the region stays within MAX_IMAGE_PIXELS. Returns the
+        image and the zoom used.
+        """
+        x0, y0, x1, y1 = clip
+        area = max(x1 - x0, 0.0) * max(y1 - y0, 0.0)
+        if area * zoom ** 2 > MAX_IMAGE_PIXELS:
+            zoom = math.sqrt(MAX_IMAGE_PIXELS / area)
+        with self._lock, stage("pdf_rasterize"):
+            page = self._pdf_document.load_page(page_number - 1)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(clip),
+                                  colorspace=fitz.csRGB, alpha=False)
+            return pixmap_to_bgr(pix), zoom
+
+    def close(self):
+        with self._lock:
+            if self._pdf_document is not None:
+                self._pdf_document.close()
+                self._pdf_document = None
@@ -9,7 +9,8 @@ from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 import logging
-from ml_models import ml_models, initialize_models
+
+from metrics import stage
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -38,15 +39,36 @@ class DSSService:
     
     def __init__(self):
         self.models_initialized = False
+        self.ml_models = None
     
     def ensure_models_loaded(self):
         """Ensure ML models are loaded"""
         if not self.models_initialized:
             logger.info("Initializing ML models...")
+            # Imported lazily: scikit-learn and pandas are slow to import
+            from ml_models import ml_models, initialize_models
             initialize_models()
+            self.ml_models = ml_models
             self.models_initialized = True
             logger.info("ML models initialized successfully")
     
+    def warm_up(self):
+        """Run one prediction so the first real request does not pay for lazy setup"""
+        self.analyze_claim(ClaimData(
+            area_claimed=2.0,
+            family_size=4,
+            years_of_use=20.0,
+            documentation_score=0.7,
+            community_support=0.8,
+            environmental_impact=0.3,
+            legal_compliance=0.8,
+            distance_to_forest=2.0,
+            previous_violations=0,
+            land_type='agricultural',
+            state='Jharkhand',
+            season_applied='winter'
+        ))
+    
     def extract_features_from_ocr(self, ocr_result: Dict) -> Dict:
         """Extract claim features from OCR results"""
         extracted_text = ocr_result.get('extracted_text', '').lower()
@@ -72,11 +94,15 @@ class DSSService:
             entity_type = entity.get('type', '').upper()
             entity_value = entity.get('value', '').lower()
             confidence = entity.get('confidence', 0)
+            normalized = entity.get('normalized') or {}
             
             if confidence < 0.7:
                 continue
             
-            if entity_type == 'AREA':
+            if entity_type == 'AREA' and 'hectares' in normalized:
+                features['area_claimed'] = normalized['hectares']
+            
+            elif entity_type == 'AREA':
                 import re
                 area_match = re.search(r'(\d+(?:\.\d+)?)', entity_value)
                 if area_match:
@@ -90,10 +116,10 @@ class DSSService:
                 features['claimant_name'] = entity.get('value', '')
             
             elif entity_type in ['VILLAGE', 'LOCATION']:
-                features['village'] = entity.get('value', '')
+                features['village'] = normalized.get('name', entity.get('value', ''))
             
             elif entity_type == 'DISTRICT':
-                features['district'] = entity.get('value', '')
+                features['district'] = normalized.get('name', entity.get('value', ''))
         
         return features
     
@@ -106,15 +132,20 @@ class DSSService:
         claim_dict = claim_data.dict()
         
         if ocr_result:
-            ocr_features = self.extract_features_from_ocr(ocr_result)
+            with stage("feature_extraction"):
+                ocr_features = self.extract_features_from_ocr(ocr_result)
             for key, value in ocr_features.items():
                 if key not in claim_dict or claim_dict[key] is None:
                     claim_dict[key] = value
         
-        prediction = ml_models.predict_decision(claim_dict)
-        risk_assessment = ml_models.assess_risk(claim_dict)
-        similar_cases = ml_models.find_similar_cases(claim_dict)
-        reasoning = ml_models.generate_reasoning(claim_dict, prediction, risk_assessment)
+        with stage("predict"):
+            prediction = self.ml_models.predict_decision(claim_dict)
+        with stage("risk"):
+            risk_assessment = self.ml_models.assess_risk(claim_dict)
+        with stage("precedent_search"):
+            similar_cases = self.ml_models.find_similar_cases(claim_dict)
+        with stage("reasoning"):
+            reasoning = self.ml_models.generate_reasoning(claim_dict, prediction, risk_assessment)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
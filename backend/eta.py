@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Running model of observed stage durations used for the estimated_completion
+of progress updates
+"""
+
+import math
+import os
+import threading
+from typing import Dict, Optional
+
+# Weight of the newest observation in the moving averages
+ETA_ALPHA = float(os.getenv("ETA_ALPHA", 0.2))
+
+# Starting rates (seconds per unit) until a stage has been observed; units
+# are given next to each stage
+ETA_DEFAULTS: Dict[str, float] = {
+    "render": 0.3,        # per page (PDF rasterization or image decode)
+    "ocr_page": 4.0,      # per megapixel of a page (preprocessing, detection, recognition)
+    "page_megapixels": 2.0,  # megapixels of a page (A4 at 2x zoom is about 2)
+    "ner": 0.1,           # per page of text (including the batching window)
+    "ocr_document": 15.0, # per document (cache miss, everything from decoding to NER)
+    "pool_task": 2.0,     # per task on the OCR worker pool
+    "encode": 0.1,        # per result (response encoding)
+    "dss": 1.0            # per claim (feature extraction, prediction, risk, precedents)
+}
+
+class ETAModel:
+    """
+    Exponentially weighted moving average of seconds per unit for each stage,
+    updated from worker threads as stages finish
+    """
+
+    def __init__(self, alpha: float = ETA_ALPHA, defaults: Optional[Dict[str, float]] = None):
+        self.alpha = alpha
+        self._rates: Dict[str, float] = dict(ETA_DEFAULTS if defaults is None else defaults)
+        self._observations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, units: float = 1.0):
+        """Record that stage took seconds for units of work"""
+        if units <= 0 or seconds < 0:
+            return
+        rate = seconds / units
+        with self._lock:
+            count = self._observations.get(stage, 0)
+            previous = self._rates.get(stage)
+            # The first observation replaces the default outright
+            self._rates[stage] = rate if count == 0 or previous is None else previous + self.alpha * (rate - previous)
+            self._observations[stage] = count + 1
+
+    def rate(self, stage: str) -> float:
+        """Current seconds per unit of stage"""
+        return self._rates.get(stage, 0.0)
+
+    def estimate(self, stage: str, units: float = 1.0) -> float:
+        return self.rate(stage) * max(units, 0.0)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {"rate": round(rate, 4), "observations": self._observations.get(stage, 0)}
+                for stage, rate in self._rates.items()
+            }
+
+def to_seconds(estimate: float) -> int:
+    """Whole seconds for ProcessingStatus.estimated_completion"""
+    return max(0, int(math.ceil(estimate)))
+
+# Global ETA model instance
+eta_model = ETAModel()
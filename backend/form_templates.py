@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Registry of the statutory FRA claim forms (Form A individual, Form B
+community, Form C community forest resource) with their field regions, a
+header-keyword classifier and the page alignment used to read the fields
+of a recognised form
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from tiling import sort_reading_order
+
+logger = logging.getLogger(__name__)
+
+# Set to false to skip recognising claim forms
+FORM_TEMPLATES = os.getenv("FORM_TEMPLATES", "true").lower() == "true"
+# Set to true to OCR only the header and field crops of recognised forms
+# instead of the whole page; text outside the fields is then not extracted,
+# so only use it with regions calibrated for the forms being scanned
+FORM_FIELDS_ONLY = os.getenv("FORM_TEMPLATES_FIELDS_ONLY", "false").lower() == "true"
+# JSON file of template definitions (same schema as FORM_TEMPLATE_DEFINITIONS)
+# replacing the built-in ones, e.g. for a state's print of the forms
+FORM_TEMPLATES_FILE = os.getenv("FORM_TEMPLATES_FILE", "")
+# Header strip of the aligned page that is OCRed to classify it (x0, y0, x1, y1)
+HEADER_REGION = (0.0, 0.0, 1.0, 0.14)
+# Header keywords a template needs to match
+MIN_KEYWORD_HITS = 2
+# Height / width range of pages that can be a form (letter 1.29, A4 1.41, legal 1.65)
+FORM_ASPECT_RANGE = (1.2, 1.75)
+# Fraction of a template's fields that must be read, otherwise the page is OCRed in full
+MIN_FILLED_FIELDS = 0.5
+# Crops are widened by this fraction of the aligned page on each side
+FIELD_PADDING = 0.005
+# Darker than the page background by this much counts as ink (alignment)
+INK_CONTRAST = 60
+# Rows and columns with a smaller fraction of ink are margin (alignment)
+MARGIN_INK_RATIO = 0.002
+
+# Regions are (x0, y0, x1, y1) fractions of the aligned page: the box around
+# all printed content, so scanner margins and offsets do not move them.
+# Keywords are matched against the normalised header text.
+FORM_TEMPLATE_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "form_a": {
+        "title": "Form A - Claim form for rights to forest land",
+        "keywords": ["claim form", "form a", "rights to forest land"],
+        "fields": [
+            {"name": "claimant", "label": "Name of the claimant", "region": [0.42, 0.14, 0.99, 0.18]},
+            {"name": "spouse", "label": "Name of the spouse", "region": [0.42, 0.18, 0.99, 0.22]},
+            {"name": "parent", "label": "Name of father or mother", "region": [0.42, 0.22, 0.99, 0.26]},
+            {"name": "address", "label": "Address", "region": [0.42, 0.26, 0.99, 0.31]},
+            {"name": "village", "label": "Village", "region": [0.42, 0.31, 0.99, 0.35]},
+            {"name": "gram_panchayat", "label": "Gram Panchayat", "region": [0.42, 0.35, 0.99, 0.39]},
+            {"name": "tehsil", "label": "Tehsil", "region": [0.42, 0.39, 0.99, 0.43]},
+            {"name": "district", "label": "District", "region": [0.42, 0.43, 0.99, 0.47]},
+            {"name": "category", "label": "Scheduled Tribe or other traditional forest dweller",
+             "region": [0.42, 0.47, 0.99, 0.52]},
+            {"name": "family_members", "label": "Other members of the family", "region": [0.42, 0.52, 0.99, 0.62]},
+            {"name": "area_habitation", "label": "Area for habitation", "region": [0.42, 0.66, 0.99, 0.70]},
+            {"name": "area_cultivation", "label": "Area for self-cultivation", "region": [0.42, 0.70, 0.99, 0.74]},
+            {"name": "survey_number", "label": "Survey number", "region": [0.42, 0.86, 0.99, 0.92]}
+        ]
+    },
+    "form_b": {
+        "title": "Form B - Claim form for community rights",
+        "keywords": ["claim form", "form b", "community rights"],
+        "fields": [
+            {"name": "claimant", "label": "Name of the claimants", "region": [0.42, 0.14, 0.99, 0.20]},
+            {"name": "village", "label": "Village", "region": [0.42, 0.20, 0.99, 0.24]},
+            {"name": "gram_panchayat", "label": "Gram Panchayat", "region": [0.42, 0.24, 0.99, 0.28]},
+            {"name": "tehsil", "label": "Tehsil", "region": [0.42, 0.28, 0.99, 0.32]},
+            {"name": "district", "label": "District", "region": [0.42, 0.32, 0.99, 0.36]},
+            {"name": "category", "label": "Scheduled Tribe or other traditional forest dweller",
+             "region": [0.42, 0.36, 0.99, 0.41]},
+            {"name": "community_rights", "label": "Nature of community rights", "region": [0.42, 0.41, 0.99, 0.80]}
+        ]
+    },
+    "form_c": {
+        "title": "Form C - Claim form for rights to community forest resource",
+        "keywords": ["claim form", "form c", "community forest resource"],
+        "fields": [
+            {"name": "village", "label": "Village", "region": [0.42, 0.14, 0.99, 0.19]},
+            {"name": "gram_panchayat", "label": "Gram Panchayat", "region": [0.42, 0.19, 0.99, 0.23]},
+            {"name": "tehsil", "label": "Tehsil", "region": [0.42, 0.23, 0.99, 0.27]},
+            {"name": "district", "label": "District", "region": [0.42, 0.27, 0.99, 0.31]},
+            {"name": "claimant", "label": "Names of the members of the Gram Sabha", "region": [0.05, 0.35, 0.99, 0.55]},
+            {"name": "survey_number", "label": "Khasra or compartment number", "region": [0.42, 0.60, 0.99, 0.66]},
+            {"name": "bordering_villages", "label": "Bordering villages", "region": [0.42, 0.66, 0.99, 0.72]}
+        ]
+    }
+}
+
+Region = Tuple[float, float, float, float]
+PixelBox = Tuple[int, int, int, int]
+
+class FormField(NamedTuple):
+    name: str
+    label: str
+    region: Region
+
+class FormTemplate(NamedTuple):
+    name: str
+    title: str
+    keywords: Tuple[str, ...]
+    fields: Tuple[FormField, ...]
+
+def build_templates(definitions: Dict[str, Dict[str, Any]]) -> Dict[str, FormTemplate]:
+    return {
+        name: FormTemplate(
+            name,
+            definition["title"],
+            tuple(normalize_text(keyword) for keyword in definition["keywords"]),
+            tuple(FormField(field["name"], field["label"], tuple(field["region"])) for field in definition["fields"])
+        )
+        for name, definition in definitions.items()
+    }
+
+def load_template_definitions(path: str = FORM_TEMPLATES_FILE) -> Dict[str, Dict[str, Any]]:
+    """The definitions of FORM_TEMPLATES_FILE, or the built-in ones"""
+    if not path:
+        return FORM_TEMPLATE_DEFINITIONS
+    try:
+        with open(path, encoding="utf-8") as f:
+            definitions = json.load(f)
+        build_templates(definitions)
+        logger.info(f"Loaded {len(definitions)} form template(s) from {path}")
+        return definitions
+    except Exception as e:
+        logger.error(f"Failed to load form templates from {path}, using the built-in ones: {e}")
+        return FORM_TEMPLATE_DEFINITIONS
+
+def normalize_text(text: str) -> str:
+    """Lower-case words separated by single spaces ("FORM - A" becomes "form a")"""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+def is_form_shaped(shape: Sequence[int]) -> bool:
+    height, width = shape[:2]
+    return width > 0 and FORM_ASPECT_RANGE[0] <= height / width <= FORM_ASPECT_RANGE[1]
+
+def content_box(image: np.ndarray) -> PixelBox:
+    """
+    Align the page: the box around its printed content, from the ink
+    profile of a strided greyscale sample (the whole page if it has no ink)
+    """
+    step = 4
+    sample = image[::step, ::step]
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+    height, width = image.shape[:2]
+    if sample.size == 0:
+        return 0, 0, width, height
+    ink = sample < float(np.median(sample)) - INK_CONTRAST
+    rows = np.flatnonzero(ink.mean(axis=1) > MARGIN_INK_RATIO)
+    columns = np.flatnonzero(ink.mean(axis=0) > MARGIN_INK_RATIO)
+    if not len(rows) or not len(columns):
+        return 0, 0, width, height
+    return (int(columns[0]) * step, int(rows[0]) * step,
+            min(width, (int(columns[-1]) + 1) * step), min(height, (int(rows[-1]) + 1) * step))
+
+def region_box(region: Region, box: PixelBox, padding: float = 0.0) -> PixelBox:
+    """Pixel box of a normalised region of the aligned page box"""
+    x0, y0, x1, y1 = box
+    width, height = x1 - x0, y1 - y0
+    return (
+        max(x0, int(x0 + (region[0] - padding) * width)),
+        max(y0, int(y0 + (region[1] - padding) * height)),
+        min(x1, int(round(x0 + (region[2] + padding) * width))),
+        min(y1, int(round(y0 + (region[3] + padding) * height)))
+    )
+
+def header_box(box: PixelBox) -> PixelBox:
+    return region_box(HEADER_REGION, box)
+
+def field_boxes(template: FormTemplate, box: PixelBox) -> List[Tuple[FormField, PixelBox]]:
+    """Pixel crops of the template's fields, skipping any that are empty after clipping"""
+    crops = []
+    for field in template.fields:
+        x0, y0, x1, y1 = region_box(field.region, box, FIELD_PADDING)
+        if x1 > x0 and y1 > y0:
+            crops.append((field, (x0, y0, x1, y1)))
+    return crops
+
+def classify(header_text: str, templates: Optional[Dict[str, FormTemplate]] = None) -> Optional[FormTemplate]:
+    """The template whose keywords the header matches best, or None (no match or a tie)"""
+    text = f" {normalize_text(header_text)} "
+    scores = sorted(
+        ((sum(1 for keyword in template.keywords if f" {keyword} " in text), template)
+         for template in (form_templates if templates is None else templates).values()),
+        key=lambda item: item[0], reverse=True
+    )
+    if not scores or scores[0][0] < MIN_KEYWORD_HITS:
+        return None
+    if len(scores) > 1 and scores[1][0] == scores[0][0]:
+        return None
+    return scores[0][1]
+
+def _centre(bbox) -> Tuple[float, float]:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+
+def results_in(results: List, box: PixelBox) -> List:
+    """EasyOCR results whose centre lies inside a pixel box"""
+    x0, y0, x1, y1 = box
+    inside = []
+    for result in results:
+        x, y = _centre(result[0])
+        if x0 <= x < x1 and y0 <= y < y1:
+            inside.append(result)
+    return inside
+
+def offset_results(results: List, x: int, y: int) -> List:
+    """Shift EasyOCR results of a crop into page coordinates"""
+    return [([[point[0] + x, point[1] + y] for point in bbox], text, confidence)
+            for bbox, text, confidence in results]
+
+def field_values(field: FormField, results: List) -> List:
+    """
+    The results of a field crop without its printed label: leading words of
+    each result that belong to the label (or are only punctuation) are
+    stripped, and results left empty are dropped
+    """
+    label_words = set(normalize_text(field.label).split()) | {""}
+    values = []
+    for bbox, text, confidence in results:
+        words = text.split()
+        while words and normalize_text(words[0]) in label_words:
+            words.pop(0)
+        if words:
+            values.append((bbox, " ".join(words), confidence))
+    return values
+
+def read_fields(template: FormTemplate, field_results: List[Tuple[FormField, List]]) -> Optional[Dict[str, Any]]:
+    """
+    The form record of a page from the EasyOCR results of each field crop
+    (in reading order), or None when too few fields hold a value beyond
+    their label for the page to be this form
+    """
+    fields = {}
+    for field, results in field_results:
+        values = field_values(field, results)
+        if not values:
+            continue
+        fields[field.name] = {
+            "label": field.label,
+            "value": " ".join(text for _, text, _ in values),
+            "confidence": round(float(np.mean([confidence for _, _, confidence in values])), 4)
+        }
+    if len(fields) < MIN_FILLED_FIELDS * len(template.fields):
+        return None
+    return {"form_type": template.name, "title": template.title, "fields": fields}
+
+def match_form(image: np.ndarray, results: List) -> Optional[Dict[str, Any]]:
+    """
+    The form record of a page OCRed in full, from its words inside the
+    header and field regions of the aligned page, or None when it is not
+    a known form
+    """
+    box = content_box(image)
+    template = classify(" ".join(text for _, text, _ in results_in(results, header_box(box))))
+    if template is None:
+        return None
+    return read_fields(template, [(field, sort_reading_order(results_in(results, crop)))
+                                  for field, crop in field_boxes(template, box)])
+
+form_template_definitions = load_template_definitions()
+form_templates = build_templates(form_template_definitions)
+
+FORM_TEMPLATES_CONFIG: Dict[str, Any] = {
+    "enabled": FORM_TEMPLATES,
+    "fields_only": FORM_FIELDS_ONLY,
+    "templates": hashlib.sha256(json.dumps(form_template_definitions, sort_keys=True).encode()).hexdigest()[:16]
+}
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Compiled single-pass extractor for FRA-specific entities (claim and survey
+numbers, areas, dates, phone numbers and locations), shared by the OCR
+service and the AI backend
+"""
+
+import re
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+# Bump whenever a pattern or normalizer changes so cached OCR results are not reused
+FRA_ENTITIES_VERSION = "fra-entities-v2"
+
+HECTARES_PER_UNIT: Dict[str, float] = {
+    "hectare": 1.0,
+    "acre": 0.40468564224,
+    "sq_m": 0.0001,
+    "sq_km": 100.0,
+    "sq_ft": 0.000009290304
+}
+
+MONTHS = {month: index for index, month in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+
+LOCATION_KEYWORDS: Dict[str, str] = {
+    "gram sabha": "VILLAGE",
+    "village": "VILLAGE",
+    "gram": "VILLAGE",
+    "gaon": "VILLAGE",
+    "district": "DISTRICT",
+    "zilla": "DISTRICT",
+    "tehsil": "TEHSIL",
+    "taluka": "TEHSIL",
+    "block": "BLOCK",
+    "panchayat": "PANCHAYAT"
+}
+
+# Longest first, so that 'gram sabha' is preferred over 'gram'
+_LOCATION_KEYWORDS = "(?:" + "|".join(keyword.replace(" ", r"[ \t]+")
+                                      for keyword in sorted(LOCATION_KEYWORDS, key=len, reverse=True)) + ")"
+_STOPWORDS = r"(?:the|a|an|of|in|at|from|this|that|said|same|and|or|to|whose)"
+# Words next to a location keyword that are not part of a place name
+_NON_PLACE_WORDS = (r"(?:sabha|samiti|committee|resolution|meeting|members?|office|officer|secretary|"
+                    r"sarpanch|president|level|headquarters?|dated)")
+_NAME_WORD = rf"(?!(?:{_STOPWORDS}|{_LOCATION_KEYWORDS}|{_NON_PLACE_WORDS})\b)[A-Za-z]+"
+# Up to three words, none of them a stopword, location keyword or non-place word
+_PLACE_NAME = rf"{_NAME_WORD}(?:[ \t]+{_NAME_WORD}){{0,2}}"
+
+class EntityMatch(NamedTuple):
+    type: str
+    text: str
+    confidence: float
+    start: int
+    end: int
+    normalized: Optional[Dict[str, Any]]
+
+Groups = Dict[str, Optional[str]]
+
+class EntityPattern(NamedTuple):
+    name: str
+    regex: str
+    confidence: float
+    normalize: Optional[Callable[[Groups], Optional[Dict[str, Any]]]] = None
+    # Entity types the pattern produces and how a match picks one (default: just name)
+    types: Optional[Sequence[str]] = None
+    classify: Optional[Callable[[Groups], str]] = None
+
+def _normalize_area(groups: Groups) -> Dict[str, Any]:
+    unit_text = groups["unit"].lower().replace(".", "").replace(" ", "")
+    if unit_text.startswith(("hectare", "ha")):
+        unit = "hectare"
+    elif unit_text.startswith(("acre", "ac")):
+        unit = "acre"
+    elif "km" in unit_text:
+        unit = "sq_km"
+    elif "ft" in unit_text or "feet" in unit_text:
+        unit = "sq_ft"
+    else:
+        unit = "sq_m"
+    amount = float(groups["amount"].replace(",", ""))
+    return {"amount": amount, "unit": unit, "hectares": round(amount * HECTARES_PER_UNIT[unit], 6)}
+
+def _normalize_survey_number(groups: Groups) -> Dict[str, Any]:
+    parts = re.split(r"\s*[/-]\s*", groups["number"].strip())
+    return {"survey_number": "/".join(part.upper() for part in parts if part)}
+
+def _normalize_date(groups: Groups) -> Optional[Dict[str, Any]]:
+    day = int(groups["day"] or groups["day_named"])
+    month = int(groups["month"]) if groups["month"] else MONTHS[groups["month_name"][:3].lower()]
+    year = int(groups["year"] or groups["year_named"])
+    if year < 100:
+        year += 2000 if year < 50 else 1900
+    try:
+        return {"date": date(year, month, day).isoformat()}
+    except ValueError:
+        return None
+
+def _normalize_phone(groups: Groups) -> Dict[str, Any]:
+    return {"phone": "+91" + groups["subscriber"]}
+
+def _normalize_claim_number(groups: Groups) -> Dict[str, Any]:
+    return {"claim_number": groups["claim"].upper()}
+
+def _normalize_location(groups: Groups) -> Dict[str, Any]:
+    return {"name": " ".join((groups["after"] or groups["before"]).split()).title()}
+
+def _classify_location(groups: Groups) -> str:
+    return LOCATION_KEYWORDS[" ".join((groups["keyword"] or groups["keyword_after"]).lower().split())]
+
+# In priority order: where matches overlap, the earlier pattern wins
+FRA_ENTITY_PATTERNS: List[EntityPattern] = [
+    EntityPattern("CLAIM_NUMBER", r"(?-i:\b(?P<claim>FRA\d{7,10})\b)", 0.95, _normalize_claim_number),
+    EntityPattern("SURVEY_NUMBER",
+                  r"\b(?:Survey|Khasra|S\.?)\s*(?:No\.?|Number)\s*:?\s*(?P<number>\d+[A-Za-z]?(?:\s*[/-]\s*\d+[A-Za-z]?)*)\b",
+                  0.9, _normalize_survey_number),
+    EntityPattern("AREA",
+                  r"(?P<amount>\d+(?:,\d{3})*(?:\.\d+)?)\s*"
+                  r"(?P<unit>hectares?\b|ha\b|acres?\b|ac\b|sq\.?\s*(?:km|m|ft)\b|square\s+(?:kilometres?|kilometers?|metres?|meters?|feet)\b)",
+                  0.9, _normalize_area),
+    EntityPattern("DATE",
+                  r"\b(?:(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4}|\d{2})"
+                  r"|(?P<day_named>\d{1,2})\s+(?P<month_name>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\.?,?\s+(?P<year_named>\d{4}|\d{2}))\b",
+                  0.9, _normalize_date),
+    EntityPattern("PHONE", r"(?<!\d)(?:\+?91[-.\s]?)?(?P<subscriber>[6-9]\d{9})\b", 0.9, _normalize_phone),
+    # 'Village Ramgarh', 'village of Ramgarh' as well as 'Ramgarh village';
+    # one alternative for all keywords is much cheaper than one per location type
+    EntityPattern("LOCATION",
+                  rf"\b(?:(?P<keyword>{_LOCATION_KEYWORDS})(?:[ \t]*:[ \t]*|[ \t]+)(?:of[ \t]+)?(?P<after>{_PLACE_NAME})\b"
+                  rf"|(?P<before>{_NAME_WORD})[ \t]+(?P<keyword_after>{_LOCATION_KEYWORDS})\b)",
+                  0.8, _normalize_location,
+                  types=sorted(set(LOCATION_KEYWORDS.values())), classify=_classify_location)
+]
+
+class FRAEntityEngine:
+    """
+    Compiles a set of entity patterns into one alternation of named groups so
+    that the text is scanned once. Matches never overlap: at each position
+    the earliest pattern in priority order wins and scanning resumes after it.
+    Every pattern starts at a word start (or '+'), which the scanner checks
+    before trying any alternative.
+    """
+
+    def __init__(self, patterns: Sequence[EntityPattern] = FRA_ENTITY_PATTERNS, types: Optional[Sequence[str]] = None):
+        self.types = set(types) if types is not None else None
+        self.patterns: Dict[str, EntityPattern] = {}
+        self._group_names: Dict[str, Dict[str, str]] = {}
+        alternatives = []
+        for pattern in patterns:
+            if self.types is not None and not self.types.intersection(pattern.types or [pattern.name]):
+                continue
+            # Inner group names must be unique across the alternation
+            prefix = f"{pattern.name}__"
+            inner = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<{prefix}{m.group(1)}>", pattern.regex)
+            self._group_names[pattern.name] = {
+                name: prefix + name for name in re.findall(r"\(\?P<(\w+)>", pattern.regex)
+            }
+            self.patterns[pattern.name] = pattern
+            alternatives.append(f"(?P<{pattern.name}>{inner})")
+        self.regex = re.compile(r"(?<![A-Za-z0-9])(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+    def finditer(self, text: str) -> Iterator[EntityMatch]:
+        for match in self.regex.finditer(text):
+            name = match.lastgroup
+            pattern = self.patterns[name]
+            groups = {group: match.group(inner) for group, inner in self._group_names[name].items()}
+            entity_type = pattern.classify(groups) if pattern.classify is not None else name
+            if self.types is not None and entity_type not in self.types:
+                continue
+            normalized = pattern.normalize(groups) if pattern.normalize is not None else None
+            yield EntityMatch(entity_type, match.group(name), pattern.confidence,
+                              match.start(), match.end(), normalized)
+
+    def extract(self, text: str) -> List[EntityMatch]:
+        """All entities of the text in order of appearance"""
+        return list(self.finditer(text))
+
+# Engine with every FRA entity type
+fra_entity_engine = FRAEntityEngine()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Lightweight in-process metrics (counters, gauges and latency histograms per
+pipeline stage) rendered in the Prometheus text exposition format
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; OCR stages range from milliseconds (entities) to
+# tens of seconds (recognition of a dense page on CPU)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+class Gauge:
+    """
+    Current value per label set, either set by the code or read from a
+    callback when metrics are scraped (so the hot path pays nothing)
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str,
+                 callback: Optional[Callable[[], Dict[Labels, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception:
+                pass
+        for labels, value in values.items():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observations per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts (non-cumulative, last one is +Inf), sum]
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+class MetricsRegistry:
+    """Named metrics of the service; render() produces the /metrics body"""
+
+    def __init__(self, namespace: str = "fra"):
+        self.namespace = namespace
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation))
+
+    def gauge(self, name: str, documentation: str,
+              callback: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+        return self._register(Gauge(f"{self.namespace}_{name}", documentation, callback))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds", "Time spent in each stage of the OCR and DSS pipelines"
+)
+stage_errors = metrics.counter(
+    "stage_errors_total", "Stage executions that raised an exception"
+)
+
+# Per-thread list that stage() also appends its timings to (see collect_stages)
+_collected = threading.local()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage into stage_duration_seconds{stage=name}; failures
+    are counted in stage_errors_total and re-raised
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        stage_errors.inc(stage=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=name)
+        timings = getattr(_collected, "timings", None)
+        if timings is not None:
+            timings.append((name, elapsed, failed))
+
+StageTiming = Tuple[str, float, bool]
+
+@contextmanager
+def collect_stages() -> Iterator[List[StageTiming]]:
+    """
+    Also collect the (stage, seconds, failed) timings of this thread, so that
+    a worker process can send them back to the registry of the service
+    """
+    previous = getattr(_collected, "timings", None)
+    _collected.timings = []
+    try:
+        yield _collected.timings
+    finally:
+        _collected.timings = previous
+
+def record_stages(timings: Sequence[StageTiming]):
+    """Record stage timings collected in another process"""
+    for name, elapsed, failed in timings:
+        stage_seconds.observe(elapsed, stage=name)
+        if failed:
+            stage_errors.inc(stage=name)
+
+def labelled(values: Dict[str, float], label: str) -> Dict[Labels, float]:
+    """Turn {"a": 1, "b": 2} into gauge samples labelled label="a" / label="b" """
+    return {((label, key),): value for key, value in values.items()}
+
+request_seconds = metrics.histogram(
+    "request_duration_seconds", "End-to-end latency of the OCR and analysis endpoints"
+)
+requests_total = metrics.counter(
+    "requests_total", "Requests handled by the OCR and analysis endpoints, by outcome"
+)
+
+@contextmanager
+def track_request(endpoint: str) -> Iterator[None]:
+    """Time an endpoint and count it by HTTP status (500 for unexpected errors)"""
+    start = time.perf_counter()
+    status = "200"
+    try:
+        yield
+    except BaseException as e:
+        status = str(getattr(e, "status_code", 500))
+        raise
+    finally:
+        request_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+        requests_total.inc(endpoint=endpoint, status=status)
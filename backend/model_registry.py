@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Background model loading with per-model readiness for the FRA Atlas services
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Seconds clients are told to wait while a model is still loading
+MODEL_RETRY_AFTER = int(os.getenv("MODEL_RETRY_AFTER", 5))
+
+class ModelEntry:
+    """Loader, warm-up and load state of one model"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.state = "pending"
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.load_time_ms: Optional[float] = None
+        self.warmup_time_ms: Optional[float] = None
+        self.ready: Optional[asyncio.Event] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "load_time_ms": self.load_time_ms,
+            "warmup_time_ms": self.warmup_time_ms,
+            "error": self.error
+        }
+
+class ModelRegistry:
+    """
+    Loads registered models in background tasks after the server has bound
+    its port, so startup is fast and endpoints can report 503 until ready
+    """
+
+    def __init__(self):
+        self._models: Dict[str, ModelEntry] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self._models[name] = ModelEntry(name, loader, warmup)
+
+    async def _load(self, entry: ModelEntry):
+        entry.state = "loading"
+        try:
+            start = time.perf_counter()
+            entry.value = await run_in_threadpool(entry.loader)
+            entry.load_time_ms = round((time.perf_counter() - start) * 1000, 1)
+            if entry.warmup is not None and entry.value is not None:
+                start = time.perf_counter()
+                await run_in_threadpool(entry.warmup, entry.value)
+                entry.warmup_time_ms = round((time.perf_counter() - start) * 1000, 1)
+            entry.state = "ready"
+            logger.info(f"Model '{entry.name}' ready in {entry.load_time_ms} ms (warm-up {entry.warmup_time_ms} ms)")
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = str(e)
+            logger.error(f"Model '{entry.name}' failed to load: {e}")
+        finally:
+            entry.ready.set()
+
+    def start(self):
+        """Schedule loading of every registered model without waiting for it"""
+        for entry in self._models.values():
+            entry.ready = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._load(entry)) for entry in self._models.values()]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def is_ready(self, name: str) -> bool:
+        return self._models[name].state == "ready"
+
+    def get(self, name: str) -> Any:
+        """Loaded model, or None while it is not ready"""
+        entry = self._models[name]
+        return entry.value if entry.state == "ready" else None
+
+    async def wait_ready(self, *names: str):
+        """Wait until the models have finished loading; raises if one failed"""
+        for name in names:
+            entry = self._models[name]
+            await entry.ready.wait()
+            if entry.state != "ready":
+                raise RuntimeError(f"Model '{name}' failed to load: {entry.error}")
+
+    def require(self, *names: str) -> Callable[[], None]:
+        """FastAPI dependency that answers 503 with Retry-After until the models are ready"""
+        async def dependency():
+            for name in names:
+                entry = self._models[name]
+                if entry.state == "failed":
+                    raise HTTPException(status_code=503, detail=f"Model '{name}' failed to load: {entry.error}")
+                if entry.state != "ready":
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Model '{name}' is still loading",
+                        headers={"Retry-After": str(MODEL_RETRY_AFTER)}
+                    )
+        return dependency
+
+    def all_ready(self) -> bool:
+        return all(entry.state == "ready" for entry in self._models.values())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: entry.describe() for name, entry in self._models.items()}
+
+# Global model registry instance
+model_registry = ModelRegistry()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Trimmed spaCy NER pipeline with chunking and micro-batched nlp.pipe calls
+"""
+
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from metrics import stage
+from ocr_pool import ocr_executor
+from ocr_columns import EntityRow
+
+logger = logging.getLogger(__name__)
+
+NER_MODEL = os.getenv("NER_MODEL", "en_core_web_sm")
+# Texts handed to one nlp.pipe call
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 32))
+# How long a request waits for concurrent requests to share its batch
+NER_BATCH_WAIT_MS = float(os.getenv("NER_BATCH_WAIT_MS", 5))
+# Longer texts are split along sentence or line boundaries
+NER_MAX_CHUNK_CHARS = int(os.getenv("NER_MAX_CHUNK_CHARS", 5000))
+# spaCy doesn't provide confidence scores by default
+NER_CONFIDENCE = 0.8
+
+NER_CONFIG: Dict[str, Any] = {
+    "model": NER_MODEL,
+    "max_chunk_chars": NER_MAX_CHUNK_CHARS
+}
+
+# Line breaks, and whitespace after sentence-ending punctuation (incl. the danda)
+_BOUNDARY = re.compile(r"\n+|(?<=[.!?।|])\s+")
+
+def _ner_dependencies(nlp: Any) -> Set[str]:
+    """The ner component plus any shared tok2vec it listens to"""
+    needed = {"ner"}
+    for name, component in nlp.pipeline:
+        if "ner" in getattr(component, "listener_map", {}):
+            needed.add(name)
+    return needed
+
+def load_ner_model() -> Any:
+    """Load the spaCy model with every component that doesn't feed doc.ents disabled"""
+    import spacy
+    nlp = spacy.load(NER_MODEL)
+    needed = _ner_dependencies(nlp)
+    for name in list(nlp.pipe_names):
+        if name not in needed:
+            nlp.disable_pipe(name)
+    logger.info(f"spaCy NER pipeline: {', '.join(nlp.pipe_names)} (disabled: {', '.join(nlp.disabled)})")
+    return nlp
+
+def chunk_text(text: str, max_chars: int = NER_MAX_CHUNK_CHARS) -> List[Tuple[int, str]]:
+    """
+    Split text into (offset, chunk) pieces of at most max_chars, cutting at
+    sentence or line boundaries and falling back to whitespace
+    """
+    if len(text) <= max_chars:
+        return [(0, text)]
+    chunks = []
+    chunk_start = 0
+    last_cut = 0
+    for cut in [match.end() for match in _BOUNDARY.finditer(text)] + [len(text)]:
+        if cut - chunk_start > max_chars and last_cut > chunk_start:
+            chunks.append((chunk_start, text[chunk_start:last_cut]))
+            chunk_start = last_cut
+        while cut - chunk_start > max_chars:
+            split = text.rfind(" ", chunk_start + 1, chunk_start + max_chars)
+            if split <= chunk_start:
+                split = chunk_start + max_chars
+            chunks.append((chunk_start, text[chunk_start:split]))
+            chunk_start = split
+        last_cut = cut
+    if chunk_start < len(text):
+        chunks.append((chunk_start, text[chunk_start:]))
+    return chunks
+
+def run_ner(nlp: Any, texts: Sequence[str]) -> List[List[EntityRow]]:
+    """Entities of every text, found with one nlp.pipe call over all chunks"""
+    chunks = [
+        (index, offset, chunk)
+        for index, text in enumerate(texts)
+        for offset, chunk in chunk_text(text)
+        if chunk.strip()
+    ]
+    results: List[List[EntityRow]] = [[] for _ in texts]
+    with stage("ner"):
+        docs = nlp.pipe((chunk for _, _, chunk in chunks), batch_size=NER_BATCH_SIZE)
+        for (index, offset, _), doc in zip(chunks, docs):
+            results[index].extend(
+                (ent.label_, ent.text, NER_CONFIDENCE, ent.start_char + offset, ent.end_char + offset)
+                for ent in doc.ents
+            )
+    return results
+
+class NERBatcher:
+    """
+    Coalesces NER requests that arrive within a few milliseconds of each
+    other (pages of one document, documents of one batch) into a single
+    nlp.pipe call on the OCR workers
+    """
+
+    def __init__(self, batch_size: int = NER_BATCH_SIZE, max_wait_ms: float = NER_BATCH_WAIT_MS):
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._nlp: Any = None
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.texts = 0
+
+    async def extract(self, nlp: Any, texts: Sequence[str]) -> List[List[EntityRow]]:
+        """Entity rows for each text, in order"""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._nlp = nlp
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if batch:
+            asyncio.ensure_future(self._run(self._nlp, batch))
+
+    async def _run(self, nlp: Any, batch: List[Tuple[List[str], asyncio.Future]]):
+        texts = [text for texts, _ in batch for text in texts]
+        self.batches += 1
+        self.texts += len(texts)
+        try:
+            results = await ocr_executor.run(run_ner, nlp, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        position = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(results[position:position + len(texts)])
+            position += len(texts)
+
+    @property
+    def pending_texts(self) -> int:
+        return self._pending_texts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "pipeline": list(self._nlp.pipe_names) if self._nlp is not None else None
+        }
+
+# Global NER batcher instance
+ner_batcher = NERBatcher()
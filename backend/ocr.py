@@ -1,27 +1,48 @@
-import easyocr
 import cv2
-import spacy
-import re
-from fastapi import FastAPI, File, UploadFile, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import Depends, FastAPI, File, Form, Header, UploadFile, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
-import io
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 import json
+import math
+import os
+import time
 from dss_service import dss_service, ClaimData
-# Optional PDF processing
-try:
-    import fitz  # PyMuPDF for PDF processing
-    PDF_SUPPORT = True
-except ImportError:
-    print("⚠️  PyMuPDF not found. PDF processing will be disabled.")
-    print("   Install with: pip install PyMuPDF==1.23.14")
-    PDF_SUPPORT = False
+from ocr_pool import ocr_executor
+from eta import eta_model, to_seconds
+from metrics import metrics, stage, track_request, labelled, METRICS_CONTENT_TYPE
+from connection_manager import ConnectionManager
+from pipeline import Pipeline, PipelineStage
+from document_pages import DocumentPages, PDF_SUPPORT, PDF_ZOOM
+from page_screening import PageScreener, SCREENING_CONFIG
+from text_layer import TextLayerPage, TEXT_LAYER_CONFIG
+from adaptive_resolution import (AdaptiveRefiner, resolve_resolution, RESOLUTION_MODES, ADAPTIVE_LOW_ZOOM,
+                                 ADAPTIVE_CONFIG, DEFAULT_RESOLUTION_MODE)
+from weak_boxes import weak_indices, build_canvas, apply_readings, WEAK_BOX_REFINEMENT, WEAK_BOX_CONFIG
+from form_templates import (classify as classify_form, content_box, header_box, field_boxes, is_form_shaped,
+                            match_form, offset_results, read_fields, FORM_TEMPLATES, FORM_FIELDS_ONLY,
+                            FORM_TEMPLATES_CONFIG)
+from uploads import SpooledUpload, spool_upload, MAX_UPLOAD_BYTES, MAX_PDF_PAGES, MAX_IMAGE_PIXELS
+from ocr_cache import ocr_cache, OCRResultCache
+from ocr_jobs import ocr_job_queue, describe_job
+from ocr_readers import reader_pool, script_share, SCRIPT_LANGUAGES, SCRIPT_RANGES, SCRIPT_SCORE_THRESHOLD
+from ocr_process_pool import ProcessReaderPool, OCR_BACKEND, OCR_TORCH_THREADS
+from model_registry import model_registry
+from admission import admission_controller
+from ocr_columns import (PageColumns, DocumentColumns, ColumnarOCRResult, EntityTable, quads_to_boxes,
+                         negotiate_format, encode_payload, RESPONSE_MEDIA_TYPES)
+from ner_pipeline import load_ner_model, ner_batcher, NER_CONFIG, NER_MODEL
+from fra_entities import fra_entity_engine, FRA_ENTITIES_VERSION
+from tiling import (cap_resolution, needs_tiling, split_tiles, merge_tile_results,
+                    rescale_results, sort_reading_order, PageTransform, TILING_CONFIG)
+from preprocessing import (preprocess_page, resolve_profile, PREPROCESSING_PROFILES,
+                           PREPROCESSING_VERSION, DEFAULT_PREPROCESSING_PROFILE)
 
 # Initialize FastAPI app
 app = FastAPI(title="FRA Atlas OCR & NER Service", version="1.0.0")
@@ -35,28 +56,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize EasyOCR reader with supported languages
-# Note: Only using languages that are confirmed to work with EasyOCR
+# Languages supported across all script readers. EasyOCR can only combine
+# English with one other script, so readers are pooled per script and each
+# page is routed to the smallest one that matches it (see ocr_readers.py)
 SUPPORTED_LANGUAGES = ['en', 'hi', 'mr', 'te', 'ta', 'bn']
 
-try:
-    print("🔧 Initializing EasyOCR reader...")
-    reader = easyocr.Reader(SUPPORTED_LANGUAGES)
-    print(f"✅ EasyOCR initialized with languages: {', '.join(SUPPORTED_LANGUAGES)}")
-except Exception as e:
-    print(f"❌ Error initializing EasyOCR: {e}")
-    # Fallback to English only
-    reader = easyocr.Reader(['en'])
-    print("⚠️  Fallback: Using English only")
-
-# Load spaCy model for NER (install with: python -m spacy download en_core_web_sm)
-try:
-    print("🔧 Loading spaCy model...")
-    nlp = spacy.load("en_core_web_sm")
-    print("✅ spaCy model loaded successfully")
-except OSError:
-    print("⚠️  Warning: spaCy English model not found. Install with: python -m spacy download en_core_web_sm")
-    nlp = None
+pages_total = metrics.counter("ocr_pages_total", "Pages OCRed (cache hits are not counted)")
+text_layer_pages_total = metrics.counter("ocr_text_layer_pages_total",
+                                         "PDF pages read from their embedded text layer instead of OCRed")
+form_pages_total = metrics.counter("ocr_form_pages_total",
+                                   "Pages read as a known claim form from their field crops, by form")
+pages_skipped_total = metrics.counter("ocr_pages_skipped_total", "Pages not OCRed, by reason (blank or duplicate)")
+documents_total = metrics.counter("ocr_documents_total", "Documents OCRed, by whether the result cache was hit")
+
+# Workers and queue size of each stage of the document pipeline used by batch
+# and job processing; OCR always gets one worker per OCR slot
+PIPELINE_RENDER_WORKERS = int(os.getenv("PIPELINE_RENDER_WORKERS", 2))
+PIPELINE_PREPROCESS_WORKERS = int(os.getenv("PIPELINE_PREPROCESS_WORKERS", 2))
+PIPELINE_NER_WORKERS = int(os.getenv("PIPELINE_NER_WORKERS", 2))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))
+
+# Number of batch documents processed at the same time (enough to keep every
+# pipeline stage busy)
+BATCH_CONCURRENCY = int(os.getenv(
+    "BATCH_CONCURRENCY", ocr_executor.max_workers + PIPELINE_RENDER_WORKERS + PIPELINE_NER_WORKERS
+))
+
+# Scripts whose readers are loaded at startup in addition to latin
+OCR_PRELOAD_SCRIPTS = [script for script in os.getenv("OCR_PRELOAD_SCRIPTS", "").split(",") if script]
+
+# Where EasyOCR runs: the readers of this process, or a set of readers in
+# each of OCR_WORKERS worker processes
+ocr_backend = (ProcessReaderPool(ocr_executor.max_workers, OCR_TORCH_THREADS, OCR_PRELOAD_SCRIPTS)
+               if OCR_BACKEND == "process" else reader_pool)
+
+def load_ocr_readers():
+    if OCR_BACKEND == "process":
+        print(f"🔧 Starting {ocr_backend.workers} EasyOCR worker process(es)...")
+        ocr_backend.start()
+    else:
+        print("🔧 Initializing EasyOCR detector and English reader...")
+        for script in ["latin"] + OCR_PRELOAD_SCRIPTS:
+            reader_pool.get(script)
+    print(f"✅ EasyOCR initialized with readers: {', '.join(ocr_backend.loaded())}")
+    return ocr_backend
+
+def warm_up_ocr(pool):
+    sample = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(sample, "Village Ramgarh", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    pool.readtext(sample, script="latin")
+
+def load_spacy_model():
+    # Load spaCy model for NER (install with: python -m spacy download en_core_web_sm)
+    try:
+        print("🔧 Loading spaCy model...")
+        nlp = load_ner_model()
+        print(f"✅ spaCy model loaded successfully (pipeline: {', '.join(nlp.pipe_names)})")
+        return nlp
+    except OSError:
+        print(f"⚠️  Warning: spaCy model {NER_MODEL} not found. Install with: python -m spacy download {NER_MODEL}")
+        return None
+
+def load_dss_models():
+    dss_service.ensure_models_loaded()
+    return dss_service
+
+# Models are loaded in background tasks once the server is up; endpoints that
+# need a model answer 503 with Retry-After until it is ready
+model_registry.register("ocr", load_ocr_readers, warmup=warm_up_ocr)
+model_registry.register("ner", load_spacy_model, warmup=lambda nlp: nlp("Claim by Ram Kumar of Village Ramgarh"))
+model_registry.register("dss", load_dss_models, warmup=lambda service: service.warm_up())
 
 # Data models
 class BoundingBox(BaseModel):
@@ -64,6 +133,7 @@ class BoundingBox(BaseModel):
     y: float
     width: float
     height: float
+    page: int = 1
 
 class ExtractedEntity(BaseModel):
     id: str
@@ -73,8 +143,27 @@ class ExtractedEntity(BaseModel):
     start_index: int
     end_index: int
     bounding_box: Optional[BoundingBox] = None
+    normalized: Optional[Dict[str, Any]] = None
     verified: bool = False
 
+class SkippedPage(BaseModel):
+    page_number: int
+    reason: str  # blank or duplicate
+    duplicate_of: Optional[int] = None
+    distance: Optional[float] = None
+    ink_difference: Optional[float] = None
+
+class FormFieldValue(BaseModel):
+    label: str
+    value: str
+    confidence: float
+
+class FormResult(BaseModel):
+    page_number: int
+    form_type: str  # form_a, form_b or form_c
+    title: str
+    fields: Dict[str, FormFieldValue]
+
 class OCRResult(BaseModel):
     id: str
     document_id: str
@@ -86,6 +175,15 @@ class OCRResult(BaseModel):
     entities: List[ExtractedEntity]
     status: str
     created_at: datetime
+    page_count: int = 1
+    cached: bool = False
+    skipped_pages: List[SkippedPage] = []
+    forms: List[FormResult] = []
+    resolution: Optional[Dict[str, Any]] = None
+
+class OCROptions(BaseModel):
+    preprocessing: str = DEFAULT_PREPROCESSING_PROFILE
+    resolution: str = DEFAULT_RESOLUTION_MODE
 
 class ProcessingStatus(BaseModel):
     document_id: str
@@ -95,150 +193,731 @@ class ProcessingStatus(BaseModel):
     estimated_completion: Optional[int] = None
 
 # WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def send_status_update(self, document_id: str, status: ProcessingStatus):
-        message = {
-            "type": "status_update",
-            "document_id": document_id,
-            "data": status.dict()
-        }
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                pass
-
 manager = ConnectionManager()
 
-def convert_pdf_to_images(pdf_bytes: bytes) -> List[np.ndarray]:
+def build_ocr_options(profile: Optional[str] = None, resolution: Optional[str] = None) -> OCROptions:
     """
-    Convert PDF pages to images for OCR processing
+    Validate per-request OCR settings
     """
-    if not PDF_SUPPORT:
-        raise HTTPException(
-            status_code=400, 
-            detail="PDF processing not available. Install PyMuPDF: pip install PyMuPDF==1.23.14"
-        )
+    return OCROptions(preprocessing=resolve_profile(profile), resolution=resolve_resolution(resolution))
+
+def build_page_result(ocr_results: List, scripts: List[str], page_number: int,
+                      page_start: datetime, text: Optional[str] = None,
+                      form: Optional[Dict[str, Any]] = None) -> PageColumns:
+    """
+    Turn a page's EasyOCR results into text (unless given), box arrays and NER entities
+    """
+    extracted_text = " ".join([text for _, text, _ in ocr_results]) if text is None else text
+    with stage("entities"):
+        entities = extract_pattern_entities(extracted_text)
+    languages = [code for code in SUPPORTED_LANGUAGES
+                 if any(code in SCRIPT_LANGUAGES[script] for script in scripts)]
     
-    images = []
-    try:
-        pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            # Convert to image with high DPI for better OCR
-            mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("ppm")
-            
-            # Convert to PIL Image then to numpy array
-            pil_image = Image.open(io.BytesIO(img_data))
-            image_np = np.array(pil_image)
-            images.append(image_np)
-        
-        pdf_document.close()
-        return images
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
+    return PageColumns(
+        page_number=page_number,
+        text=extracted_text,
+        boxes=quads_to_boxes([bbox for bbox, _, _ in ocr_results]),
+        box_confidence=np.array([conf for _, _, conf in ocr_results], dtype=np.float64),
+        entities=entities,
+        languages=languages,
+        processing_time=(datetime.now() - page_start).total_seconds(),
+        form=form
+    )
 
-def preprocess_image(image: np.ndarray) -> np.ndarray:
+def build_text_layer_page_result(text_page: TextLayerPage, page_number: int, page_start: datetime) -> PageColumns:
     """
-    Enhance image quality for better OCR accuracy
+    Turn the embedded text layer of a PDF page into the same page result as
+    OCR would give; its words are exact, so their confidence is 1
     """
-    # Convert to PIL Image for enhancement
-    if len(image.shape) == 3:
-        pil_image = Image.fromarray(image)
-    else:
-        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    extracted_text = " ".join(text_page.words)
+    with stage("entities"):
+        entities = extract_pattern_entities(extracted_text)
+    scripts = ["latin"] + [script for script in SCRIPT_RANGES
+                           if script_share(extracted_text, script) >= SCRIPT_SCORE_THRESHOLD]
+    languages = [code for code in SUPPORTED_LANGUAGES
+                 if any(code in SCRIPT_LANGUAGES[script] for script in scripts)]
     
-    # Enhance contrast
-    enhancer = ImageEnhance.Contrast(pil_image)
-    pil_image = enhancer.enhance(1.2)
+    return PageColumns(
+        page_number=page_number,
+        text=extracted_text,
+        boxes=text_page.boxes,
+        box_confidence=np.ones(len(text_page.words), dtype=np.float64),
+        entities=entities,
+        languages=languages,
+        processing_time=(datetime.now() - page_start).total_seconds()
+    )
+
+def ocr_page(image: np.ndarray, page_number: int, options: OCROptions,
+             refiner: Optional[AdaptiveRefiner] = None) -> PageColumns:
+    """
+    Run preprocessing, EasyOCR and NER for a single BGR page (executed on an OCR worker)
+    """
+    page_start = datetime.now()
+    enhanced_image, transform, _ = prepare_page(image, options, page_number, refiner)
+    return recognize_page(enhanced_image, transform, page_number, page_start, refiner)
+
+def prepare_page(image: np.ndarray, options: OCROptions, page_number: int = 1,
+                 refiner: Optional[AdaptiveRefiner] = None):
+    """
+    Cap the resolution of a page and preprocess it; oversized pages also get
+    their tiles planned (None otherwise). The returned transform maps results
+    back to page coordinates (undoing a deskew and the resolution cap), which
+    for a low-zoom first pass are those of the standard zoom.
+    """
+    tiled = needs_tiling(image.shape)
+    with stage("preprocess"):
+        image, scale = cap_resolution(image)
+        enhanced_image, unrotate = preprocess_page(image, options.preprocessing)
+    if refiner is not None:
+        scale *= refiner.page_scale(page_number)
+    return enhanced_image, PageTransform(scale, unrotate), split_tiles(enhanced_image.shape) if tiled else None
+
+def recognize_page(enhanced_image: np.ndarray, transform: PageTransform, page_number: int,
+                   page_start: datetime, refiner: Optional[AdaptiveRefiner] = None) -> PageColumns:
+    """
+    EasyOCR and pattern entities for a preprocessed page that is not tiled;
+    pages of a known claim form also get their form record, and weak
+    regions of a low-zoom first pass are refined at high zoom
+    """
+    form_shaped = FORM_TEMPLATES and is_form_shaped(enhanced_image.shape)
+    if form_shaped and FORM_FIELDS_ONLY:
+        page, ocr_results, script = recognize_form(enhanced_image, transform, page_number, page_start)
+        if page is not None:
+            return page
+    else:
+        ocr_results, script = ocr_backend.readtext(enhanced_image)
+    ocr_results = refine_weak_boxes(enhanced_image, ocr_results, script)
+    form = None
+    if form_shaped and not FORM_FIELDS_ONLY:
+        with stage("form_align"):
+            form = match_form(enhanced_image, ocr_results)
+        if form is not None:
+            form_pages_total.inc(form=form["form_type"])
+    ocr_results = rescale_results(ocr_results, transform)
+    if refiner is not None:
+        ocr_results = refiner.refine(page_number, ocr_results)
+    return build_page_result(ocr_results, [script], page_number, page_start, form=form)
+
+def refine_weak_boxes(image: np.ndarray, ocr_results: List, script: str) -> List:
+    """
+    Re-read the weakest words of a page (or tile) from heavily enhanced
+    crops in one recognition batch, keeping the more confident reading
+    """
+    if not WEAK_BOX_REFINEMENT:
+        return ocr_results
+    indices = weak_indices(ocr_results)
+    if not indices:
+        return ocr_results
+    with stage("weak_box_refinement"):
+        canvas, boxes, slots = build_canvas(image, ocr_results, indices)
+        readings = ocr_backend.recognize_boxes(canvas, boxes, script)
+        return apply_readings(ocr_results, slots, readings)
+
+def recognize_region(image: np.ndarray, options: OCROptions) -> Tuple[List, str]:
+    """
+    Preprocess and recognize a region rendered for adaptive refinement, in
+    the coordinates of the region as rendered
+    """
+    with stage("preprocess"):
+        enhanced_image, unrotate = preprocess_page(image, options.preprocessing)
+    results, script = ocr_backend.readtext(enhanced_image)
+    return rescale_results(results, PageTransform(1.0, unrotate)), script
+
+def open_document(upload: SpooledUpload, options: OCROptions) -> Tuple[DocumentPages, Optional[AdaptiveRefiner]]:
+    """
+    Open an upload's pages; PDFs in adaptive resolution mode are rendered at
+    ADAPTIVE_LOW_ZOOM and come with the refiner of their second pass
+    """
+    if options.resolution != "adaptive":
+        return DocumentPages(upload), None
+    document_pages = DocumentPages(upload, zoom=ADAPTIVE_LOW_ZOOM)
+    if not document_pages.is_pdf:
+        return document_pages, None
+    return document_pages, AdaptiveRefiner(document_pages, lambda image: recognize_region(image, options))
+
+def recognize_form(enhanced_image: np.ndarray, transform: PageTransform, page_number: int,
+                   page_start: datetime) -> Tuple[Optional[PageColumns], List, str]:
+    """
+    Classify the page from its header strip and, for a known form, recognize
+    only the field crops of the aligned page (FORM_FIELDS_ONLY). Otherwise
+    the rest of the page is recognized and returned with the header's
+    results (unscaled), so the header is not OCRed twice.
+    """
+    with stage("form_align"):
+        box = content_box(enhanced_image)
+    x0, y0, x1, y1 = header_box(box)
+    header_results, script = ocr_backend.readtext(enhanced_image[y0:y1, x0:x1])
+    header_results = offset_results(header_results, x0, y0)
+    template = classify_form(" ".join(text for _, text, _ in header_results))
+    if template is not None:
+        field_results = []
+        for field, (fx0, fy0, fx1, fy1) in field_boxes(template, box):
+            # Forms are filled in the script they are printed in, so the header's script is reused
+            results, _ = ocr_backend.readtext(enhanced_image[fy0:fy1, fx0:fx1], script)
+            field_results.append((field, sort_reading_order(offset_results(results, fx0, fy0))))
+        form = read_fields(template, field_results)
+        if form is not None:
+            form_pages_total.inc(form=template.name)
+            header_results = sort_reading_order(header_results)
+            text = "\n".join([" ".join(text for _, text, _ in header_results)] +
+                             [f"{field['label']}: {field['value']}" for field in form["fields"].values()])
+            ocr_results = header_results + [result for _, results in field_results for result in results]
+            page = build_page_result(rescale_results(ocr_results, transform), [script], page_number, page_start,
+                                     text, form)
+            return page, ocr_results, script
     
-    # Enhance sharpness
-    enhancer = ImageEnhance.Sharpness(pil_image)
-    pil_image = enhancer.enhance(1.1)
+    # Outside the header strip, the band above the body is margin (no ink), so
+    # the body starts at the strip's bottom, or higher where a line was cut by it
+    kept, cut = [], []
+    for result in header_results:
+        (cut if max(point[1] for point in result[0]) >= y1 - 2 else kept).append(result)
+    body_top = int(min([y1] + [min(point[1] for point in result[0]) for result in cut]))
+    body_results, script = ocr_backend.readtext(enhanced_image[body_top:])
+    return None, kept + offset_results(body_results, 0, body_top), script
+
+def ocr_tile(image: np.ndarray, tile) -> tuple:
+    """
+    OCR one tile (a view into the page, not a copy) in tile-local coordinates
+    """
+    x0, y0, x1, y1 = tile
+    tile_image = image[y0:y1, x0:x1]
+    ocr_results, script = ocr_backend.readtext(tile_image)
+    return tile, refine_weak_boxes(tile_image, ocr_results, script), script
+
+def build_tiled_page_result(tile_results: List[tuple], shape, transform: PageTransform, page_number: int,
+                            page_start: datetime, refiner: Optional[AdaptiveRefiner] = None) -> PageColumns:
+    ocr_results = merge_tile_results([(tile, results) for tile, results, _ in tile_results], shape, transform)
+    if refiner is not None:
+        ocr_results = refiner.refine(page_number, ocr_results)
+    scripts = [script for _, _, script in tile_results]
+    return build_page_result(ocr_results, scripts, page_number, page_start)
+
+async def ocr_page_async(image: np.ndarray, page_number: int, options: OCROptions,
+                         refiner: Optional[AdaptiveRefiner] = None) -> PageColumns:
+    """
+    OCR a page on the OCR workers; oversized pages are split into overlapping
+    tiles that are recognized in parallel and merged back into page coordinates
+    """
+    if not needs_tiling(image.shape):
+        return await ocr_executor.run(ocr_page, image, page_number, options, refiner)
     
-    # Apply slight blur to reduce noise
-    pil_image = pil_image.filter(ImageFilter.GaussianBlur(radius=0.5))
+    page_start = datetime.now()
+    enhanced_image, transform, tiles = await ocr_executor.run(prepare_page, image, options, page_number, refiner)
+    del image
+    tile_results = await asyncio.gather(*(ocr_executor.run(ocr_tile, enhanced_image, tile) for tile in tiles))
+    return await ocr_executor.run(build_tiled_page_result, tile_results, enhanced_image.shape,
+                                  transform, page_number, page_start, refiner)
+
+def merge_page_results(pages: List[PageColumns], screener: Optional[PageScreener] = None,
+                       page_count: Optional[int] = None,
+                       refiner: Optional[AdaptiveRefiner] = None) -> DocumentColumns:
+    """
+    Merge per-page results into document-level text, boxes and entities;
+    duplicate pages found by the screener reuse their original's result
+    """
+    languages = set(code for page in pages for code in page.languages)
+    language = ",".join(code for code in SUPPORTED_LANGUAGES if code in languages) or "en"
+    resolution = refiner.report() if refiner is not None else None
+    if screener is None:
+        return DocumentColumns.from_pages(pages, language, page_count=page_count, resolution=resolution)
+    return DocumentColumns.from_pages(screener.with_duplicates(pages), language, page_count=page_count,
+                                      skipped_pages=screener.skipped, resolution=resolution)
+
+async def add_ner_entities(pages: List[PageColumns], document_id: Optional[str] = None):
+    """
+    Run spaCy NER over all pages of a document in one batched nlp.pipe call,
+    shared with documents processed at the same time, and put its entities
+    ahead of each page's pattern entities. The streamed page_result messages
+    only carried the pattern entities, so each page's complete entities are
+    then sent on the document's channel.
+    """
+    nlp = model_registry.get("ner")
+    if nlp is None or not pages:
+        return
+    start = time.perf_counter()
+    page_entities = await ner_batcher.extract(nlp, [page.text for page in pages])
+    eta_model.observe("ner", time.perf_counter() - start, len(pages))
+    for page, rows in zip(pages, page_entities):
+        page.entities = EntityTable.concat([EntityTable.from_rows(rows), page.entities], [0, 0])
+        if document_id is not None:
+            await manager.send_page_entities(document_id, page)
+
+def extract_pattern_entities(text: str) -> EntityTable:
+    """
+    Extract forest rights specific entities with the shared single-pass engine
+    """
+    return EntityTable.from_rows(fra_entity_engine.extract(text))
+
+def render_next_page(page_iter, screener: PageScreener
+                     ) -> Optional[Tuple[int, Optional[np.ndarray], Union[Dict, PageColumns, None]]]:
+    """
+    Rasterize (or decode) the next page on a worker thread, timing it for the
+    ETA model, and screen it. Returns the page number, the image and None
+    when the page needs OCR. Pages that do not are returned without an image
+    and with either their skip record or, for PDF pages with a text layer,
+    their finished result.
+    """
+    page_start = datetime.now()
+    start = time.perf_counter()
+    next_page = next(page_iter, None)
+    if next_page is None:
+        return None
+    page_number, image = next_page
+    if isinstance(image, TextLayerPage):
+        return page_number, None, build_text_layer_page_result(image, page_number, page_start)
+    eta_model.observe("render", time.perf_counter() - start)
+    with stage("screening"):
+        skipped = screener.screen(page_number, image)
+    return page_number, None if skipped else image, skipped
+
+def pool_backlog_seconds(own_tasks: int = 0) -> float:
+    """
+    Time until the work queued on the OCR workers by other requests has started
+    """
+    stats = ocr_executor.stats()
+    return max(0, stats["queued"] - own_tasks) * eta_model.rate("pool_task") / stats["workers"]
+
+def estimate_pages_seconds(pages: int, megapixels: float) -> float:
+    """
+    Time to render, OCR and run NER on pages of the given size, spread over the OCR workers
+    """
+    if pages <= 0:
+        return 0.0
+    per_page = eta_model.rate("render") + eta_model.estimate("ocr_page", megapixels)
+    return math.ceil(pages / ocr_executor.max_workers) * per_page + eta_model.estimate("ner", pages)
+
+def estimate_document_seconds() -> float:
+    """
+    Time to OCR a document whose page count is not known yet, behind the current queue
+    """
+    return pool_backlog_seconds() + eta_model.rate("ocr_document")
+
+class DocumentProgress:
+    """
+    Progress of one document's pages: streams each finished page and a status
+    update with a measured ETA over the document's WebSocket channel.
+    seconds_after is the estimated time of the work that follows OCR.
+    """
+
+    def __init__(self, document_id: str, total_pages: int, progress_start: int = 30,
+                 progress_end: int = 90, seconds_after: float = 0.0):
+        self.document_id = document_id
+        self.total_pages = total_pages
+        self.progress_start = progress_start
+        self.progress_end = progress_end
+        self.seconds_after = seconds_after
+        self.page_megapixels: Dict[int, float] = {}
+        self.completed = 0
+
+    async def started(self):
+        # Megapixels per page: the running average until the document's own pages are seen
+        megapixels = eta_model.rate("page_megapixels")
+        await manager.send_status_update(self.document_id, ProcessingStatus(
+            document_id=self.document_id,
+            status="processing",
+            progress=self.progress_start,
+            message=f"Extracting text from {self.total_pages} page(s) with EasyOCR...",
+            estimated_completion=to_seconds(pool_backlog_seconds() + estimate_pages_seconds(self.total_pages, megapixels)
+                                            + self.seconds_after)
+        ))
+
+    def page_rendered(self, page_number: int, image: np.ndarray):
+        self.page_megapixels[page_number] = image.shape[0] * image.shape[1] / 1e6
+        eta_model.observe("page_megapixels", self.page_megapixels[page_number])
+
+    async def page_skipped(self, skipped: Dict[str, Any]):
+        self.completed += 1
+        pages_skipped_total.inc(reason=skipped["reason"])
+        if skipped["reason"] == "blank":
+            message = f"Skipped blank page {skipped['page_number']}"
+        else:
+            message = f"Page {skipped['page_number']} duplicates page {skipped['duplicate_of']}"
+        await manager.send_status_update(self.document_id, ProcessingStatus(
+            document_id=self.document_id,
+            status="processing",
+            progress=self.progress_start + int((self.progress_end - self.progress_start) * self.completed / self.total_pages),
+            message=f"{message} ({self.completed} of {self.total_pages})"
+        ))
+
+    async def page_done(self, page: PageColumns, own_tasks: int = 0):
+        """Report a finished page; own_tasks are the document's pages still queued on the OCR workers"""
+        pages_total.inc()
+        eta_model.observe("ocr_page", page.processing_time, self.page_megapixels[page.page_number])
+        await self._page_finished(page, "Processed", own_tasks)
+
+    async def page_read(self, page: PageColumns, own_tasks: int = 0):
+        """Report a page read from the PDF text layer"""
+        text_layer_pages_total.inc()
+        await self._page_finished(page, "Read text layer of", own_tasks)
+
+    async def _page_finished(self, page: PageColumns, action: str, own_tasks: int):
+        self.completed += 1
+        await manager.send_page_result(self.document_id, page)
+        
+        if self.page_megapixels:
+            megapixels = sum(self.page_megapixels.values()) / len(self.page_megapixels)
+        else:
+            megapixels = eta_model.rate("page_megapixels")
+        remaining = estimate_pages_seconds(self.total_pages - self.completed, megapixels)
+        await manager.send_status_update(self.document_id, ProcessingStatus(
+            document_id=self.document_id,
+            status="processing",
+            progress=self.progress_start + int((self.progress_end - self.progress_start) * self.completed / self.total_pages),
+            message=f"{action} page {page.page_number} ({self.completed} of {self.total_pages})",
+            estimated_completion=to_seconds(pool_backlog_seconds(own_tasks) + remaining + self.seconds_after)
+        ))
+
+async def ocr_document(document_id: str, upload: SpooledUpload, options: OCROptions, progress_start: int = 30,
+                       progress_end: int = 90, seconds_after: float = 0.0) -> DocumentColumns:
+    """
+    OCR every page of a document concurrently on the OCR workers, streaming
+    each page over the document's WebSocket channel as soon as it finishes.
+    PDF pages with a text layer are read without OCR, blank pages are
+    skipped and duplicate pages reuse their original's result.
+    """
+    document_pages, refiner = await ocr_executor.run(open_document, upload, options)
+    progress = DocumentProgress(document_id, document_pages.page_count, progress_start, progress_end, seconds_after)
+    screener = PageScreener()
+    await progress.started()
     
-    # Convert back to OpenCV format
-    enhanced_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    # Pages are rasterized lazily and only one page per worker (plus the next
+    # one) is held in memory at a time
+    page_iter = iter(document_pages)
+    max_pages_in_flight = ocr_executor.max_workers + 1
+    pending = set()
+    exhausted = False
+    pages = []
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pages_in_flight:
+                next_page = await ocr_executor.run(render_next_page, page_iter, screener)
+                if next_page is None:
+                    exhausted = True
+                    break
+                page_number, image, resolved = next_page
+                if isinstance(resolved, PageColumns):
+                    pages.append(resolved)
+                    await progress.page_read(resolved, len(pending))
+                    continue
+                if resolved:
+                    await progress.page_skipped(resolved)
+                    continue
+                progress.page_rendered(page_number, image)
+                pending.add(asyncio.ensure_future(ocr_page_async(image, page_number, options, refiner)))
+                del next_page, image
+            
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = task.result()
+                pages.append(page)
+                await progress.page_done(page, own_tasks=len(pending))
+    finally:
+        for task in pending:
+            task.cancel()
+        await ocr_executor.run(document_pages.close)
     
-    return enhanced_image
+    await add_ner_entities(pages, document_id)
+    with stage("merge"):
+        return merge_page_results(pages, screener, document_pages.page_count, refiner)
+
+class PipelineDocument:
+    """A document travelling through the staged document pipeline"""
+
+    def __init__(self, document_id: str, upload: SpooledUpload, options: OCROptions, **progress):
+        self.document_id = document_id
+        self.upload = upload
+        self.options = options
+        self.progress_options = progress
+        self.progress: Optional[DocumentProgress] = None
+        self.document_pages: Optional[DocumentPages] = None
+        self.refiner: Optional[AdaptiveRefiner] = None
+        self.pages: List[PageColumns] = []
+        self.screener = PageScreener()
+        self.skipped_count = 0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Pages kept open for the refiner are closed however the document ends
+        # (result, failure or the caller giving up)
+        self.future.add_done_callback(self.close_pages)
+
+    @property
+    def active(self) -> bool:
+        """False once the document failed or its caller stopped waiting"""
+        return not self.future.done()
 
-def extract_entities_with_ner(text: str) -> List[ExtractedEntity]:
+    def fail(self, error: Exception):
+        if self.active:
+            self.future.set_exception(error)
+            # Retrieved here so a caller that already gave up does not log it
+            self.future.exception()
+
+    def close_pages(self, _future: Optional[asyncio.Future] = None):
+        """Close the document's pages once nothing renders them any more"""
+        document_pages, self.document_pages = self.document_pages, None
+        if document_pages is not None:
+            document_pages.close()
+
+def fail_pipeline_item(item: Any, error: Exception):
+    """Fail the document of a pipeline item (a document or a page tuple starting with one)"""
+    document = item[0] if isinstance(item, tuple) else item
+    document.fail(error)
+
+async def render_stage(document: PipelineDocument, emit):
+    """
+    Open the document and rasterize (or decode) its pages one at a time;
+    the bounded preprocess queue keeps rendering from running far ahead
     """
-    Extract named entities using spaCy NER and custom patterns
+    document_pages, document.refiner = await run_in_threadpool(open_document, document.upload, document.options)
+    try:
+        document.progress = DocumentProgress(document.document_id, document_pages.page_count,
+                                             **document.progress_options)
+        await document.progress.started()
+        page_iter = iter(document_pages)
+        while document.active:
+            next_page = await run_in_threadpool(render_next_page, page_iter, document.screener)
+            if next_page is None:
+                break
+            page_number, image, resolved = next_page
+            if image is not None:
+                document.progress.page_rendered(page_number, image)
+            # Skipped and text-layer pages travel on without an image so the OCR stage sees every page
+            await emit((document, page_number, image, resolved))
+            del next_page, image
+    finally:
+        if document.refiner is None or not document.active:
+            await run_in_threadpool(document_pages.close)
+        else:
+            # The refiner renders regions of the pages until the last one is OCRed
+            document.document_pages = document_pages
+
+async def preprocess_stage(item: tuple, emit):
     """
-    entities = []
+    Cap, preprocess and plan tiles off the OCR workers, so it overlaps OCR of other pages
+    """
+    document, page_number, image, resolved = item
+    if not document.active:
+        return
+    if resolved:
+        await emit((document, page_number, None, None, None, 0.0, resolved))
+        return
+    start = time.perf_counter()
+    enhanced_image, transform, tiles = await run_in_threadpool(prepare_page, image, document.options, page_number,
+                                                               document.refiner)
+    await emit((document, page_number, enhanced_image, transform, tiles, time.perf_counter() - start, None))
+
+async def ocr_stage(item: tuple, emit):
+    """
+    Recognize a preprocessed page on the OCR workers; the last page of a
+    document passes the document on to NER
+    """
+    document, page_number, enhanced_image, transform, tiles, preprocess_seconds, resolved = item
+    if not document.active:
+        return
+    if isinstance(resolved, PageColumns):
+        document.pages.append(resolved)
+        report = document.progress.page_read(resolved)
+    elif resolved:
+        document.skipped_count += 1
+        report = document.progress.page_skipped(resolved)
+    else:
+        # Page processing time covers preprocessing and recognition, not the time spent queued in between
+        page_start = datetime.now() - timedelta(seconds=preprocess_seconds)
+        if tiles is None:
+            page = await ocr_executor.run(recognize_page, enhanced_image, transform, page_number, page_start,
+                                          document.refiner)
+        else:
+            tile_results = await asyncio.gather(*(ocr_executor.run(ocr_tile, enhanced_image, tile) for tile in tiles))
+            page = await ocr_executor.run(build_tiled_page_result, tile_results, enhanced_image.shape,
+                                          transform, page_number, page_start, document.refiner)
+        if not document.active:
+            return
+        document.pages.append(page)
+        report = document.progress.page_done(page)
+    # Decided before awaiting the report, so that only one worker sees the document complete
+    complete = len(document.pages) + document.skipped_count == document.progress.total_pages
+    await report
+    if complete:
+        await emit(document)
+
+async def ner_stage(document: PipelineDocument, emit):
+    """
+    Batched NER over a document's pages (shared with the documents that
+    reach this stage at the same time) and the merge into document columns
+    """
+    if not document.active:
+        return
+    await add_ner_entities(document.pages, document.document_id)
+    with stage("merge"):
+        columns = merge_page_results(document.pages, document.screener, document.progress.total_pages,
+                                     document.refiner)
+    if document.active:
+        document.future.set_result(columns)
+
+# Staged pipeline for batch and job processing: rendering and preprocessing
+# of one document overlap OCR of the previous one and NER of the one before.
+# A failure at any stage fails the document and its remaining pages are dropped.
+document_pipeline = Pipeline([
+    PipelineStage("render", render_stage, PIPELINE_RENDER_WORKERS, PIPELINE_QUEUE_SIZE, fail_pipeline_item),
+    PipelineStage("preprocess", preprocess_stage, PIPELINE_PREPROCESS_WORKERS, PIPELINE_QUEUE_SIZE, fail_pipeline_item),
+    PipelineStage("ocr", ocr_stage, ocr_executor.max_workers, PIPELINE_QUEUE_SIZE, fail_pipeline_item),
+    PipelineStage("ner", ner_stage, PIPELINE_NER_WORKERS, PIPELINE_QUEUE_SIZE, fail_pipeline_item)
+])
+
+async def pipeline_ocr_document(document_id: str, upload: SpooledUpload, options: OCROptions,
+                                **progress) -> DocumentColumns:
+    """
+    Same contract as ocr_document, but through the shared staged pipeline.
+    The upload must stay open until this returns.
+    """
+    document = PipelineDocument(document_id, upload, options, **progress)
+    await document_pipeline.put(document)
+    # Cancelling the caller cancels the future, which makes every stage drop the document
+    return await document.future
+
+def ocr_cache_config() -> Dict[str, Any]:
+    """
+    OCR settings that change the result for identical bytes, used in the cache key
+    """
+    return {
+        "readers": SCRIPT_LANGUAGES,
+        "preprocessing": PREPROCESSING_VERSION,
+        "entities": FRA_ENTITIES_VERSION,
+        "pdf_zoom": PDF_ZOOM,
+        "tiling": TILING_CONFIG,
+        "screening": SCREENING_CONFIG,
+        "text_layer": TEXT_LAYER_CONFIG,
+        "forms": FORM_TEMPLATES_CONFIG,
+        "adaptive_resolution": ADAPTIVE_CONFIG,
+        "weak_boxes": WEAK_BOX_CONFIG,
+        "ner": NER_CONFIG if model_registry.get("ner") else None
+    }
+
+async def cached_ocr_document(document_id: str, upload: SpooledUpload, options: OCROptions,
+                              pipelined: bool = False, **progress) -> Tuple[DocumentColumns, bool]:
+    """
+    ocr_document (or the staged pipeline when pipelined) backed by the
+    content-addressed result cache; identical uploads in flight at the same
+    time share one computation. Returns the columns and whether they came
+    from the cache.
+    """
+    key = OCRResultCache.make_key(upload.sha256, dict(ocr_cache_config(), content_type=upload.content_type,
+                                                      options=options.dict()))
     
-    if nlp:
-        doc = nlp(text)
-        for ent in doc.ents:
-            entity = ExtractedEntity(
-                id=str(uuid.uuid4()),
-                type=ent.label_,
-                value=ent.text,
-                confidence=0.8,  # spaCy doesn't provide confidence scores by default
-                start_index=ent.start_char,
-                end_index=ent.end_char,
-                verified=False
-            )
-            entities.append(entity)
+    async def compute() -> Dict[str, Any]:
+        start = time.perf_counter()
+        process = pipeline_ocr_document if pipelined else ocr_document
+        columns = await process(document_id, upload, options, **progress)
+        eta_model.observe("ocr_document", time.perf_counter() - start)
+        return columns.to_state()
     
-    # Custom patterns for forest rights specific entities
-    patterns = {
-        "AREA": r'(\d+(?:\.\d+)?)\s*(?:hectares?|acres?|sq\.?\s*(?:km|m|ft))',
-        "DATE": r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})\b',
-        "PHONE": r'\b(?:\+91|91)?[-.\s]?[6-9]\d{9}\b',
-        "VILLAGE": r'\b(?:Village|Gram|Gaon)\s+([A-Za-z\s]+)\b',
-        "DISTRICT": r'\b(?:District|Zilla)\s+([A-Za-z\s]+)\b',
-        "SURVEY_NUMBER": r'\b(?:Survey|S\.?)\s*(?:No\.?|Number)\s*:?\s*(\d+(?:[/-]\d+)*)\b'
-    }
+    state, hit = await ocr_cache.get_or_compute(key, compute)
+    documents_total.inc(cache="hit" if hit else "miss")
+    if hit:
+        await manager.send_status_update(document_id, ProcessingStatus(
+            document_id=document_id,
+            status="processing",
+            progress=progress.get("progress_end", 90),
+            message="Reusing OCR result of an identical document",
+            estimated_completion=to_seconds(progress.get("seconds_after", 0.0))
+        ))
+    return DocumentColumns.from_state(state), hit
+
+def build_ocr_result(document_id: str, columns: DocumentColumns, cached: bool,
+                     start_time: datetime) -> ColumnarOCRResult:
+    """
+    Create the document-level result; it only becomes OCRResult JSON (or a
+    compact encoding) when the response is rendered
+    """
+    return ColumnarOCRResult({
+        "id": str(uuid.uuid4()),
+        "document_id": document_id,
+        "processing_time": (datetime.now() - start_time).total_seconds(),
+        "status": "completed",
+        "created_at": start_time.isoformat(),
+        "cached": cached
+    }, columns)
+
+async def run_ocr_job(job: Dict[str, Any], upload: SpooledUpload) -> Dict[str, Any]:
+    """
+    Process one queued OCR job; the returned JSON is stored as the job result
+    """
+    start_time = datetime.now()
+    document_id = job["document_id"]
+    await model_registry.wait_ready("ocr", "ner")
     
-    for entity_type, pattern in patterns.items():
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            entity = ExtractedEntity(
-                id=str(uuid.uuid4()),
-                type=entity_type,
-                value=match.group(0),
-                confidence=0.9,
-                start_index=match.start(),
-                end_index=match.end(),
-                verified=False
-            )
-            entities.append(entity)
+    await manager.send_status_update(document_id, ProcessingStatus(
+        document_id=document_id,
+        status="processing",
+        progress=10,
+        message=f"Started OCR job (attempt {job['attempts']} of {job['max_attempts']})...",
+        estimated_completion=to_seconds(estimate_document_seconds())
+    ))
     
-    return entities
+    options = OCROptions(**json.loads(job["options"] or "{}"))
+    columns, cached = await cached_ocr_document(document_id, upload, options, pipelined=True)
+    result = build_ocr_result(document_id, columns, cached, start_time)
+    
+    await manager.send_status_update(document_id, ProcessingStatus(
+        document_id=document_id,
+        status="completed",
+        progress=100,
+        message="Processing completed successfully!",
+        estimated_completion=0
+    ))
+    return result.to_dict()
+
+async def report_ocr_job_failure(job: Dict[str, Any], error: str, status: str):
+    document_id = job["document_id"]
+    retrying = status == "queued"
+    await manager.send_status_update(document_id, ProcessingStatus(
+        document_id=document_id,
+        status="queued" if retrying else "failed",
+        progress=0,
+        message=f"Attempt {job['attempts']} failed, retrying: {error}" if retrying else f"Processing failed: {error}",
+        estimated_completion=None if retrying else 0
+    ))
+
+@app.on_event("startup")
+async def start_background_services():
+    model_registry.start()
+    document_pipeline.start()
+    await ocr_job_queue.start(run_ocr_job, on_failure=report_ocr_job_failure)
+
+@app.on_event("shutdown")
+async def shutdown_ocr_executor():
+    await ocr_job_queue.stop()
+    await document_pipeline.stop()
+    await model_registry.stop()
+    ocr_executor.shutdown(wait=False)
+    if OCR_BACKEND == "process":
+        ocr_backend.shutdown(wait=False)
 
 @app.websocket("/ws/{document_id}")
 async def websocket_endpoint(websocket: WebSocket, document_id: str):
-    await manager.connect(websocket)
+    """
+    Progress and page results of one document (or batch); send
+    {"action": "subscribe", "document_id": ...} to follow more ids
+    """
+    subscriber = await manager.connect(websocket, document_id)
     try:
         while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
+            manager.handle_client_message(subscriber, await websocket.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the connection was closed after being evicted
+        pass
+    finally:
         manager.disconnect(websocket)
 
-@app.post("/ocr/extract-text", response_model=OCRResult)
-async def extract_text_with_ner(file: UploadFile = File(...)):
+async def ocr_upload(file: UploadFile, document_id: Optional[str] = None,
+                     profile: Optional[str] = None, pipelined: bool = False,
+                     resolution: Optional[str] = None) -> ColumnarOCRResult:
     """
     Advanced OCR with NER extraction and real-time status updates
     """
     start_time = datetime.now()
-    document_id = str(uuid.uuid4())
+    document_id = document_id or str(uuid.uuid4())
+    options = build_ocr_options(profile, resolution)
     
     try:
         # Send initial status
@@ -247,111 +926,27 @@ async def extract_text_with_ner(file: UploadFile = File(...)):
             status="processing",
             progress=10,
             message="Reading uploaded file...",
-            estimated_completion=30
-        ))
-        
-        # Read file contents
-        contents = await file.read()
-        
-        # Check file type and process accordingly
-        if file.content_type == "application/pdf":
-            if not PDF_SUPPORT:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="PDF processing not available. Please install PyMuPDF: pip install PyMuPDF==1.23.14"
-                )
-            # Process PDF
-            images = convert_pdf_to_images(contents)
-            if not images:
-                raise HTTPException(status_code=400, detail="No pages found in PDF")
-            # Use first page for now (can be extended for multi-page processing)
-            image_np = images[0]
-        else:
-            # Process image file
-            try:
-                image = Image.open(io.BytesIO(contents)).convert("RGB")
-                image_np = np.array(image)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
-        
-        await manager.send_status_update(document_id, ProcessingStatus(
-            document_id=document_id,
-            status="processing",
-            progress=30,
-            message="Preprocessing image for better accuracy...",
-            estimated_completion=25
-        ))
-        
-        # Convert RGB to BGR for OpenCV and enhance
-        image_cv = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        enhanced_image = preprocess_image(image_cv)
-        
-        await manager.send_status_update(document_id, ProcessingStatus(
-            document_id=document_id,
-            status="processing",
-            progress=50,
-            message="Extracting text with EasyOCR...",
-            estimated_completion=20
+            estimated_completion=to_seconds(estimate_document_seconds() + eta_model.rate("encode"))
         ))
         
-        # Perform OCR
-        ocr_results = reader.readtext(enhanced_image)
-        
-        await manager.send_status_update(document_id, ProcessingStatus(
-            document_id=document_id,
-            status="processing",
-            progress=70,
-            message="Analyzing entities with NER...",
-            estimated_completion=10
-        ))
-        
-        # Extract text and create bounding boxes
-        extracted_text = " ".join([text for _, text, _ in ocr_results])
-        bounding_boxes = []
-        
-        for bbox, text, confidence in ocr_results:
-            # Convert bbox to our format
-            x_coords = [point[0] for point in bbox]
-            y_coords = [point[1] for point in bbox]
-            
-            bounding_box = BoundingBox(
-                x=min(x_coords),
-                y=min(y_coords),
-                width=max(x_coords) - min(x_coords),
-                height=max(y_coords) - min(y_coords)
-            )
-            bounding_boxes.append(bounding_box)
-        
-        # Extract entities using NER
-        entities = extract_entities_with_ner(extracted_text)
+        # Spool the upload (bounded memory), then OCR all pages on the OCR workers
+        upload = await spool_upload(file)
+        try:
+            columns, cached = await cached_ocr_document(document_id, upload, options, pipelined,
+                                                        seconds_after=eta_model.rate("encode"))
+        finally:
+            await run_in_threadpool(upload.close)
         
         await manager.send_status_update(document_id, ProcessingStatus(
             document_id=document_id,
             status="processing",
             progress=90,
             message="Finalizing results...",
-            estimated_completion=2
+            estimated_completion=to_seconds(eta_model.rate("encode"))
         ))
         
-        # Calculate overall confidence
-        overall_confidence = np.mean([conf for _, _, conf in ocr_results]) if ocr_results else 0.0
-        
-        # Calculate processing time
-        processing_time = (datetime.now() - start_time).total_seconds()
-        
         # Create result
-        result = OCRResult(
-            id=str(uuid.uuid4()),
-            document_id=document_id,
-            extracted_text=extracted_text,
-            confidence=overall_confidence,
-            language="multi",
-            processing_time=processing_time,
-            bounding_boxes=bounding_boxes,
-            entities=entities,
-            status="completed",
-            created_at=start_time
-        )
+        result = build_ocr_result(document_id, columns, cached, start_time)
         
         await manager.send_status_update(document_id, ProcessingStatus(
             document_id=document_id,
@@ -373,34 +968,197 @@ async def extract_text_with_ner(file: UploadFile = File(...)):
         ))
         raise
 
-@app.post("/ocr/batch-process")
-async def batch_process_documents(files: List[UploadFile] = File(...)):
+def encode_result(result: ColumnarOCRResult, response_format: str) -> bytes:
+    """
+    Render a result in the negotiated format, timing it for the ETA model
+    """
+    start = time.perf_counter()
+    body = encode_payload(result.encode(response_format), response_format)
+    eta_model.observe("encode", time.perf_counter() - start)
+    return body
+
+@app.post("/ocr/extract-text", response_model=OCRResult,
+          dependencies=[Depends(model_registry.require("ocr", "ner"))])
+async def extract_text_with_ner(file: UploadFile = File(...), document_id: Optional[str] = Form(None),
+                                profile: Optional[str] = Form(None), resolution: Optional[str] = Form(None),
+                                accept: Optional[str] = Header(None)):
+    """
+    Advanced OCR with NER extraction. Responds with OCRResult JSON by default;
+    send Accept: application/vnd.fra-atlas.ocr-columnar+json or
+    application/x-msgpack for the compact columnar encodings
+    """
+    response_format = negotiate_format(accept)
+    options = build_ocr_options(profile, resolution)
+    with track_request("extract_text"):
+        async with admission_controller.admit("extract_text") as admission:
+            result = await ocr_upload(file, document_id, admission.profile(options.preprocessing),
+                                      resolution=options.resolution)
+            with stage("encode"):
+                body = await run_in_threadpool(encode_result, result, response_format)
+    headers = {"X-OCR-Profile-Downgraded": options.preprocessing} if admission.downgraded else None
+    return Response(content=body, media_type=RESPONSE_MEDIA_TYPES[response_format], headers=headers)
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that gives its admission slots back however sending
+    ends, including a client that disconnects before the body iterator starts
+    (its finally blocks never run then)
+    """
+
+    def __init__(self, content, admission, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.admission.release()
+
+@app.post("/ocr/batch-process", dependencies=[Depends(model_registry.require("ocr", "ner"))])
+async def batch_process_documents(files: List[UploadFile] = File(...), batch_id: Optional[str] = Form(None),
+                                  profile: Optional[str] = Form(None), resolution: Optional[str] = Form(None),
+                                  accept: Optional[str] = Header(None)):
     """
-    Process multiple documents in batch
+    Process multiple documents concurrently, streaming one record per
+    document in completion order followed by a summary record. Records are
+    NDJSON lines by default, columnar NDJSON lines or concatenated msgpack
+    objects when requested through Accept
     """
-    results = []
+    batch_id = batch_id or str(uuid.uuid4())
+    response_format = negotiate_format(accept)
+    options = build_ocr_options(profile, resolution)
     total_files = len(files)
+    concurrency = max(1, min(BATCH_CONCURRENCY, total_files))
+    # Bounded so that a slow client applies backpressure instead of results piling up
+    lines: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    file_iter = iter(enumerate(files))
+    
+    def encode_record(record: Dict[str, Any]) -> bytes:
+        body = encode_payload(record, response_format)
+        return body if response_format == "msgpack" else body + b"\n"
+    
+    async def process_files():
+        for index, file in file_iter:
+            try:
+                with track_request("batch_document"):
+                    result = await ocr_upload(file, profile=batch_profile, pipelined=True,
+                                              resolution=options.resolution)
+                # Encoding dense results is CPU work, so it stays off the event loop
+                record = await run_in_threadpool(lambda: encode_record({
+                    "type": "result", "index": index, "filename": file.filename,
+                    "result": result.encode(response_format)
+                }))
+                line = ("result", record)
+            except Exception as e:
+                # str() of an HTTPException is empty; its message is in detail
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                status_code = e.status_code if isinstance(e, HTTPException) else 500
+                print(f"Error processing file {file.filename} ({status_code}): {detail}")
+                line = ("error", encode_record({"type": "error", "index": index, "filename": file.filename,
+                                                "status": status_code, "error": detail}))
+            await lines.put(line)
+    
+    async def produce():
+        await asyncio.gather(*(process_files() for _ in range(concurrency)))
+        await lines.put(None)
     
-    for i, file in enumerate(files):
+    async def stream():
+        producer = asyncio.ensure_future(produce())
+        processed_count = 0
+        failed_count = 0
         try:
-            result = await extract_text_with_ner(file)
-            results.append(result)
+            while True:
+                line = await lines.get()
+                if line is None:
+                    break
+                line_type, record = line
+                if line_type == "result":
+                    processed_count += 1
+                else:
+                    failed_count += 1
+                yield record
+                
+                # Send batch progress update
+                done = processed_count + failed_count
+                await manager.send_status_update(batch_id, ProcessingStatus(
+                    document_id=batch_id,
+                    status="processing" if done < total_files else "completed",
+                    progress=int(done / total_files * 100),
+                    message=f"Processed {done} of {total_files} documents",
+                    # The measured document time already includes the load of the batch itself
+                    estimated_completion=to_seconds(
+                        math.ceil((total_files - done) / concurrency)
+                        * (eta_model.rate("ocr_document") + eta_model.rate("encode"))
+                    )
+                ))
             
-            # Send batch progress update
-            progress = int((i + 1) / total_files * 100)
-            await manager.send_status_update("batch", ProcessingStatus(
-                document_id="batch",
-                status="processing",
-                progress=progress,
-                message=f"Processed {i + 1} of {total_files} documents",
-                estimated_completion=max(0, (total_files - i - 1) * 10)
-            ))
-            
-        except Exception as e:
-            print(f"Error processing file {file.filename}: {str(e)}")
-            continue
+            yield encode_record({
+                "type": "summary",
+                "batch_id": batch_id,
+                "processed_count": processed_count,
+                "failed_count": failed_count
+            })
+        finally:
+            producer.cancel()
+            admission.release()
+    
+    # Held until the response is sent, so a batch occupies one slot per document it runs at a time
+    admission = await admission_controller.enter("batch_process", concurrency)
+    batch_profile = admission.profile(options.preprocessing)
+    headers = {"X-Batch-Id": batch_id, "X-Result-Format": response_format}
+    if admission.downgraded:
+        headers["X-OCR-Profile-Downgraded"] = options.preprocessing
+    return AdmittedStreamingResponse(
+        stream(),
+        admission,
+        media_type="application/x-msgpack" if response_format == "msgpack" else "application/x-ndjson",
+        headers=headers
+    )
+
+@app.post("/ocr/jobs", status_code=202)
+async def submit_ocr_job(file: UploadFile = File(...), document_id: Optional[str] = Form(None),
+                         profile: Optional[str] = Form(None), resolution: Optional[str] = Form(None)):
+    """
+    Queue a document for OCR and return the job id immediately; poll
+    /ocr/jobs/{job_id} or listen on /ws/{document_id} for progress
+    """
+    options = build_ocr_options(profile, resolution)
+    upload = await spool_upload(file)
+    try:
+        job = await ocr_job_queue.submit(upload, document_id, options.dict())
+    finally:
+        await run_in_threadpool(upload.close)
     
-    return {"processed_count": len(results), "results": results}
+    await manager.send_status_update(job["document_id"], ProcessingStatus(
+        document_id=job["document_id"],
+        status="queued",
+        progress=0,
+        message="Document queued for OCR"
+    ))
+    return describe_job(job)
+
+@app.get("/ocr/jobs/{job_id}")
+async def get_ocr_job(job_id: str):
+    """
+    Job status with attempt count and queue/run timings
+    """
+    job = await ocr_job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return describe_job(job)
+
+@app.get("/ocr/jobs/{job_id}/result", response_model=OCRResult)
+async def get_ocr_job_result(job_id: str):
+    """
+    Result of a completed job; 409 while it is still pending or after it failed
+    """
+    job = await ocr_job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=describe_job(job))
+    return json.loads(job["result"])
 
 @app.get("/health")
 async def health_check():
@@ -408,14 +1166,63 @@ async def health_check():
     Health check endpoint
     """
     return {
-        "status": "healthy",
-        "ocr_ready": reader is not None,
-        "ner_ready": nlp is not None,
+        "status": "healthy" if model_registry.all_ready() else "starting",
+        "ocr_ready": model_registry.is_ready("ocr"),
+        "ner_ready": model_registry.get("ner") is not None,
+        "dss_ready": model_registry.is_ready("dss"),
+        "models": model_registry.status(),
         "pdf_support": PDF_SUPPORT,
+        "upload_limits": {
+            "max_bytes": MAX_UPLOAD_BYTES,
+            "max_pdf_pages": MAX_PDF_PAGES,
+            "max_image_pixels": MAX_IMAGE_PIXELS
+        },
         "supported_languages": SUPPORTED_LANGUAGES,
+        "loaded_readers": ocr_backend.loaded(),
+        "ocr_pool": ocr_executor.stats(),
+        "ocr_backend": ocr_backend.stats() if OCR_BACKEND == "process" else {"backend": "thread"},
+        "ocr_cache": ocr_cache.stats(),
+        "ocr_jobs": await ocr_job_queue.stats(),
+        "pipeline": document_pipeline.stats(),
+        "admission": admission_controller.stats(),
+        "ner_batching": ner_batcher.stats(),
+        "eta_model": eta_model.stats(),
+        "websockets": manager.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
+def job_counts() -> Dict[str, int]:
+    return ocr_job_queue.store.counts() if ocr_job_queue.store.is_open else {}
+
+# Queue depths and in-flight work, read when /metrics is scraped
+metrics.gauge("ocr_pool_tasks", "OCR worker pool tasks by state",
+              lambda: labelled({key: value for key, value in ocr_executor.stats().items()
+                                if key in ("workers", "in_flight", "running", "queued")}, "state"))
+metrics.gauge("pipeline_queued", "Items waiting in each document pipeline stage's queue",
+              lambda: labelled({item.name: item.queued for item in document_pipeline.stages}, "stage"))
+metrics.gauge("pipeline_busy", "Document pipeline stage workers currently handling an item",
+              lambda: labelled({item.name: item.busy for item in document_pipeline.stages}, "stage"))
+metrics.gauge("admission_requests", "Requests holding an admission slot (weighted) or waiting for one",
+              lambda: labelled({"in_flight": admission_controller.in_flight,
+                                "queued": admission_controller.queued}, "state"))
+metrics.gauge("ner_pending_texts", "Texts waiting for the next NER batch",
+              lambda: {(): ner_batcher.pending_texts})
+metrics.gauge("ocr_jobs", "Queued OCR jobs by status", lambda: labelled(job_counts(), "status"))
+metrics.gauge("ocr_cache_memory_bytes", "Size of the in-memory OCR result cache",
+              lambda: {(): ocr_cache.stats()["memory_bytes"]})
+metrics.gauge("websocket_connections", "Open WebSocket connections",
+              lambda: {(): len(manager.subscribers)})
+metrics.gauge("websocket_pending_messages", "Messages queued for WebSocket clients",
+              lambda: {(): manager.stats()["pending_messages"]})
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage latency histograms, counters and queue gauges in the Prometheus text format
+    """
+    body = await run_in_threadpool(metrics.render)
+    return Response(content=body, media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/languages")
 async def get_supported_languages():
     """
@@ -433,16 +1240,29 @@ async def get_supported_languages():
     return {
         "supported_languages": SUPPORTED_LANGUAGES,
         "language_names": {code: language_info.get(code, code) for code in SUPPORTED_LANGUAGES},
-        "total_count": len(SUPPORTED_LANGUAGES)
+        "total_count": len(SUPPORTED_LANGUAGES),
+        "script_readers": SCRIPT_LANGUAGES,
+        "preprocessing_profiles": PREPROCESSING_PROFILES,
+        "resolution_modes": list(RESOLUTION_MODES),
+        "loaded_readers": ocr_backend.loaded()
     }
 
-@app.post("/analyze-claim")
-async def analyze_claim_with_ocr(file: UploadFile = File(...)):
+@app.post("/analyze-claim", dependencies=[Depends(model_registry.require("ocr", "ner", "dss"))])
+async def analyze_claim_with_ocr(file: UploadFile = File(...), document_id: Optional[str] = Form(None),
+                                 profile: Optional[str] = Form(None), resolution: Optional[str] = Form(None)):
     """
     Complete claim analysis: OCR + DSS recommendation
     """
+    options = build_ocr_options(profile, resolution)
+    with track_request("analyze_claim"):
+        async with admission_controller.admit("analyze_claim") as admission:
+            return await analyze_claim(file, document_id, admission.profile(options.preprocessing),
+                                       options.resolution)
+
+async def analyze_claim(file: UploadFile, document_id: Optional[str], profile: Optional[str],
+                        resolution: Optional[str] = None) -> Dict[str, Any]:
     start_time = datetime.now()
-    document_id = str(uuid.uuid4())
+    document_id = document_id or str(uuid.uuid4())
     
     try:
         # Send initial status
@@ -451,7 +1271,7 @@ async def analyze_claim_with_ocr(file: UploadFile = File(...)):
             status="processing",
             progress=10,
             message="Starting comprehensive claim analysis...",
-            estimated_completion=45
+            estimated_completion=to_seconds(estimate_document_seconds() + eta_model.rate("dss"))
         ))
         
         # Step 1: OCR Processing
@@ -460,45 +1280,30 @@ async def analyze_claim_with_ocr(file: UploadFile = File(...)):
             status="processing",
             progress=20,
             message="Extracting text and entities from document...",
-            estimated_completion=35
+            estimated_completion=to_seconds(estimate_document_seconds() + eta_model.rate("dss"))
         ))
         
         # Perform OCR (reuse existing logic)
-        contents = await file.read()
-        
-        if file.content_type == "application/pdf":
-            if not PDF_SUPPORT:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="PDF processing not available. Please install PyMuPDF: pip install PyMuPDF==1.23.14"
-                )
-            images = convert_pdf_to_images(contents)
-            if not images:
-                raise HTTPException(status_code=400, detail="No pages found in PDF")
-            image_np = images[0]
-        else:
-            try:
-                image = Image.open(io.BytesIO(contents)).convert("RGB")
-                image_np = np.array(image)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
-        
-        # Preprocess and perform OCR
-        image_cv = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        enhanced_image = preprocess_image(image_cv)
-        ocr_results = reader.readtext(enhanced_image)
-        
-        # Extract text and entities
-        extracted_text = " ".join([text for _, text, _ in ocr_results])
-        entities = extract_entities_with_ner(extracted_text)
+        upload = await spool_upload(file)
+        try:
+            columns, cached = await cached_ocr_document(document_id, upload, build_ocr_options(profile, resolution),
+                                                        progress_start=20, progress_end=55,
+                                                        seconds_after=eta_model.rate("dss"))
+        finally:
+            await run_in_threadpool(upload.close)
         
         # Create OCR result
         ocr_result = {
             'id': str(uuid.uuid4()),
             'document_id': document_id,
-            'extracted_text': extracted_text,
-            'confidence': np.mean([conf for _, _, conf in ocr_results]) if ocr_results else 0.0,
-            'entities': [entity.dict() for entity in entities],
+            'extracted_text': columns.text,
+            'confidence': columns.confidence,
+            'entities': columns.entity_dicts(),
+            'page_count': columns.page_count,
+            'skipped_pages': columns.skipped_pages,
+            'forms': columns.forms,
+            'resolution': columns.resolution,
+            'cached': cached,
             'status': 'completed'
         }
         
@@ -508,7 +1313,7 @@ async def analyze_claim_with_ocr(file: UploadFile = File(...)):
             status="processing",
             progress=60,
             message="Analyzing claim with AI decision support...",
-            estimated_completion=15
+            estimated_completion=to_seconds(eta_model.rate("dss"))
         ))
         
         # Extract features from OCR and create claim data
@@ -534,15 +1339,17 @@ async def analyze_claim_with_ocr(file: UploadFile = File(...)):
             claim_id=document_id
         )
         
-        # Get DSS recommendation
-        dss_recommendation = dss_service.analyze_claim(claim_data, ocr_result)
+        # Get DSS recommendation (scikit-learn work runs in the default threadpool)
+        dss_start = time.perf_counter()
+        dss_recommendation = await run_in_threadpool(dss_service.analyze_claim, claim_data, ocr_result)
+        eta_model.observe("dss", time.perf_counter() - dss_start)
         
         await manager.send_status_update(document_id, ProcessingStatus(
             document_id=document_id,
             status="processing",
             progress=90,
             message="Finalizing comprehensive analysis...",
-            estimated_completion=3
+            estimated_completion=0
         ))
         
         # Calculate total processing time
@@ -577,15 +1384,17 @@ async def analyze_claim_with_ocr(file: UploadFile = File(...)):
             message=f"Analysis failed: {str(e)}",
             estimated_completion=0
         ))
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/dss/analyze")
+@app.post("/dss/analyze", dependencies=[Depends(model_registry.require("dss"))])
 async def analyze_claim_dss_only(claim_data: ClaimData):
     """
     DSS analysis only (without OCR)
     """
     try:
-        recommendation = dss_service.analyze_claim(claim_data)
+        recommendation = await run_in_threadpool(dss_service.analyze_claim, claim_data)
         return recommendation
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DSS analysis failed: {str(e)}")
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for OCR results with an in-memory LRU and an on-disk tier
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+class OCRResultCache:
+    """
+    Caches document-level OCR results keyed by a hash of the uploaded bytes
+    plus the OCR configuration. Concurrent requests for the same key share a
+    single computation.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, cache_dir: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("OCR_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self.cache_dir = cache_dir if cache_dir is not None else os.getenv("OCR_CACHE_DIR", os.path.join("cache", "ocr"))
+        self.disk_max_bytes = (disk_max_bytes if disk_max_bytes is not None
+                               else int(os.getenv("OCR_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024)))
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # Sizes of the files of the disk tier, least recently used first
+        # (scanned from cache_dir on first use)
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self.disk_evictions = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(content_digest: str, config: Dict[str, Any]) -> str:
+        """Hash of the document's SHA-256 and the configuration that shapes the result"""
+        digest = hashlib.sha256(content_digest.encode("ascii"))
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any], size: int):
+        """Insert into the memory tier and evict least recently used entries"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[1]
+            self._memory[key] = (value, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes and self._memory:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _lookup_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            return entry[0]
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        """Files of the disk tier by age; call with the disk lock held"""
+        if self._disk is None:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((info.st_mtime, path, info.st_size))
+            entries.sort()
+            self._disk = OrderedDict((path, size) for _, path, size in entries)
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _touch_disk(self, path: str, size: Optional[int]):
+        """
+        Mark a file of the disk tier as just used (size=None when it was read)
+        and delete the oldest files while the tier is over disk_max_bytes
+        """
+        with self._disk_lock:
+            index = self._disk_index()
+            previous = index.pop(path, None)
+            if size is None:
+                size = previous
+            if previous is not None:
+                self._disk_bytes -= previous
+            if size is not None:
+                index[path] = size
+                self._disk_bytes += size
+            while self._disk_bytes > self.disk_max_bytes and index:
+                evicted, evicted_size = index.popitem(last=False)
+                self._disk_bytes -= evicted_size
+                self.disk_evictions += 1
+                try:
+                    os.remove(evicted)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not evict OCR cache entry {evicted}: {e}")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = f.read()
+            value = json.loads(payload)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable OCR cache entry {key}: {e}")
+            return None
+        try:
+            # The file's age orders evictions across restarts
+            os.utime(path)
+        except OSError:
+            pass
+        self._touch_disk(path, None)
+        return value, len(payload)
+
+    def _write_disk(self, key: str, payload: str):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist OCR cache entry {key}: {e}")
+            return
+        # json.dumps escapes non-ASCII, so the payload length is the file size
+        self._touch_disk(path, len(payload))
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return (result, cache_hit). The result must be JSON-serializable.
+        """
+        while True:
+            value = self._lookup_memory(key)
+            if value is not None:
+                self.hits += 1
+                return value, True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The request computing it was cancelled (e.g. its client went
+                # away): look again, and compute it here if nobody else does
+                if inflight.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+            self.coalesced += 1
+            self.hits += 1
+            return value, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            stored = await run_in_threadpool(self._read_disk, key)
+            if stored is not None:
+                value, size = stored
+                self._remember(key, value, size)
+                self.disk_hits += 1
+                self.hits += 1
+                hit = True
+            else:
+                self.misses += 1
+                value = await compute()
+                payload = json.dumps(value)
+                self._remember(key, value, len(payload))
+                await run_in_threadpool(self._write_disk, key, payload)
+                hit = False
+            future.set_result(value)
+            return value, hit
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health reporting"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries, size = len(self._memory), self._memory_bytes
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": entries,
+            "memory_bytes": size,
+            "max_bytes": self.max_bytes,
+            "disk_enabled": bool(self.cache_dir),
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes,
+            "disk_evictions": self.disk_evictions
+        }
+
+# Global OCR result cache instance
+ocr_cache = OCRResultCache()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Array-backed OCR results that only become JSON objects at the response edge,
+plus the compact columnar JSON and msgpack encodings negotiated via Accept
+"""
+
+import json
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import msgpack
+    MSGPACK_SUPPORT = True
+except ImportError:
+    MSGPACK_SUPPORT = False
+
+RESPONSE_MEDIA_TYPES: Dict[str, str] = {
+    "json": "application/json",
+    "columnar": "application/vnd.fra-atlas.ocr-columnar+json",
+    "msgpack": "application/x-msgpack"
+}
+_ACCEPT_FORMATS: Dict[str, str] = {
+    "*/*": "json",
+    "application/*": "json",
+    "application/json": "json",
+    "application/x-ndjson": "json",
+    "application/vnd.fra-atlas.ocr-columnar+json": "columnar",
+    "application/x-msgpack": "msgpack",
+    "application/msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack"
+}
+
+# Decimal places kept by the compact encodings
+COORDINATE_DECIMALS = 2
+CONFIDENCE_DECIMALS = 4
+
+# (type, value, confidence, start_index, end_index[, normalized])
+EntityRow = Tuple[Any, ...]
+
+class EntityTable:
+    """Extracted entities stored column-wise with character offsets into the text"""
+
+    __slots__ = ("types", "values", "confidence", "spans", "normalized")
+
+    def __init__(self, types: List[str], values: List[str], confidence: np.ndarray, spans: np.ndarray,
+                 normalized: Optional[List[Optional[Dict[str, Any]]]] = None):
+        self.types = types
+        self.values = values
+        self.confidence = confidence
+        self.spans = spans
+        self.normalized = normalized if normalized is not None else [None] * len(types)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[EntityRow]) -> "EntityTable":
+        return cls(
+            [row[0] for row in rows],
+            [row[1] for row in rows],
+            np.array([row[2] for row in rows], dtype=np.float64),
+            np.array([(row[3], row[4]) for row in rows], dtype=np.int64).reshape(-1, 2),
+            [row[5] if len(row) > 5 else None for row in rows]
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["EntityTable"], offsets: Sequence[int]) -> "EntityTable":
+        """Join tables, shifting each table's spans by its text offset"""
+        if not tables:
+            return cls.from_rows([])
+        return cls(
+            [value for table in tables for value in table.types],
+            [value for table in tables for value in table.values],
+            np.concatenate([table.confidence for table in tables]),
+            np.concatenate([table.spans + offset for table, offset in zip(tables, offsets)]),
+            [value for table in tables for value in table.normalized]
+        )
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """ExtractedEntity-shaped dicts; ids are only generated here"""
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "type": entity_type,
+                "value": value,
+                "confidence": confidence,
+                "start_index": start,
+                "end_index": end,
+                "bounding_box": None,
+                "normalized": normalized,
+                "verified": False
+            }
+            for entity_type, value, confidence, (start, end), normalized
+            in zip(self.types, self.values, self.confidence.tolist(), self.spans.tolist(), self.normalized)
+        ]
+
+    def to_columns(self, rounded: bool = True) -> Dict[str, List]:
+        confidence = np.round(self.confidence, CONFIDENCE_DECIMALS) if rounded else self.confidence
+        return {
+            "type": self.types,
+            "value": self.values,
+            "confidence": confidence.tolist(),
+            "start_index": self.spans[:, 0].tolist(),
+            "end_index": self.spans[:, 1].tolist(),
+            "normalized": self.normalized
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List]) -> "EntityTable":
+        return cls(
+            list(columns["type"]),
+            list(columns["value"]),
+            np.array(columns["confidence"], dtype=np.float64),
+            np.array([columns["start_index"], columns["end_index"]], dtype=np.int64).T.reshape(-1, 2),
+            list(columns.get("normalized") or [None] * len(columns["type"]))
+        )
+
+def quads_to_boxes(quads: Sequence) -> np.ndarray:
+    """EasyOCR quadrilaterals to an (N, 4) array of x, y, width, height"""
+    if not len(quads):
+        return np.zeros((0, 4), dtype=np.float64)
+    points = np.array(quads, dtype=np.float64).reshape(len(quads), -1, 2)
+    low = points.min(axis=1)
+    high = points.max(axis=1)
+    return np.hstack([low, high - low])
+
+def _box_dicts(boxes: np.ndarray, pages: Iterable[int]) -> List[Dict[str, Any]]:
+    return [
+        {"x": x, "y": y, "width": width, "height": height, "page": page}
+        for (x, y, width, height), page in zip(boxes.tolist(), pages)
+    ]
+
+def _box_columns(boxes: np.ndarray, pages: np.ndarray, confidence: np.ndarray) -> Dict[str, List]:
+    rounded = np.round(boxes, COORDINATE_DECIMALS)
+    return {
+        "page": pages.tolist(),
+        "x": rounded[:, 0].tolist(),
+        "y": rounded[:, 1].tolist(),
+        "width": rounded[:, 2].tolist(),
+        "height": rounded[:, 3].tolist(),
+        "confidence": np.round(confidence, CONFIDENCE_DECIMALS).tolist()
+    }
+
+class PageColumns:
+    """OCR output of one page: box coordinates and confidences as arrays"""
+
+    __slots__ = ("page_number", "text", "boxes", "box_confidence", "entities", "languages", "processing_time",
+                 "form")
+
+    def __init__(self, page_number: int, text: str, boxes: np.ndarray, box_confidence: np.ndarray,
+                 entities: EntityTable, languages: List[str], processing_time: float,
+                 form: Optional[Dict[str, Any]] = None):
+        self.page_number = page_number
+        self.text = text
+        self.boxes = boxes
+        self.box_confidence = box_confidence
+        self.entities = entities
+        self.languages = languages
+        self.processing_time = processing_time
+        # Form type and fields when the page was read as a known form template
+        self.form = form
+
+    @property
+    def confidence(self) -> float:
+        return float(self.box_confidence.mean()) if len(self.box_confidence) else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """PageResult-shaped dict for page_result WebSocket messages"""
+        return {
+            "page_number": self.page_number,
+            "extracted_text": self.text,
+            "confidence": self.confidence,
+            "bounding_boxes": _box_dicts(self.boxes, [self.page_number] * len(self.boxes)),
+            "entities": self.entities.to_dicts(),
+            "languages": self.languages,
+            "processing_time": self.processing_time,
+            "form": self.form
+        }
+
+class DocumentColumns:
+    """Merged OCR output of all pages of a document"""
+
+    __slots__ = ("text", "language", "page_count", "box_pages", "boxes", "box_confidence", "entities",
+                 "skipped_pages", "forms", "resolution")
+
+    def __init__(self, text: str, language: str, page_count: int, box_pages: np.ndarray,
+                 boxes: np.ndarray, box_confidence: np.ndarray, entities: EntityTable,
+                 skipped_pages: Optional[List[Dict[str, Any]]] = None,
+                 forms: Optional[List[Dict[str, Any]]] = None,
+                 resolution: Optional[Dict[str, Any]] = None):
+        self.text = text
+        self.language = language
+        self.page_count = page_count
+        self.box_pages = box_pages
+        self.boxes = boxes
+        self.box_confidence = box_confidence
+        self.entities = entities
+        # Pages that were not OCRed: blank, or a duplicate whose result was reused
+        self.skipped_pages = skipped_pages or []
+        # Structured fields of the pages read as known forms, with their page numbers
+        self.forms = forms or []
+        # Pixels OCRed and time saved by the adaptive resolution mode (None in standard mode)
+        self.resolution = resolution
+
+    @classmethod
+    def from_pages(cls, pages: Sequence[PageColumns], language: str, separator: str = "\n\n",
+                   page_count: Optional[int] = None,
+                   skipped_pages: Optional[List[Dict[str, Any]]] = None,
+                   resolution: Optional[Dict[str, Any]] = None) -> "DocumentColumns":
+        pages = sorted(pages, key=lambda page: page.page_number)
+        offsets = []
+        offset = 0
+        for page in pages:
+            offsets.append(offset)
+            offset += len(page.text) + len(separator)
+        return cls(
+            separator.join(page.text for page in pages),
+            language,
+            page_count if page_count is not None else len(pages),
+            np.concatenate([np.full(len(page.boxes), page.page_number, dtype=np.int64) for page in pages])
+            if pages else np.zeros(0, dtype=np.int64),
+            np.concatenate([page.boxes for page in pages]) if pages else np.zeros((0, 4), dtype=np.float64),
+            np.concatenate([page.box_confidence for page in pages]) if pages else np.zeros(0, dtype=np.float64),
+            EntityTable.concat([page.entities for page in pages], offsets),
+            skipped_pages,
+            [dict(page.form, page_number=page.page_number) for page in pages if page.form],
+            resolution
+        )
+
+    @property
+    def confidence(self) -> float:
+        return float(self.box_confidence.mean()) if len(self.box_confidence) else 0.0
+
+    def bounding_box_dicts(self) -> List[Dict[str, Any]]:
+        return _box_dicts(self.boxes, self.box_pages.tolist())
+
+    def entity_dicts(self) -> List[Dict[str, Any]]:
+        return self.entities.to_dicts()
+
+    def to_columns(self) -> Dict[str, Any]:
+        return {
+            "extracted_text": self.text,
+            "confidence": self.confidence,
+            "language": self.language,
+            "page_count": self.page_count,
+            "bounding_boxes": _box_columns(self.boxes, self.box_pages, self.box_confidence),
+            "entities": self.entities.to_columns(),
+            "skipped_pages": self.skipped_pages,
+            "forms": self.forms,
+            "resolution": self.resolution
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Lossless JSON-serializable form used by the result cache"""
+        return {
+            "extracted_text": self.text,
+            "language": self.language,
+            "page_count": self.page_count,
+            "box_pages": self.box_pages.tolist(),
+            "boxes": self.boxes.tolist(),
+            "box_confidence": self.box_confidence.tolist(),
+            "entities": self.entities.to_columns(rounded=False),
+            "skipped_pages": self.skipped_pages,
+            "forms": self.forms,
+            "resolution": self.resolution
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "DocumentColumns":
+        return cls(
+            state["extracted_text"],
+            state["language"],
+            state["page_count"],
+            np.array(state["box_pages"], dtype=np.int64),
+            np.array(state["boxes"], dtype=np.float64).reshape(-1, 4),
+            np.array(state["box_confidence"], dtype=np.float64),
+            EntityTable.from_columns(state["entities"]),
+            state.get("skipped_pages"),
+            state.get("forms"),
+            state.get("resolution")
+        )
+
+class ColumnarOCRResult:
+    """Document-level OCR result: scalar fields plus the array-backed columns"""
+
+    __slots__ = ("meta", "columns")
+
+    def __init__(self, meta: Dict[str, Any], columns: DocumentColumns):
+        self.meta = meta
+        self.columns = columns
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OCRResult-shaped dict (the default JSON response)"""
+        columns = self.columns
+        return dict(
+            self.meta,
+            extracted_text=columns.text,
+            confidence=columns.confidence,
+            language=columns.language,
+            page_count=columns.page_count,
+            bounding_boxes=columns.bounding_box_dicts(),
+            entities=columns.entity_dicts(),
+            skipped_pages=columns.skipped_pages,
+            forms=columns.forms,
+            resolution=columns.resolution
+        )
+
+    def to_columnar_dict(self) -> Dict[str, Any]:
+        return dict(self.meta, format="columnar", **self.columns.to_columns())
+
+    def encode(self, response_format: str) -> Dict[str, Any]:
+        return self.to_dict() if response_format == "json" else self.to_columnar_dict()
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick json, columnar or msgpack from an Accept header by quality; anything
+    unrecognised (or msgpack without the msgpack package) falls back to json
+    """
+    if not accept:
+        return "json"
+    ranked = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        ranked.append((-quality, position, media_type.lower()))
+    for negative_quality, _, media_type in sorted(ranked):
+        response_format = _ACCEPT_FORMATS.get(media_type)
+        if negative_quality == 0 or response_format is None:
+            continue
+        if response_format == "msgpack" and not MSGPACK_SUPPORT:
+            continue
+        return response_format
+    return "json"
+
+def encode_payload(payload: Any, response_format: str) -> bytes:
+    """Serialize one response body or stream record in the negotiated format"""
+    if response_format == "msgpack":
+        return msgpack.packb(payload, use_single_float=True)
+    if response_format == "columnar":
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return json.dumps(payload).encode("utf-8")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Durable asynchronous OCR job queue backed by SQLite
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from uploads import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+class OCRJobStore:
+    """SQLite persistence for OCR jobs and their uploaded payloads"""
+
+    def __init__(self, db_path: str, payload_dir: str):
+        self.db_path = db_path
+        self.payload_dir = payload_dir
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self):
+        """Open the database and create the schema if needed"""
+        with self._lock:
+            if self._conn is not None:
+                return
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            os.makedirs(self.payload_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_jobs (
+                    id TEXT PRIMARY KEY,
+                    document_id TEXT NOT NULL,
+                    filename TEXT,
+                    content_type TEXT,
+                    payload_path TEXT NOT NULL,
+                    options TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    error TEXT,
+                    result TEXT,
+                    submitted_at REAL NOT NULL,
+                    available_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ocr_jobs_queue ON ocr_jobs (status, available_at, submitted_at)"
+            )
+            self._conn.commit()
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def create(self, upload: SpooledUpload, document_id: str, options: Dict[str, Any],
+               max_attempts: int) -> Dict[str, Any]:
+        """Persist the upload and enqueue a job for it"""
+        job_id = str(uuid.uuid4())
+        filename, content_type = upload.filename, upload.content_type
+        payload_path = os.path.join(self.payload_dir, job_id)
+        upload.save_to(payload_path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO ocr_jobs (id, document_id, filename, content_type, payload_path, options, status,
+                                         max_attempts, submitted_at, available_at)
+                   VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)""",
+                (job_id, document_id, filename, content_type, payload_path, json.dumps(options),
+                 max_attempts, now, now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest runnable job to running"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT id FROM ocr_jobs WHERE status = 'queued' AND available_at <= ?
+                   ORDER BY submitted_at LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                """UPDATE ocr_jobs SET status = 'running', attempts = attempts + 1, started_at = ?, error = NULL
+                   WHERE id = ?""",
+                (now, row["id"])
+            )
+            self._conn.commit()
+        return self.get(row["id"])
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ocr_jobs SET status = 'completed', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+            self._conn.commit()
+        self._remove_payload(job_id)
+
+    def fail(self, job_id: str, error: str, retry_delay: float, retryable: bool = True) -> str:
+        """Requeue the job with a delay, or mark it failed once out of attempts (or when not retryable)"""
+        job = self.get(job_id)
+        now = time.time()
+        retry = retryable and job is not None and job["attempts"] < job["max_attempts"]
+        with self._lock:
+            if retry:
+                self._conn.execute(
+                    "UPDATE ocr_jobs SET status = 'queued', error = ?, available_at = ? WHERE id = ?",
+                    (error, now + retry_delay * job["attempts"], job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE ocr_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    (error, now, job_id)
+                )
+            self._conn.commit()
+        if not retry:
+            self._remove_payload(job_id)
+        return "queued" if retry else "failed"
+
+    def requeue_interrupted(self) -> Tuple[int, int]:
+        """
+        Return jobs left running by a previous process to the queue, and fail
+        the ones that were on their last attempt (a job that takes the process
+        down with it would otherwise be claimed again on every restart).
+        Returns the number of jobs requeued and failed.
+        """
+        now = time.time()
+        with self._lock:
+            exhausted = [row["id"] for row in self._conn.execute(
+                "SELECT id FROM ocr_jobs WHERE status = 'running' AND attempts >= max_attempts"
+            )]
+            self._conn.execute(
+                """UPDATE ocr_jobs SET status = 'failed', error = 'Interrupted on its last attempt', finished_at = ?
+                   WHERE status = 'running' AND attempts >= max_attempts""",
+                (now,)
+            )
+            cursor = self._conn.execute(
+                "UPDATE ocr_jobs SET status = 'queued', available_at = ? WHERE status = 'running'",
+                (now,)
+            )
+            self._conn.commit()
+            requeued = cursor.rowcount
+        for job_id in exhausted:
+            self._remove_payload(job_id)
+        return requeued, len(exhausted)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ocr_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def open_payload(self, job: Dict[str, Any]) -> SpooledUpload:
+        """The job's upload, read in place from the payload directory"""
+        return SpooledUpload.from_path(job["payload_path"], job["filename"], job["content_type"])
+
+    def _remove_payload(self, job_id: str):
+        try:
+            os.remove(os.path.join(self.payload_dir, job_id))
+        except FileNotFoundError:
+            pass
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM ocr_jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+def describe_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job row with derived timing fields"""
+    started_at = job["started_at"]
+    finished_at = job["finished_at"]
+    return {
+        "job_id": job["id"],
+        "document_id": job["document_id"],
+        "filename": job["filename"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "error": job["error"],
+        "submitted_at": job["submitted_at"],
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "queue_time": (started_at - job["submitted_at"]) if started_at else None,
+        "run_time": (finished_at - started_at) if started_at and finished_at else None
+    }
+
+class OCRJobQueue:
+    """Asyncio workers that drain the persistent job store"""
+
+    def __init__(self, store: OCRJobStore, workers: int, max_attempts: int,
+                 timeout: float, retry_delay: float):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._process: Optional[Callable[[Dict[str, Any], SpooledUpload], Awaitable[Dict[str, Any]]]] = None
+        self._on_failure: Optional[Callable[[Dict[str, Any], str, str], Awaitable[None]]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self, process: Callable[[Dict[str, Any], SpooledUpload], Awaitable[Dict[str, Any]]],
+                    on_failure: Optional[Callable[[Dict[str, Any], str, str], Awaitable[None]]] = None):
+        """Open the store, resume interrupted jobs and start the workers"""
+        self._process = process
+        self._on_failure = on_failure
+        self._wakeup = asyncio.Event()
+        await run_in_threadpool(self.store.open)
+        resumed, abandoned = await run_in_threadpool(self.store.requeue_interrupted)
+        if resumed:
+            logger.info(f"Resuming {resumed} interrupted OCR job(s)")
+        if abandoned:
+            logger.warning(f"Failed {abandoned} OCR job(s) interrupted on their last attempt")
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        logger.info(f"OCR job queue started with {self.workers} worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await run_in_threadpool(self.store.close)
+
+    async def submit(self, upload: SpooledUpload, document_id: Optional[str] = None,
+                     options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        job = await run_in_threadpool(
+            self.store.create, upload, document_id or str(uuid.uuid4()), options or {}, self.max_attempts
+        )
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await run_in_threadpool(self.store.get, job_id)
+
+    async def _worker(self):
+        while True:
+            job = await run_in_threadpool(self.store.claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Poll periodically so delayed retries are picked up
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]):
+        try:
+            upload = await run_in_threadpool(self.store.open_payload, job)
+            result = await asyncio.wait_for(self._process(job, upload), timeout=self.timeout)
+        except asyncio.CancelledError:
+            # Left as running; it is requeued when the service starts again
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                error = f"Timed out after {self.timeout:.0f}s"
+            else:
+                error = str(getattr(e, "detail", e))
+            # Client errors (corrupt or oversized uploads) fail the same way every time
+            status_code = getattr(e, "status_code", None)
+            retryable = not (isinstance(status_code, int) and 400 <= status_code < 500)
+            status = await run_in_threadpool(self.store.fail, job["id"], error, self.retry_delay, retryable)
+            logger.warning(f"OCR job {job['id']} attempt {job['attempts']} failed ({status}): {error}")
+            if self._on_failure is not None:
+                await self._on_failure(job, error, status)
+            return
+        await run_in_threadpool(self.store.complete, job["id"], result)
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await run_in_threadpool(self.store.counts) if self.store.is_open else {}
+        return {"workers": self.workers, "jobs": counts}
+
+# Global OCR job queue instance
+ocr_job_queue = OCRJobQueue(
+    OCRJobStore(
+        db_path=os.getenv("OCR_JOBS_DB", os.path.join("jobs", "ocr_jobs.sqlite3")),
+        payload_dir=os.getenv("OCR_JOBS_PAYLOAD_DIR", os.path.join("jobs", "payloads"))
+    ),
+    workers=int(os.getenv("OCR_JOB_WORKERS", 2)),
+    max_attempts=int(os.getenv("OCR_JOB_MAX_ATTEMPTS", 3)),
+    timeout=float(os.getenv("PROCESSING_TIMEOUT", 300)),
+    retry_delay=float(os.getenv("OCR_JOB_RETRY_DELAY", 5))
+)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Bounded worker pool for the blocking OCR/NER stages of the FRA Atlas OCR service
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from eta import eta_model
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+queue_wait_seconds = metrics.histogram(
+    "ocr_pool_queue_wait_seconds", "Time work waited for a free OCR worker slot"
+)
+
+def default_worker_count() -> int:
+    """Number of OCR slots used when OCR_WORKERS is not set"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+class _Submission:
+    """Whether a submitted call still counts as queued (guarded by the executor lock)"""
+
+    __slots__ = ("queued",)
+
+    def __init__(self):
+        self.queued = True
+
+class OCRExecutor:
+    """Fixed-size executor that keeps EasyOCR, OpenCV and spaCy work off the event loop"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("OCR_WORKERS", default_worker_count()))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the underlying pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="ocr-worker"
+                )
+                logger.info(f"OCR executor started with {self.max_workers} worker(s)")
+            return self._executor
+
+    def _dequeue(self, submission: _Submission):
+        """Stop counting a submission as queued (once); call with the lock held"""
+        if submission.queued:
+            submission.queued = False
+            self._queued -= 1
+
+    def _track(self, func: Callable[..., Any], submitted: float, submission: _Submission) -> Any:
+        """Run func in a worker thread while keeping the bookkeeping counters"""
+        queue_wait_seconds.observe(time.perf_counter() - submitted)
+        with self._lock:
+            self._dequeue(submission)
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            result = func()
+        except BaseException:
+            with self._lock:
+                self._running -= 1
+                self._failed += 1
+            raise
+        eta_model.observe("pool_task", time.perf_counter() - start)
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+        return result
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function on one of the OCR slots and await its result"""
+        loop = asyncio.get_running_loop()
+        submission = _Submission()
+        with self._lock:
+            self._queued += 1
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(),
+                partial(self._track, partial(func, *args, **kwargs), time.perf_counter(), submission)
+            )
+        finally:
+            # A caller cancelled before a worker picked the call up leaves the
+            # queue here; a call already running is counted until it returns
+            with self._lock:
+                self._dequeue(submission)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+            logger.info("OCR executor stopped")
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of pool usage for health reporting"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._queued + self._running,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self._completed,
+                "failed": self._failed
+            }
+
+# Global OCR executor instance
+ocr_executor = OCRExecutor()
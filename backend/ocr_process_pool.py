@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Process-pool OCR backend: each worker process owns its own EasyOCR readers
+with a capped torch thread count, and page images are handed over through
+shared memory instead of being pickled
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait as wait_for_futures
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import collect_stages, record_stages, stage
+from ocr_readers import ReaderPool, SCRIPT_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# "thread" runs EasyOCR on the OCR worker threads of this process, "process"
+# on a pool of worker processes (CPU only)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "thread")
+# Torch intra-op threads per worker process (default: the cores divided among the workers)
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", 0))
+
+# Readers of the worker process this module runs in (worker processes only)
+_worker_readers: Optional[ReaderPool] = None
+
+def _init_worker(torch_threads: int, scripts: Sequence[str]):
+    """Cap the thread pools before torch is imported, then load and warm up the readers"""
+    global _worker_readers
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(torch_threads)
+    import cv2
+    import torch
+    torch.set_num_threads(torch_threads)
+    # Preprocessing runs in the parent, so OpenCV needs no threads of its own here
+    cv2.setNumThreads(1)
+    _worker_readers = ReaderPool(gpu=False)
+    for script in scripts:
+        _worker_readers.get(script)
+    sample = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(sample, "Village Ramgarh", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    _worker_readers.readtext(sample, script="latin")
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+def _call(method: str, name: str, shape: Tuple[int, ...], dtype: str, *args) -> Tuple[Any, List]:
+    """
+    Run a ReaderPool method on an image that lives in the shared memory block
+    name. Returns the result and the stage timings of the call, which the
+    metrics registry of this process would otherwise keep to itself.
+    """
+    block = SharedMemory(name=name)
+    try:
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        try:
+            with collect_stages() as timings:
+                result = getattr(_worker_readers, method)(image, *args)
+            return result, timings
+        finally:
+            # The view must be released before the block is closed
+            del image
+    finally:
+        block.close()
+
+class ProcessReaderPool:
+    """
+    Drop-in for ReaderPool.readtext and recognize_boxes backed by worker
+    processes. A call blocks its calling thread (one of the OCR worker
+    threads) until a process is free, so OCR_WORKERS threads keep
+    OCR_WORKERS processes busy.
+    """
+
+    def __init__(self, workers: int, torch_threads: Optional[int] = None, preload_scripts: Sequence[str] = ()):
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.scripts = ["latin"] + [script for script in preload_scripts if script != "latin"]
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pids: List[int] = []
+        self.calls = 0
+        self.handoff_bytes = 0
+
+    def start(self):
+        """Start every worker process and wait until its readers are loaded"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            # spawn, not fork: forking a process that has started torch threads can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.torch_threads, self.scripts)
+            )
+        # Processes are spawned on demand, so as many concurrent tasks as workers start them all
+        futures = [self._executor.submit(_worker_pid) for _ in range(self.workers)]
+        wait_for_futures(futures)
+        self.pids = sorted(set(future.result() for future in futures))
+        logger.info(f"OCR process pool started: {len(self.pids)} worker(s) × {self.torch_threads} torch thread(s)")
+
+    def readtext(self, image: np.ndarray, script: Optional[str] = None) -> Tuple[List, str]:
+        """Copy the image into shared memory once and recognize it in a worker process"""
+        return self._submit("readtext", image, script)
+
+    def recognize_boxes(self, grey: np.ndarray, boxes: List, script: str = "latin") -> List:
+        """ReaderPool.recognize_boxes in a worker process"""
+        if not boxes:
+            return []
+        return self._submit("recognize_boxes", grey, boxes, script)
+
+    def _submit(self, method: str, image: np.ndarray, *args) -> Any:
+        image = np.ascontiguousarray(image)
+        block = SharedMemory(create=True, size=max(1, image.nbytes))
+        try:
+            with stage("shm_handoff"):
+                shared = np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)
+                shared[...] = image
+                del shared
+            with self._lock:
+                self.calls += 1
+                self.handoff_bytes += image.nbytes
+            with stage("process_readtext"):
+                result, timings = self._executor.submit(
+                    _call, method, block.name, image.shape, image.dtype.str, *args
+                ).result()
+            record_stages(timings)
+            return result
+        finally:
+            block.close()
+            block.unlink()
+
+    def loaded(self) -> Dict[str, List[str]]:
+        """Scripts preloaded in every worker (others are loaded per worker on first use)"""
+        return {script: SCRIPT_LANGUAGES[script] for script in self.scripts}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info("OCR process pool stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "process",
+            "workers": self.workers,
+            "pids": self.pids,
+            "torch_threads": self.torch_threads,
+            "calls": self.calls,
+            "handoff_mb": round(self.handoff_bytes / (1024 * 1024), 1)
+        }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pool of lazily built EasyOCR readers keyed by script, with script-aware routing
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# EasyOCR only combines English with languages of a single script, so each
+# script gets its own (smallest) reader
+SCRIPT_LANGUAGES: Dict[str, List[str]] = {
+    "latin": ["en"],
+    "devanagari": ["en", "hi", "mr"],
+    "telugu": ["en", "te"],
+    "tamil": ["en", "ta"],
+    "bengali": ["en", "bn"]
+}
+
+# Unicode blocks used to recognise which Indic script a recognizer produced
+SCRIPT_RANGES: Dict[str, Tuple[int, int]] = {
+    "devanagari": (0x0900, 0x097F),
+    "bengali": (0x0980, 0x09FF),
+    "tamil": (0x0B80, 0x0BFF),
+    "telugu": (0x0C00, 0x0C7F)
+}
+
+# Number of text boxes sampled by the script-detection pre-pass
+SCRIPT_SAMPLE_BOXES = int(os.getenv("OCR_SCRIPT_SAMPLE_BOXES", 8))
+# Mean latin confidence on the sample above which a page is treated as English-only
+LATIN_CONFIDENCE_THRESHOLD = 0.6
+# Minimum confidence-weighted share of script characters needed to pick an Indic reader
+SCRIPT_SCORE_THRESHOLD = 0.25
+
+def script_share(text: str, script: str) -> float:
+    """Fraction of non-space characters of text that belong to script"""
+    low, high = SCRIPT_RANGES[script]
+    letters = [ch for ch in text if not ch.isspace()]
+    if not letters:
+        return 0.0
+    return sum(1 for ch in letters if low <= ord(ch) <= high) / len(letters)
+
+class ReaderPool:
+    """
+    One CRAFT text detector shared by recognizer-only readers that are built
+    on first use for each script.
+    """
+
+    def __init__(self, gpu: Optional[bool] = None):
+        self.gpu = gpu if gpu is not None else os.getenv("OCR_GPU", "true").lower() == "true"
+        self._readers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, script: str) -> Any:
+        """Return the reader for a script, building it if necessary"""
+        reader = self._readers.get(script)
+        if reader is not None:
+            return reader
+        with self._lock:
+            reader = self._readers.get(script)
+            if reader is None:
+                # Imported here so that importing the service does not pay for torch
+                import easyocr
+                languages = SCRIPT_LANGUAGES[script]
+                logger.info(f"Loading EasyOCR reader for {script} ({', '.join(languages)})")
+                # Only the latin reader loads the detector; the others only recognize
+                reader = easyocr.Reader(languages, gpu=self.gpu, detector=(script == "latin"))
+                self._readers[script] = reader
+            return reader
+
+    @property
+    def detector(self) -> Any:
+        return self.get("latin")
+
+    def loaded(self) -> Dict[str, List[str]]:
+        """Scripts whose readers are currently in memory"""
+        return {script: SCRIPT_LANGUAGES[script] for script in self._readers}
+
+    def detect(self, image: np.ndarray) -> Tuple[np.ndarray, List, List]:
+        """Run text detection once; returns the greyscale image and the box lists"""
+        from easyocr.utils import reformat_input
+        img, img_cv_grey = reformat_input(image)
+        horizontal_list, free_list = self.detector.detect(img)
+        return img_cv_grey, horizontal_list[0], free_list[0]
+
+    def detect_script(self, img_cv_grey: np.ndarray, horizontal_list: List) -> str:
+        """
+        Cheap pre-pass: recognize a handful of the largest text boxes with the
+        latin reader and, if that looks wrong, with each Indic reader, then
+        pick the script whose characters dominate the output
+        """
+        if not horizontal_list:
+            return "latin"
+        samples = sorted(
+            horizontal_list,
+            key=lambda box: (box[1] - box[0]) * (box[3] - box[2]),
+            reverse=True
+        )[:SCRIPT_SAMPLE_BOXES]
+
+        latin = self.detector.recognize(img_cv_grey, samples, [], reformat=False)
+        if latin and np.mean([conf for _, _, conf in latin]) >= LATIN_CONFIDENCE_THRESHOLD:
+            return "latin"
+
+        best_script, best_score = "latin", 0.0
+        for script in SCRIPT_RANGES:
+            results = self.get(script).recognize(img_cv_grey, samples, [], reformat=False)
+            if not results:
+                continue
+            score = sum(conf * script_share(text, script) for _, text, conf in results) / len(results)
+            if score > best_score:
+                best_script, best_score = script, score
+        return best_script if best_score >= SCRIPT_SCORE_THRESHOLD else "latin"
+
+    def readtext(self, image: np.ndarray, script: Optional[str] = None) -> Tuple[List, str]:
+        """
+        Detect text once and recognize it with the smallest reader matching the
+        page's script. Returns the EasyOCR results and the script used.
+        """
+        with stage("detection"):
+            img_cv_grey, horizontal_list, free_list = self.detect(image)
+        if script is None:
+            with stage("script_detection"):
+                script = self.detect_script(img_cv_grey, horizontal_list)
+        reader = self.get(script)
+        with stage("recognition"):
+            results = reader.recognize(img_cv_grey, horizontal_list, free_list, reformat=False)
+        return results, script
+
+    def recognize_boxes(self, grey: np.ndarray, boxes: List, script: str = "latin") -> List:
+        """
+        Recognition only, in one batch, of the given [x_min, x_max, y_min, y_max]
+        boxes of a greyscale image
+        """
+        if not boxes:
+            return []
+        with stage("recognition"):
+            return self.get(script).recognize(grey, boxes, [], reformat=False)
+
+# Global reader pool instance
+reader_pool = ReaderPool()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Cheap pre-OCR screening of rendered pages: blank pages (by ink density) and
+exact or near-exact duplicate pages of the same document (by perceptual hash,
+confirmed on the ink pixels)
+"""
+
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_columns import PageColumns
+
+# Set to false to OCR every page
+PAGE_SCREENING = os.getenv("PAGE_SCREENING", "true").lower() == "true"
+# Pages with a smaller fraction of ink pixels are blank (a short line of text is about 0.05%)
+BLANK_INK_RATIO = float(os.getenv("PAGE_BLANK_INK_RATIO", 0.0003))
+# Pages whose hashes differ in at most this fraction of bits are duplicate candidates
+DUPLICATE_HASH_DISTANCE = float(os.getenv("PAGE_DUPLICATE_DISTANCE", 0.01))
+# Candidates are duplicates when at most this fraction of their ink differs.
+# Filled copies of one printed form differ only in their handwriting, which
+# the hash barely sees, so this has to stay well below a name's share of ink.
+DUPLICATE_PIXEL_DIFFERENCE = float(os.getenv("PAGE_DUPLICATE_PIXEL_DIFFERENCE", 0.002))
+# Side of the difference hash grid (HASH_SIZE² bits)
+HASH_SIZE = 32
+# Darker than the page background by this much counts as ink
+INK_CONTRAST = 60
+# Border that is ignored (scanner edges, punch holes), as a fraction of each side
+MARGIN = 0.04
+# Ink densities of duplicates may differ by at most this fraction
+DUPLICATE_INK_TOLERANCE = 0.02
+# Size of the ink mask compared pixel by pixel (width, height)
+MASK_SIZE = (512, 724)
+
+SCREENING_CONFIG: Dict[str, Any] = {
+    "enabled": PAGE_SCREENING,
+    "blank_ink_ratio": BLANK_INK_RATIO,
+    "duplicate_hash_distance": DUPLICATE_HASH_DISTANCE,
+    "duplicate_pixel_difference": DUPLICATE_PIXEL_DIFFERENCE,
+    "hash_size": HASH_SIZE
+}
+
+class PageFingerprint(NamedTuple):
+    ink: float
+    hash: np.ndarray
+    aspect: float
+    mask: np.ndarray  # MASK_SIZE ink mask, packed bits
+
+def fingerprint(image: np.ndarray) -> PageFingerprint:
+    """Ink density and difference hash of a page, from a strided greyscale sample"""
+    height, width = image.shape[:2]
+    top, left = int(height * MARGIN), int(width * MARGIN)
+    sample = image[top:height - top:2, left:width - left:2]
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+    if sample.size == 0:
+        return PageFingerprint(0.0, np.zeros(HASH_SIZE * HASH_SIZE // 8, dtype=np.uint8), 1.0,
+                               np.zeros(MASK_SIZE[0] * MASK_SIZE[1] // 8, dtype=np.uint8))
+    background = float(np.median(sample))
+    ink_pixels = sample < background - INK_CONTRAST
+    ink = np.count_nonzero(ink_pixels) / sample.size
+    small = cv2.resize(sample, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    # Area averaging keeps every stroke: a mask cell is ink if any pixel in it is
+    mask = cv2.resize(ink_pixels.astype(np.uint8) * 255, MASK_SIZE, interpolation=cv2.INTER_AREA) > 0
+    return PageFingerprint(ink, np.packbits(bits), width / height, np.packbits(mask))
+
+def ink_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Fraction of the ink of two packed masks that is on only one of them,
+    allowing a shift of one mask cell (rendering and rescan jitter)
+    """
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    a = np.unpackbits(a).reshape(MASK_SIZE[1], MASK_SIZE[0])
+    b = np.unpackbits(b).reshape(MASK_SIZE[1], MASK_SIZE[0])
+    differing = (np.count_nonzero(a & ~cv2.dilate(b, kernel) & 1) +
+                 np.count_nonzero(b & ~cv2.dilate(a, kernel) & 1))
+    return differing / max(1, np.count_nonzero(a | b))
+
+def hash_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of differing bits of two packed hashes"""
+    return np.unpackbits(np.bitwise_xor(a, b)).sum() / (len(a) * 8)
+
+class PageScreener:
+    """
+    Screens the pages of one document in page order. A page is blank, a
+    duplicate of an earlier page that is OCRed, or needs OCR itself.
+    """
+
+    def __init__(self, enabled: bool = PAGE_SCREENING):
+        self.enabled = enabled
+        self._ocred: List[Tuple[int, PageFingerprint]] = []
+        self.skipped: List[Dict[str, Any]] = []
+        self.duplicates: Dict[int, int] = {}
+
+    def screen(self, page_number: int, image: np.ndarray) -> Optional[Dict[str, Any]]:
+        """The skip record of the page, or None when it has to be OCRed"""
+        if not self.enabled:
+            return None
+        page = fingerprint(image)
+        if page.ink < BLANK_INK_RATIO:
+            return self._skip({"page_number": page_number, "reason": "blank"})
+        for original, other in self._ocred:
+            if abs(other.aspect - page.aspect) > 0.01 * other.aspect:
+                continue
+            if abs(other.ink - page.ink) > DUPLICATE_INK_TOLERANCE * other.ink:
+                continue
+            distance = hash_distance(other.hash, page.hash)
+            if distance > DUPLICATE_HASH_DISTANCE:
+                continue
+            # Confirm on the pixels before another page's result is reused
+            difference = ink_difference(other.mask, page.mask)
+            if difference <= DUPLICATE_PIXEL_DIFFERENCE:
+                self.duplicates[page_number] = original
+                return self._skip({
+                    "page_number": page_number,
+                    "reason": "duplicate",
+                    "duplicate_of": original,
+                    "distance": round(float(distance), 4),
+                    "ink_difference": round(float(difference), 4)
+                })
+        self._ocred.append((page_number, page))
+        return None
+
+    def _skip(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        self.skipped.append(record)
+        return record
+
+    def with_duplicates(self, pages: List[PageColumns]) -> List[PageColumns]:
+        """The OCRed pages plus a copy of the original's result for every duplicate page"""
+        by_number = {page.page_number: page for page in pages}
+        copies = []
+        for page_number, original_number in self.duplicates.items():
+            original = by_number[original_number]
+            copies.append(PageColumns(page_number, original.text, original.boxes, original.box_confidence,
+                                      original.entities, original.languages, 0.0, original.form))
+        return pages + copies
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Staged producer/consumer execution: each stage has its own bounded queue and
+worker tasks, so consecutive items overlap across stages
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Emit = Callable[[Any], Awaitable[None]]
+Handler = Callable[[Any, Emit], Awaitable[None]]
+
+class PipelineStage:
+    """
+    Worker tasks draining a bounded queue. The handler receives an item and
+    an emit callback that puts results on the next stage's queue; emitting
+    blocks while that queue is full, which is how backpressure propagates
+    upstream. An exception from the handler is passed to on_error with the
+    item (or logged when there is no on_error) and the item is dropped.
+    """
+
+    def __init__(self, name: str, handler: Handler, workers: int, queue_size: int,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.on_error = on_error
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.next: Optional["PipelineStage"] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._started_at: Optional[float] = None
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._started_at = time.perf_counter()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def put(self, item: Any):
+        await self._queue.put(item)
+
+    async def _emit(self, item: Any):
+        start = time.perf_counter()
+        await self.next.put(item)
+        self.blocked_seconds += time.perf_counter() - start
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            self.busy += 1
+            start = time.perf_counter()
+            try:
+                await self.handler(item, self._emit)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                if self.on_error is not None:
+                    self.on_error(item, e)
+                else:
+                    logger.exception(f"Pipeline stage {self.name} dropped an item: {e}")
+            finally:
+                self.busy -= 1
+                self.busy_seconds += time.perf_counter() - start
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        # Time spent waiting on a full downstream queue is not work
+        working = max(0.0, self.busy_seconds - self.blocked_seconds)
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self.queued,
+            "busy": self.busy,
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput_per_second": round(self.processed / uptime, 3) if uptime else 0.0,
+            "seconds_per_item": round(working / self.processed, 4) if self.processed else None,
+            "utilization": round(working / (uptime * self.workers), 3) if uptime else 0.0,
+            "blocked_seconds": round(self.blocked_seconds, 3)
+        }
+
+class Pipeline:
+    """Stages connected in order; items are put on the first stage"""
+
+    def __init__(self, stages: List[PipelineStage]):
+        self.stages = stages
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        logger.info("Pipeline started: " + " → ".join(f"{stage.name} ×{stage.workers}" for stage in self.stages))
+
+    async def stop(self):
+        for stage in self.stages:
+            await stage.stop()
+
+    async def put(self, item: Any):
+        await self.stages[0].put(item)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Single-pass OpenCV/numpy image preprocessing with selectable profiles
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from fastapi import HTTPException
+
+# Bump whenever a profile changes so cached OCR results are not reused
+PREPROCESSING_VERSION = "cv2-profiles-v3"
+
+PREPROCESSING_PROFILES: Dict[str, str] = {
+    "none": "No preprocessing",
+    "fast": "Contrast stretch only",
+    "standard": "Contrast, sharpen and light denoise in one LUT and one filter pass",
+    "heavy": "Greyscale, deskew, non-local-means denoise and adaptive binarization"
+}
+
+DEFAULT_PREPROCESSING_PROFILE = os.getenv("OCR_PREPROCESSING_PROFILE", "standard")
+
+# Thresholds of the clean-scan check that lets fast/standard skip enhancement:
+# nearly every pixel is near-black ink or near-white paper, and the paper
+# (median) and the ink (darkest percentile) are far apart
+CLEAN_SCAN_INK_MAX = 64
+CLEAN_SCAN_PAPER_MIN = 224
+CLEAN_SCAN_MIN_EXTREME_FRACTION = 0.9
+CLEAN_SCAN_INK_PERCENTILE = 1
+CLEAN_SCAN_MIN_INK_GAP = 160
+
+CONTRAST_FACTOR = 1.2
+SHARPNESS_FACTOR = 1.1
+BLUR_SIGMA = 0.5
+
+def _build_standard_kernel() -> np.ndarray:
+    """
+    Sharpness 1.1 (blend with PIL's SMOOTH kernel) followed by a sigma 0.5
+    Gaussian blur, folded into a single 5x5 kernel
+    """
+    smooth = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13.0
+    identity = np.zeros((3, 3), dtype=np.float32)
+    identity[1, 1] = 1.0
+    sharpen = SHARPNESS_FACTOR * identity + (1.0 - SHARPNESS_FACTOR) * smooth
+
+    gaussian_1d = cv2.getGaussianKernel(3, BLUR_SIGMA).astype(np.float32)
+    gaussian = gaussian_1d @ gaussian_1d.T
+
+    # Full 2D convolution of the two 3x3 kernels
+    kernel = np.zeros((5, 5), dtype=np.float32)
+    for dy in range(3):
+        for dx in range(3):
+            kernel[dy:dy + 3, dx:dx + 3] += sharpen[dy, dx] * gaussian
+    return kernel
+
+STANDARD_KERNEL = _build_standard_kernel()
+
+def resolve_profile(profile: Optional[str]) -> str:
+    """Validate a requested profile name, falling back to the configured default"""
+    profile = (profile or DEFAULT_PREPROCESSING_PROFILE).lower()
+    if profile not in PREPROCESSING_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown preprocessing profile '{profile}'. Use one of: {', '.join(PREPROCESSING_PROFILES)}"
+        )
+    return profile
+
+def _grey_sample(image: np.ndarray, step: int = 4) -> np.ndarray:
+    """Strided greyscale view for cheap image statistics"""
+    sample = image[::step, ::step]
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+    return sample
+
+def is_clean_scan(image: np.ndarray) -> bool:
+    """
+    High-contrast, mostly black-on-white pages gain nothing from enhancement.
+    Decided on how bimodal the page is rather than its standard deviation,
+    which stays low on clean pages because ink covers only a few percent.
+    """
+    sample = _grey_sample(image)
+    extreme = np.count_nonzero((sample < CLEAN_SCAN_INK_MAX) | (sample > CLEAN_SCAN_PAPER_MIN))
+    if extreme / sample.size < CLEAN_SCAN_MIN_EXTREME_FRACTION:
+        return False
+    ink, paper = np.percentile(sample, (CLEAN_SCAN_INK_PERCENTILE, 50))
+    return paper - ink >= CLEAN_SCAN_MIN_INK_GAP
+
+def _contrast_lut(mean: float, factor: float) -> np.ndarray:
+    """Lookup table equivalent to PIL ImageEnhance.Contrast"""
+    values = mean + factor * (np.arange(256, dtype=np.float32) - mean)
+    return np.clip(values + 0.5, 0, 255).astype(np.uint8)
+
+def _apply_contrast(image: np.ndarray, factor: float) -> np.ndarray:
+    lut = _contrast_lut(float(_grey_sample(image).mean()), factor)
+    return cv2.LUT(image, lut, dst=image)
+
+def _deskew(grey: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Rotate so that text lines are horizontal, estimated from ink pixels.
+    Also returns the 2x3 affine that maps points of the rotated image back
+    onto the input (None when the page was not rotated).
+    """
+    _, ink = cv2.threshold(grey, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(ink)
+    if coords is None or len(coords) < 50:
+        return grey, None
+    angle = cv2.minAreaRect(coords)[-1]
+    # minAreaRect reports angles in [0, 90); map to the smallest correction
+    if angle > 45:
+        angle -= 90
+    if abs(angle) < 0.5:
+        return grey, None
+    height, width = grey.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    rotated = cv2.warpAffine(grey, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_REPLICATE)
+    return rotated, cv2.invertAffineTransform(matrix)
+
+def preprocess_page(image: np.ndarray,
+                    profile: str = DEFAULT_PREPROCESSING_PROFILE) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Enhance a BGR (or greyscale) page for OCR using the given profile. The
+    fast and standard profiles work in place on the input array. The heavy
+    profile deskews the page, so the 2x3 affine that maps its coordinates
+    back onto the input is returned too (None when nothing was rotated).
+    """
+    if profile == "none":
+        return image, None
+
+    if profile == "heavy":
+        grey = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        grey, unrotate = _deskew(grey)
+        grey = cv2.fastNlMeansDenoising(grey, h=10)
+        return cv2.adaptiveThreshold(grey, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, 31, 15), unrotate
+
+    if is_clean_scan(image):
+        return image, None
+
+    image = _apply_contrast(image, CONTRAST_FACTOR)
+    if profile == "standard":
+        cv2.filter2D(image, -1, STANDARD_KERNEL, dst=image, borderType=cv2.BORDER_REPLICATE)
+    return image, None
+
+def preprocess_image(image: np.ndarray, profile: str = DEFAULT_PREPROCESSING_PROFILE) -> np.ndarray:
+    """The enhanced page of preprocess_page, for callers that do not map boxes back"""
+    return preprocess_page(image, profile)[0]
+
+def enhance_crop(crop: np.ndarray, upscale: float = 2.0) -> np.ndarray:
+    """
+    Heavy enhancement for a small crop around a weakly recognized word:
+    greyscale, upscale, non-local-means denoise and adaptive binarization
+    """
+    grey = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    if upscale != 1.0:
+        grey = cv2.resize(grey, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC)
+    grey = cv2.fastNlMeansDenoising(grey, h=10)
+    return cv2.adaptiveThreshold(grey, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
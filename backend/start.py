@@ -6,6 +6,7 @@ FRA Atlas OCR & NER Service Startup Script
 import uvicorn
 import sys
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Add the backend directory to Python path
@@ -14,33 +15,19 @@ sys.path.insert(0, str(backend_dir))
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    missing_deps = []
-    
-    try:
-        import easyocr
-    except ImportError:
-        missing_deps.append("easyocr")
-    
-    try:
-        import spacy
-    except ImportError:
-        missing_deps.append("spacy")
-    
-    try:
-        import cv2
-    except ImportError:
-        missing_deps.append("opencv-python")
-    
-    try:
-        import PIL
-    except ImportError:
-        missing_deps.append("Pillow")
+    # find_spec locates packages without importing them, so torch and spaCy
+    # are not loaded before the server has even started
+    required = {
+        "easyocr": "easyocr",
+        "spacy": "spacy",
+        "cv2": "opencv-python",
+        "PIL": "Pillow"
+    }
+    missing_deps = [package for module, package in required.items() if find_spec(module) is None]
     
     # Check optional dependencies
     optional_missing = []
-    try:
-        import fitz
-    except ImportError:
+    if find_spec("fitz") is None:
         optional_missing.append("PyMuPDF (PDF support)")
     
     if missing_deps:
@@ -84,7 +71,8 @@ def main():
             "ocr:app",
             host="0.0.0.0",
             port=8000,
-            reload=True,
+            # Models load in the background, but each reload still pays for them
+            reload=os.getenv("FASTAPI_ENV", "development") == "development",
             log_level="info",
             access_log=True
         )
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-pass adaptive resolution mode
+"""
+
+import hashlib
+
+import fitz
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from adaptive_resolution import AdaptiveRefiner, merge_regions, resolve_resolution
+from document_pages import DocumentPages
+from uploads import SpooledUpload
+
+def quad(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+def low_zoom_document() -> DocumentPages:
+    """A one-page 200x100 point PDF rendered at zoom 1 (the standard zoom is 2)"""
+    document = fitz.open()
+    document.new_page(width=200, height=100)
+    data = document.tobytes()
+    upload = SpooledUpload("claim.pdf", "application/pdf", len(data), hashlib.sha256(data).hexdigest(), data=data)
+    pages = DocumentPages(upload, text_layer=False, zoom=1.0)
+    list(pages)
+    return pages
+
+def test_padded_regions_that_overlap_are_merged_and_clipped():
+    regions = merge_regions([(10, 10, 20, 20), (24, 10, 30, 20), (150, 80, 199, 98)], 3.0, 200, 100)
+    assert regions == [(7.0, 7.0, 33.0, 23.0), (147.0, 77.0, 200, 100)]
+
+def test_unknown_resolution_mode_is_rejected():
+    assert resolve_resolution("ADAPTIVE") == "adaptive"
+    with pytest.raises(HTTPException) as error:
+        resolve_resolution("ultra")
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("refined_confidence, expected", [
+    (0.9, [("Ramgarh", 0.9), ("Village", 0.95)]),
+    (0.2, [("Village", 0.95), ("Rarngarh", 0.3)])
+])
+def test_weak_word_is_replaced_only_by_a_more_confident_reading(refined_confidence, expected):
+    pages = low_zoom_document()
+    regions = []
+
+    def recognize(image):
+        regions.append(image.shape[:2])
+        # The weak word, read from the high-zoom render of its padded region
+        return [(quad(18, 18, 78, 48), "Ramgarh", refined_confidence)], "latin"
+
+    refiner = AdaptiveRefiner(pages, recognize, high_zoom=3.0, refine_confidence=0.5)
+    results = [(quad(20, 40, 80, 60), "Village", 0.95), (quad(100, 40, 140, 60), "Rarngarh", 0.3)]
+    refined = refiner.refine(1, results)
+    pages.close()
+
+    # Only the weak word's region (padded by 6 points) is rendered, at zoom 3
+    assert regions == [(66, 96)]
+    assert sorted((text, confidence) for _, text, confidence in refined) == sorted(expected)
+    if refined_confidence > 0.3:
+        bbox, = [bbox for bbox, text, _ in refined if text == "Ramgarh"]
+        assert np.allclose(bbox[0], [100, 40])
+    assert refiner.report()["refined_regions"] == 1
+
+def test_confident_page_is_not_refined():
+    pages = low_zoom_document()
+    refiner = AdaptiveRefiner(pages, lambda image: pytest.fail("nothing should be re-read"))
+    results = [(quad(20, 40, 80, 60), "Village", 0.95)]
+    assert refiner.refine(1, results) == results
+    report = refiner.report()
+    pages.close()
+    assert report["megapixels"] < report["standard_megapixels"]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control: FIFO slots, 429 shedding and profile downgrade
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController
+
+def test_requests_beyond_the_queue_get_429_with_retry_after():
+    async def main():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, latency_budget=60)
+        first = await controller.enter("extract_text")
+        queued = asyncio.ensure_future(controller.enter("extract_text"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await controller.enter("extract_text")
+        first.release()
+        (await queued).release()
+        return controller, error.value
+
+    controller, error = asyncio.run(main())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert (controller.rejected, controller.in_flight, controller.queued) == (1, 0, 0)
+
+def test_slots_are_granted_in_fifo_order_by_weight():
+    async def main():
+        controller = AdmissionController(max_in_flight=2, max_queue=4, latency_budget=60)
+        single = await controller.enter("extract_text")
+        order = []
+
+        async def wait(name, weight):
+            admission = await controller.enter(name, weight)
+            order.append(name)
+            return admission
+
+        batch = asyncio.ensure_future(wait("batch", 2))
+        late = asyncio.ensure_future(wait("late", 1))
+        await asyncio.sleep(0)
+        # A free slot is not handed to the later single request ahead of the batch
+        waiting = (controller.in_flight, controller.queued)
+        single.release()
+        (await batch).release()
+        (await late).release()
+        return waiting, order
+
+    waiting, order = asyncio.run(main())
+    assert waiting == (1, 2)
+    assert order == ["batch", "late"]
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, latency_budget=60)
+        first = await controller.enter("extract_text")
+        waiter = asyncio.ensure_future(controller.enter("extract_text"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        first.release()
+        return controller
+
+    controller = asyncio.run(main())
+    assert (controller.in_flight, controller.queued) == (0, 0)
+
+def test_slow_queue_downgrades_expensive_profiles_only():
+    async def main():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, latency_budget=0.01)
+        first = await controller.enter("extract_text")
+        waiter = asyncio.ensure_future(controller.enter("extract_text"))
+        await asyncio.sleep(0.05)
+        first.release()
+        return await waiter
+
+    admission = asyncio.run(main())
+    assert admission.degraded
+    assert admission.profile("fast") == "fast"
+    assert not admission.downgraded
+    assert admission.profile("heavy") == "fast"
+    assert admission.downgraded
+
+def test_release_is_idempotent():
+    async def main():
+        controller = AdmissionController(max_in_flight=2, max_queue=0, latency_budget=60)
+        admission = await controller.enter("extract_text")
+        admission.release()
+        admission.release()
+        return controller.in_flight
+
+    assert asyncio.run(main()) == 0
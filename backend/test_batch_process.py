@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the streamed records of /ocr/batch-process
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+import ocr
+from admission import admission_controller
+
+class FakeResult:
+    def __init__(self, filename):
+        self.filename = filename
+
+    def encode(self, response_format):
+        return {"extracted_text": self.filename}
+
+def run_batch(monkeypatch, delays, failures=()):
+    async def fake_ocr_upload(file, **kwargs):
+        await asyncio.sleep(delays[file.filename])
+        if file.filename in failures:
+            raise HTTPException(status_code=413, detail="Upload exceeds the limit of 50 MB")
+        return FakeResult(file.filename)
+
+    monkeypatch.setattr(ocr, "ocr_upload", fake_ocr_upload)
+    files = [SimpleNamespace(filename=name) for name in delays]
+
+    async def main():
+        response = await ocr.batch_process_documents(files=files, batch_id="batch-1", profile=None,
+                                                     resolution=None, accept=None)
+        return [json.loads(line) async for line in response.body_iterator]
+
+    return asyncio.run(main())
+
+def test_records_stream_in_completion_order_then_summary(monkeypatch):
+    records = run_batch(monkeypatch, {"slow.pdf": 0.05, "fast.pdf": 0.0})
+    assert [record["filename"] for record in records[:2]] == ["fast.pdf", "slow.pdf"]
+    assert [record["index"] for record in records[:2]] == [1, 0]
+    assert records[2] == {"type": "summary", "batch_id": "batch-1", "processed_count": 2, "failed_count": 0}
+
+def test_failed_document_streams_its_status_and_detail(monkeypatch):
+    records = run_batch(monkeypatch, {"claim.pdf": 0.0, "huge.pdf": 0.0}, failures={"huge.pdf"})
+    error, = [record for record in records if record["type"] == "error"]
+    assert error == {"type": "error", "index": 1, "filename": "huge.pdf", "status": 413,
+                     "error": "Upload exceeds the limit of 50 MB"}
+    assert records[-1]["processed_count"] == 1
+    assert records[-1]["failed_count"] == 1
+
+def test_admission_slots_are_released_after_the_stream(monkeypatch):
+    run_batch(monkeypatch, {"a.pdf": 0.0, "b.pdf": 0.0, "c.pdf": 0.0})
+    assert admission_controller.in_flight == 0
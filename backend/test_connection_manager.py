@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for WebSocket fan-out: per-document channels, coalescing of progress
+updates and eviction of slow connections
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from connection_manager import ConnectionManager, WS_EVICTION_CODE
+
+class FakeWebSocket:
+    def __init__(self, send_delay=0.0):
+        self.send_delay = send_delay
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+def status(document_id, progress):
+    return SimpleNamespace(dict=lambda: {"document_id": document_id, "progress": progress})
+
+def test_updates_only_reach_subscribers_of_the_document():
+    async def main():
+        manager = ConnectionManager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, "document-1")
+        await manager.connect(second, "document-2")
+        await manager.send_status_update("document-1", status("document-1", 50))
+        await manager.send_status_update("document-3", status("document-3", 50))
+        await asyncio.sleep(0.01)
+        return first.sent, second.sent
+
+    first, second = asyncio.run(main())
+    assert [message["data"]["progress"] for message in first] == [50]
+    assert second == []
+
+def test_queued_progress_of_a_slow_client_is_coalesced():
+    async def main():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket(send_delay=0.05)
+        await manager.connect(websocket, "document-1")
+        for progress in (10, 20, 30, 40):
+            await manager.send_status_update("document-1", status("document-1", progress))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.2)
+        return manager, websocket.sent
+
+    manager, sent = asyncio.run(main())
+    # The first update was already being sent; the others collapse into the latest
+    assert [message["data"]["progress"] for message in sent] == [10, 40]
+    assert manager.coalesced == 2
+
+def test_client_with_too_many_unsent_messages_is_evicted():
+    async def main():
+        manager = ConnectionManager(max_pending=2)
+        websocket = FakeWebSocket(send_delay=1.0)
+        await manager.connect(websocket, "document-1")
+        for page_number in range(1, 5):
+            await manager.send_page_result("document-1", SimpleNamespace(to_dict=lambda: {"page_number": page_number}))
+        await asyncio.sleep(0.01)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(main())
+    assert manager.evicted == 1
+    assert manager.stats()["connections"] == 0
+    assert websocket.closed_with == WS_EVICTION_CODE
+
+def test_clients_can_follow_more_documents_on_one_connection():
+    async def main():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        subscriber = await manager.connect(websocket, "batch-1")
+        manager.handle_client_message(subscriber, json.dumps({"action": "subscribe", "document_id": "document-1"}))
+        manager.handle_client_message(subscriber, "ping")
+        await manager.send_status_update("document-1", status("document-1", 70))
+        manager.handle_client_message(subscriber, json.dumps({"action": "unsubscribe", "document_id": "document-1"}))
+        await manager.send_status_update("document-1", status("document-1", 80))
+        await asyncio.sleep(0.01)
+        return websocket.sent
+
+    sent = asyncio.run(main())
+    assert [message["data"]["progress"] for message in sent] == [70]
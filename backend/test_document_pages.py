@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for lazy decoding of uploaded images and PDF pages
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from document_pages import DocumentPages, page_zoom, PDF_ZOOM
+from uploads import SpooledUpload, MAX_IMAGE_PIXELS
+
+def upload(data: bytes, content_type: str) -> SpooledUpload:
+    return SpooledUpload("page", content_type, len(data), hashlib.sha256(data).hexdigest(), data=data)
+
+def pdf_bytes(pages: int, text: str = "") -> bytes:
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page(width=200, height=100)
+        page.draw_rect(fitz.Rect(0, 0, 100, 100), color=(1, 0, 0), fill=(1, 0, 0))
+        if text:
+            page.insert_text((20, 60), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+def test_image_is_decoded_to_bgr():
+    image = np.zeros((40, 60, 3), dtype=np.uint8)
+    image[:, :, 2] = 255
+    _, encoded = cv2.imencode(".png", image)
+    pages = list(DocumentPages(upload(encoded.tobytes(), "image/png")))
+    assert len(pages) == 1
+    page_number, decoded = pages[0]
+    assert page_number == 1
+    assert np.array_equal(decoded, image)
+
+def test_corrupt_image_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        list(DocumentPages(upload(b"not an image", "image/png")))
+    assert error.value.status_code == 400
+
+def test_pdf_pages_are_rendered_one_by_one_in_bgr():
+    document = DocumentPages(upload(pdf_bytes(2), "application/pdf"), text_layer=False)
+    try:
+        assert document.page_count == 2
+        for page_number, image in document:
+            assert image.shape == (int(100 * PDF_ZOOM), int(200 * PDF_ZOOM), 3)
+            # The left half is filled red, which is (0, 0, 255) in BGR
+            assert tuple(image[10, 10]) == (0, 0, 255)
+            assert document.rendered[page_number].zoom == PDF_ZOOM
+    finally:
+        document.close()
+
+def test_corrupt_pdf_upload_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        DocumentPages(upload(b"%PDF-1.4 broken", "application/pdf"))
+    assert error.value.status_code == 400
+
+def test_zoom_is_reduced_for_oversized_pages():
+    small = SimpleNamespace(rect=SimpleNamespace(width=595, height=842))
+    assert page_zoom(small) == PDF_ZOOM
+    huge = SimpleNamespace(rect=SimpleNamespace(width=20000, height=20000))
+    zoom = page_zoom(huge)
+    assert zoom < PDF_ZOOM
+    assert (20000 * zoom) ** 2 <= MAX_IMAGE_PIXELS * 1.0001
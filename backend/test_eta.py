@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the measured ETA model of progress updates
+"""
+
+import pytest
+
+import ocr
+from eta import ETAModel, to_seconds
+
+def test_first_observation_replaces_the_default():
+    model = ETAModel(alpha=0.5, defaults={"ocr_page": 4.0})
+    model.observe("ocr_page", 3.0, units=2.0)
+    assert model.rate("ocr_page") == 1.5
+
+def test_later_observations_are_averaged():
+    model = ETAModel(alpha=0.5, defaults={})
+    model.observe("ner", 1.0)
+    model.observe("ner", 3.0)
+    assert model.rate("ner") == 2.0
+    assert model.stats()["ner"]["observations"] == 2
+
+def test_empty_or_negative_observations_are_ignored():
+    model = ETAModel(defaults={"render": 0.3})
+    model.observe("render", 1.0, units=0)
+    model.observe("render", -1.0)
+    assert model.rate("render") == 0.3
+
+@pytest.mark.parametrize("estimate, seconds", [(0.2, 1), (2.0, 2), (-3.0, 0)])
+def test_estimates_are_rounded_up_to_whole_seconds(estimate, seconds):
+    assert to_seconds(estimate) == seconds
+
+def test_remaining_pages_are_spread_over_the_ocr_workers(monkeypatch):
+    monkeypatch.setattr(ocr, "eta_model", ETAModel(defaults={"render": 0.5, "ocr_page": 1.0, "ner": 0.1}))
+    monkeypatch.setattr(ocr.ocr_executor, "max_workers", 2)
+    # Three pages of 2 megapixels on two workers take two rounds
+    assert ocr.estimate_pages_seconds(3, 2.0) == pytest.approx(2 * (0.5 + 2.0) + 0.3)
+    assert ocr.estimate_pages_seconds(0, 2.0) == 0.0
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for recognising FRA claim forms and reading their fields
+"""
+
+import cv2
+import numpy as np
+
+from form_templates import (classify, content_box, field_values, form_templates, match_form, region_box,
+                            FormField)
+
+# A4 at 2x zoom with the printed content framed 100 pixels inside the page
+PAGE_SHAPE = (1684, 1190)
+FRAME = (100, 100, 1090, 1584)
+
+def form_page() -> np.ndarray:
+    page = np.full(PAGE_SHAPE + (3,), 255, dtype=np.uint8)
+    cv2.rectangle(page, FRAME[:2], FRAME[2:], (0, 0, 0), 3)
+    return page
+
+def word_at(region, text, confidence=0.9):
+    """An EasyOCR result centred in a region of the framed content"""
+    x0, y0, x1, y1 = region_box(region, FRAME)
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    return ([[cx - 40, cy - 10], [cx + 40, cy - 10], [cx + 40, cy + 10], [cx - 40, cy + 10]], text, confidence)
+
+HEADER = word_at((0.0, 0.0, 1.0, 0.14), "FORM - A Claim Form for Rights to Forest Land")
+
+def test_header_keywords_pick_the_form():
+    assert classify("FORM - A  CLAIM FORM FOR RIGHTS TO FOREST LAND").name == "form_a"
+    assert classify("Form C claim form for rights to community forest resource").name == "form_c"
+    # One keyword is not enough, and a header matching two forms equally is neither
+    assert classify("Claim form") is None
+    assert classify("Claim form Form A Form B") is None
+
+def test_page_is_aligned_on_its_printed_content():
+    # Within the sampling stride (4 pixels) beyond the frame's line width
+    x0, y0, x1, y1 = content_box(form_page())
+    assert abs(x0 - FRAME[0]) <= 8 and abs(y0 - FRAME[1]) <= 8
+    assert abs(x1 - FRAME[2]) <= 8 and abs(y1 - FRAME[3]) <= 8
+
+def test_label_words_are_stripped_from_field_values():
+    field = FormField("village", "Village", (0.42, 0.31, 0.99, 0.35))
+    results = [(None, "Village: Ramgarh", 0.9), (None, "Village", 0.8), (None, ":", 0.5)]
+    assert field_values(field, results) == [(None, "Ramgarh", 0.9)]
+
+def test_filled_form_is_read_field_by_field():
+    template = form_templates["form_a"]
+    values = {field.name: f"value of {field.name}" for field in template.fields}
+    results = [HEADER] + [word_at(field.region, values[field.name]) for field in template.fields]
+    form = match_form(form_page(), results)
+    assert form["form_type"] == "form_a"
+    assert {name: field["value"] for name, field in form["fields"].items()} == values
+
+def test_form_with_only_printed_labels_is_not_read_as_filled():
+    template = form_templates["form_a"]
+    results = [HEADER] + [word_at(field.region, field.label) for field in template.fields]
+    assert match_form(form_page(), results) is None
+
+def test_page_without_a_form_header_is_not_a_form():
+    results = [word_at((0.0, 0.0, 1.0, 0.14), "Gram Sabha resolution")]
+    assert match_form(form_page(), results) is None
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Tests for the FRA entity extractor's location pattern
+"""
+
+import pytest
+
+from fra_entities import fra_entity_engine
+
+def locations(text):
+    return [(match.type, match.normalized["name"]) for match in fra_entity_engine.extract(text)
+            if match.type in ("VILLAGE", "DISTRICT", "TEHSIL", "BLOCK", "PANCHAYAT")]
+
+@pytest.mark.parametrize("text, expected", [
+    ("Village Ramgarh", [("VILLAGE", "Ramgarh")]),
+    ("Ramgarh village", [("VILLAGE", "Ramgarh")]),
+    ("the village of Ramgarh", [("VILLAGE", "Ramgarh")]),
+    ("Village Panchayat Ramgarh", [("PANCHAYAT", "Ramgarh")]),
+    ("Gram Panchayat Ramgarh", [("PANCHAYAT", "Ramgarh")]),
+    ("Gram Sabha Ramgarh resolution", [("VILLAGE", "Ramgarh")]),
+    ("Village Ramgarh and district Bastar", [("VILLAGE", "Ramgarh"), ("DISTRICT", "Bastar")]),
+    ("Village: Ramgarh, Tehsil Kondagaon", [("VILLAGE", "Ramgarh"), ("TEHSIL", "Kondagaon")]),
+    ("land in village Ramgarh dated 12/03/2023", [("VILLAGE", "Ramgarh")]),
+    ("residing in the same village", [])
+])
+def test_location_names(text, expected):
+    assert locations(text) == expected
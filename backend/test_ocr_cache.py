@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the OCR result cache: coalescing of concurrent requests and the
+size cap of the disk tier
+"""
+
+import asyncio
+import os
+
+from ocr_cache import OCRResultCache
+
+def test_concurrent_requests_share_one_computation(tmp_path):
+    cache = OCRResultCache(cache_dir=str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"text": "Village Ramgarh"}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"text": "Village Ramgarh"}] * 3
+    assert sorted(hit for _, hit in results) == [False, True, True]
+    assert cache.coalesced == 2
+
+def test_waiter_computes_when_owner_is_cancelled(tmp_path):
+    cache = OCRResultCache(cache_dir=str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"text": "Survey No. 104/4"}
+
+    async def main():
+        owner = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await waiter
+
+    value, hit = asyncio.run(main())
+    assert value == {"text": "Survey No. 104/4"}
+    assert not hit
+    assert len(calls) == 2
+
+def test_disk_hit_after_memory_eviction(tmp_path):
+    cache = OCRResultCache(max_bytes=0, cache_dir=str(tmp_path))
+
+    async def compute():
+        return {"text": "Ramgarh"}
+
+    asyncio.run(cache.get_or_compute("key", compute))
+    value, hit = asyncio.run(cache.get_or_compute("key", compute))
+    assert value == {"text": "Ramgarh"} and hit
+    assert cache.disk_hits == 1
+
+def test_disk_tier_prunes_least_recently_used_entries(tmp_path):
+    payload = {"text": "x" * 100}
+    entry_size = len('{"text": "' + "x" * 100 + '"}')
+    cache = OCRResultCache(max_bytes=0, cache_dir=str(tmp_path), disk_max_bytes=2 * entry_size)
+
+    async def compute():
+        return payload
+
+    async def main():
+        await cache.get_or_compute("aa-first", compute)
+        await cache.get_or_compute("bb-second", compute)
+        # Reading the first entry makes the second the least recently used
+        await cache.get_or_compute("aa-first", compute)
+        await cache.get_or_compute("cc-third", compute)
+
+    asyncio.run(main())
+    assert os.path.exists(cache._disk_path("aa-first"))
+    assert not os.path.exists(cache._disk_path("bb-second"))
+    assert os.path.exists(cache._disk_path("cc-third"))
+    assert cache.stats()["disk_bytes"] == 2 * entry_size
+    assert cache.disk_evictions == 1
+
+def test_disk_tier_size_is_scanned_after_restart(tmp_path):
+    async def compute():
+        return {"text": "x" * 100}
+
+    asyncio.run(OCRResultCache(max_bytes=0, cache_dir=str(tmp_path)).get_or_compute("aa-first", compute))
+    restarted = OCRResultCache(max_bytes=0, cache_dir=str(tmp_path), disk_max_bytes=150)
+    asyncio.run(restarted.get_or_compute("bb-second", compute))
+    assert not os.path.exists(restarted._disk_path("aa-first"))
+    assert os.path.exists(restarted._disk_path("bb-second"))
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-backed OCR results and their response formats
+"""
+
+import numpy as np
+import pytest
+
+from ocr_columns import DocumentColumns, EntityTable, PageColumns, negotiate_format, quads_to_boxes
+
+def page(page_number, text, entities):
+    boxes = quads_to_boxes([[[10, 20], [110, 20], [110, 40], [10, 40]]])
+    return PageColumns(page_number, text, boxes, np.array([0.9]), EntityTable.from_rows(entities), ["en"], 0.1)
+
+def test_quads_become_x_y_width_height():
+    boxes = quads_to_boxes([[[10, 20], [110, 22], [108, 40], [12, 41]]])
+    assert boxes.tolist() == [[10, 20, 100, 21]]
+    assert quads_to_boxes([]).shape == (0, 4)
+
+def test_pages_are_merged_in_page_order_with_shifted_entity_spans():
+    first = page(1, "Village Ramgarh", [("VILLAGE", "Ramgarh", 0.9, 8, 15)])
+    second = page(2, "Area 2.5 hectares", [("AREA", "2.5 hectares", 0.8, 5, 17)])
+    columns = DocumentColumns.from_pages([second, first], "en")
+    assert columns.text == "Village Ramgarh\n\nArea 2.5 hectares"
+    assert columns.box_pages.tolist() == [1, 2]
+    for entity in columns.entity_dicts():
+        assert columns.text[entity["start_index"]:entity["end_index"]] == entity["value"]
+
+def test_state_round_trip_is_lossless():
+    columns = DocumentColumns.from_pages(
+        [page(1, "Survey No. 104/4", [("SURVEY_NUMBER", "104/4", 0.123456789, 11, 16, {"number": "104/4"})])],
+        "en", skipped_pages=[{"page_number": 2, "reason": "blank"}]
+    )
+    restored = DocumentColumns.from_state(columns.to_state())
+    assert restored.to_state() == columns.to_state()
+    assert restored.entities.confidence[0] == 0.123456789
+
+def test_columnar_encoding_rounds_values():
+    columns = DocumentColumns.from_pages([page(1, "Ramgarh", [("VILLAGE", "Ramgarh", 0.123456789, 0, 7)])], "en")
+    encoded = columns.to_columns()
+    assert encoded["bounding_boxes"]["x"] == [10.0]
+    assert encoded["entities"]["confidence"] == [0.1235]
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "json"),
+    ("application/vnd.fra-atlas.ocr-columnar+json", "columnar"),
+    ("application/json;q=0.5, application/x-msgpack", "msgpack"),
+    ("application/x-msgpack;q=0, application/json", "json"),
+    ("text/html", "json")
+])
+def test_response_format_is_negotiated_by_quality(accept, expected):
+    assert negotiate_format(accept) == expected
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for retries and restarts of the persistent OCR job queue
+"""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from ocr_jobs import OCRJobQueue, OCRJobStore
+from uploads import SpooledUpload
+
+@pytest.fixture
+def store(tmp_path):
+    store = OCRJobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "payloads"))
+    store.open()
+    yield store
+    store.close()
+
+def submit(store, max_attempts=3):
+    data = b"%PDF-1.4 claim"
+    upload = SpooledUpload("claim.pdf", "application/pdf", len(data), hashlib.sha256(data).hexdigest(), data=data)
+    return store.create(upload, "document-1", {"preprocessing": "standard"}, max_attempts)
+
+def payload_exists(store, job):
+    return os.path.exists(os.path.join(store.payload_dir, job["id"]))
+
+def test_failed_attempts_are_retried_with_a_growing_delay_until_exhausted(store):
+    job = submit(store, max_attempts=2)
+    assert store.claim_next()["id"] == job["id"]
+    assert store.fail(job["id"], "EasyOCR crashed", retry_delay=60) == "queued"
+    # Not runnable again before its delay has passed
+    assert store.claim_next() is None
+    store._conn.execute("UPDATE ocr_jobs SET available_at = 0")
+    assert store.claim_next()["attempts"] == 2
+    assert store.fail(job["id"], "EasyOCR crashed", retry_delay=60) == "failed"
+    assert store.get(job["id"])["status"] == "failed"
+    assert not payload_exists(store, job)
+
+def test_non_retryable_failure_fails_at_once(store):
+    job = submit(store)
+    store.claim_next()
+    assert store.fail(job["id"], "Upload exceeds the limit of 50 MB", retry_delay=0, retryable=False) == "failed"
+    assert store.get(job["id"])["attempts"] == 1
+
+def test_interrupted_jobs_are_requeued_unless_on_their_last_attempt(store):
+    resumable = submit(store, max_attempts=3)
+    exhausted = submit(store, max_attempts=1)
+    store.claim_next()
+    store.claim_next()
+    assert store.requeue_interrupted() == (1, 1)
+    assert store.get(resumable["id"])["status"] == "queued"
+    assert store.get(exhausted["id"])["status"] == "failed"
+    assert payload_exists(store, resumable)
+    assert not payload_exists(store, exhausted)
+
+@pytest.mark.parametrize("error, status", [
+    (HTTPException(status_code=413, detail="Upload exceeds the limit of 50 MB"), "failed"),
+    (RuntimeError("CUDA out of memory"), "queued")
+])
+def test_only_server_errors_are_retried(store, error, status):
+    async def process(job, upload):
+        raise error
+
+    failures = []
+
+    async def on_failure(job, message, job_status):
+        failures.append((message, job_status))
+
+    queue = OCRJobQueue(store, workers=1, max_attempts=3, timeout=5, retry_delay=0)
+    queue._process = process
+    queue._on_failure = on_failure
+    job = submit(store)
+    asyncio.run(queue._run(store.claim_next()))
+    assert store.get(job["id"])["status"] == status
+    assert failures == [(str(getattr(error, "detail", error)), status)]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for script detection of the EasyOCR reader pool
+"""
+
+import numpy as np
+
+from ocr_readers import ReaderPool, script_share, SCRIPT_SAMPLE_BOXES
+
+class FakeReader:
+    """Recognizer returning the same reading for every sampled box"""
+
+    def __init__(self, text, confidence):
+        self.text = text
+        self.confidence = confidence
+        self.samples = None
+
+    def recognize(self, grey, horizontal_list, free_list, reformat=False):
+        self.samples = horizontal_list
+        return [(None, self.text, self.confidence) for _ in horizontal_list]
+
+def pool_with(**readers):
+    pool = ReaderPool(gpu=False)
+    pool._readers.update(readers)
+    return pool
+
+GREY = np.zeros((10, 10), dtype=np.uint8)
+BOXES = [[0, 100, 0, 20], [0, 50, 0, 20]]
+
+def test_script_share_ignores_spaces():
+    assert script_share("ग्राम Ramgarh", "devanagari") == 5 / 12
+    assert script_share("   ", "devanagari") == 0.0
+
+def test_confident_latin_sample_stays_latin():
+    pool = pool_with(latin=FakeReader("Village Ramgarh", 0.9))
+    assert pool.detect_script(GREY, BOXES) == "latin"
+
+def test_page_is_routed_to_the_dominant_indic_script():
+    pool = pool_with(
+        latin=FakeReader("Gram", 0.2),
+        devanagari=FakeReader("ग्राम सभा", 0.8),
+        bengali=FakeReader("Gram", 0.3),
+        tamil=FakeReader("Gram", 0.3),
+        telugu=FakeReader("గ్రామ", 0.2)
+    )
+    assert pool.detect_script(GREY, BOXES) == "devanagari"
+
+def test_weak_indic_readings_fall_back_to_latin():
+    pool = pool_with(
+        latin=FakeReader("Gram", 0.2),
+        devanagari=FakeReader("ग्राम", 0.1),
+        bengali=FakeReader("Gram", 0.3),
+        tamil=FakeReader("Gram", 0.3),
+        telugu=FakeReader("Gram", 0.3)
+    )
+    assert pool.detect_script(GREY, BOXES) == "latin"
+
+def test_script_sample_takes_the_largest_boxes():
+    latin = FakeReader("Village", 0.9)
+    boxes = [[0, width, 0, 20] for width in range(1, SCRIPT_SAMPLE_BOXES + 3)]
+    pool_with(latin=latin).detect_script(GREY, boxes)
+    assert len(latin.samples) == SCRIPT_SAMPLE_BOXES
+    assert min(box[1] for box in latin.samples) == 3
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for blank and duplicate page screening
+"""
+
+import cv2
+import numpy as np
+
+from ocr_columns import EntityTable, PageColumns
+from page_screening import PageScreener
+
+# A4 rendered at 2x zoom
+SHAPE = (1684, 1190)
+
+def form_page(claimant: str, lines: int = 30) -> np.ndarray:
+    """A printed claim form filled in with the claimant's name"""
+    page = np.full(SHAPE + (3,), 255, dtype=np.uint8)
+    for line in range(lines):
+        cv2.putText(page, f"{line + 1}. Survey No. {100 + line}/4  Village Ramgarh  Area 2.{line} ha",
+                    (80, 120 + line * 48), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    cv2.putText(page, f"Name of claimant: {claimant}", (80, 1600), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return page
+
+def test_blank_page_is_skipped():
+    screener = PageScreener(enabled=True)
+    blank = np.full(SHAPE + (3,), 250, dtype=np.uint8)
+    assert screener.screen(1, blank) == {"page_number": 1, "reason": "blank"}
+
+def test_repeated_page_reuses_the_original():
+    screener = PageScreener(enabled=True)
+    assert screener.screen(1, form_page("Sita Devi")) is None
+    assert screener.screen(2, form_page("Ram Prasad Netam")) is None
+    record = screener.screen(3, form_page("Sita Devi"))
+    assert record["reason"] == "duplicate"
+    assert record["duplicate_of"] == 1
+    assert screener.duplicates == {3: 1}
+
+def test_same_form_of_another_claimant_is_ocred():
+    screener = PageScreener(enabled=True)
+    assert screener.screen(1, form_page("Sita Devi")) is None
+    assert screener.screen(2, form_page("Ram Prasad Netam")) is None
+
+def test_different_pages_are_ocred():
+    screener = PageScreener(enabled=True)
+    assert screener.screen(1, form_page("Sita Devi", lines=30)) is None
+    assert screener.screen(2, form_page("Sita Devi", lines=12)) is None
+
+def test_disabled_screener_ocrs_everything():
+    blank = np.full(SHAPE + (3,), 250, dtype=np.uint8)
+    assert PageScreener(enabled=False).screen(1, blank) is None
+
+def test_duplicate_pages_get_a_copy_of_the_original_result():
+    screener = PageScreener(enabled=True)
+    page = form_page("Sita Devi")
+    screener.screen(1, page)
+    screener.screen(2, page.copy())
+    original = PageColumns(1, "Village Ramgarh", np.zeros((0, 4)), np.zeros(0), EntityTable.from_rows([]), ["en"], 1.5)
+    pages = screener.with_duplicates([original])
+    assert [(page.page_number, page.text, page.processing_time) for page in pages] == [
+        (1, "Village Ramgarh", 1.5), (2, "Village Ramgarh", 0.0)
+    ]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the staged producer/consumer pipeline
+"""
+
+import asyncio
+
+from pipeline import Pipeline, PipelineStage
+
+def test_items_flow_through_every_stage():
+    async def main():
+        results = []
+
+        async def double(item, emit):
+            await emit(item * 2)
+
+        async def collect(item, emit):
+            results.append(item)
+
+        pipeline = Pipeline([PipelineStage("double", double, 2, 2), PipelineStage("collect", collect, 1, 2)])
+        pipeline.start()
+        for item in range(5):
+            await pipeline.put(item)
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        return results, pipeline.stats()
+
+    results, stats = asyncio.run(main())
+    assert sorted(results) == [0, 2, 4, 6, 8]
+    assert stats["double"]["processed"] == 5
+    assert stats["collect"]["processed"] == 5
+
+def test_full_downstream_queue_blocks_the_upstream_stage():
+    async def main():
+        release = asyncio.Event()
+
+        async def forward(item, emit):
+            await emit(item)
+
+        async def stall(item, emit):
+            await release.wait()
+
+        first = PipelineStage("first", forward, 1, 1)
+        second = PipelineStage("second", stall, 1, 1)
+        pipeline = Pipeline([first, second])
+        pipeline.start()
+        for item in range(4):
+            await asyncio.wait_for(pipeline.put(item), 1)
+        await asyncio.sleep(0.01)
+        # One item is stalled in the second stage, one waits on its queue, and
+        # the first stage is blocked emitting the third; the fourth stays queued
+        stats = (first.busy, first.queued, second.busy, second.queued)
+        release.set()
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        return stats, first.stats()
+
+    (first_busy, first_queued, second_busy, second_queued), first_stats = asyncio.run(main())
+    assert (first_busy, first_queued, second_busy, second_queued) == (1, 1, 1, 1)
+    assert first_stats["blocked_seconds"] > 0
+
+def test_failed_item_is_reported_and_the_stage_keeps_running():
+    async def main():
+        errors = []
+        processed = []
+
+        async def handler(item, emit):
+            if item == "corrupt.pdf":
+                raise ValueError("cannot open document")
+            processed.append(item)
+
+        stage = PipelineStage("render", handler, 1, 4, on_error=lambda item, e: errors.append((item, str(e))))
+        pipeline = Pipeline([stage])
+        pipeline.start()
+        for item in ("corrupt.pdf", "claim.pdf"):
+            await pipeline.put(item)
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        return errors, processed, stage.failed
+
+    errors, processed, failed = asyncio.run(main())
+    assert errors == [("corrupt.pdf", "cannot open document")]
+    assert processed == ["claim.pdf"]
+    assert failed == 1
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Tests for the clean-scan check of the preprocessing profiles
+"""
+
+import pytest
+
+from benchmark_preprocessing import PAGE_SIZES, create_test_page
+from preprocessing import is_clean_scan
+
+@pytest.mark.parametrize("height, width", PAGE_SIZES.values())
+def test_black_on_white_page_is_clean(height, width):
+    assert is_clean_scan(create_test_page(height, width, clean=True))
+
+@pytest.mark.parametrize("height, width", PAGE_SIZES.values())
+def test_faded_grey_scan_is_not_clean(height, width):
+    assert not is_clean_scan(create_test_page(height, width, clean=False))
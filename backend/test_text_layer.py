@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the PDF text-layer fast path
+"""
+
+import fitz
+import numpy as np
+
+from text_layer import TextLayerPage, read_text_layer
+
+CLAIM_TEXT = "Village Ramgarh Survey No. 104/4 Area 2.5 hectares"
+
+def new_page(text: str = CLAIM_TEXT, rotation: int = 0):
+    document = fitz.open()
+    page = document.new_page(width=400, height=300)
+    if text:
+        page.insert_text((50, 100), text, fontsize=10)
+    page.set_rotation(rotation)
+    return document, page
+
+def test_born_digital_page_is_read_with_boxes_in_rendered_pixels():
+    document, page = new_page()
+    text_page = read_text_layer(page, zoom=2.0)
+    assert isinstance(text_page, TextLayerPage)
+    assert " ".join(text_page.words) == CLAIM_TEXT
+    x, y, width, height = text_page.boxes[0]
+    # The baseline is at y=100 points, so the first word ends just below 200 pixels
+    assert 90 < x < 110 and 170 < y < 200 and y + height > 195
+    document.close()
+
+def test_page_with_too_little_text_is_ocred():
+    document, page = new_page("Page 3")
+    assert read_text_layer(page, zoom=2.0) is None
+    document.close()
+
+def test_scanned_page_with_an_ocr_text_layer_is_ocred():
+    document, page = new_page()
+    scan = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 30), False)
+    scan.clear_with(255)
+    page.insert_image(page.rect, pixmap=scan)
+    assert read_text_layer(page, zoom=2.0) is None
+    document.close()
+
+def test_boxes_of_rotated_pages_follow_the_rendered_page():
+    document, page = new_page(rotation=90)
+    text_page = read_text_layer(page, zoom=1.0)
+    # Rendered rotated, the page is 300 wide and 400 high and the words run downwards
+    low = text_page.boxes[:, :2]
+    high = low + text_page.boxes[:, 2:]
+    assert np.all(low >= 0) and np.all(high[:, 0] <= 300) and np.all(high[:, 1] <= 400)
+    assert np.all(text_page.boxes[:, 3] > text_page.boxes[:, 2])
+    document.close()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for tiling of oversized pages
+"""
+
+from tiling import split_tiles, merge_tile_results, OCR_TILE_SIZE
+
+# A3 rendered at 2x: not a multiple of the tile size, so the last tile on
+# each axis is pinned to the page edge and overlaps far more than OCR_TILE_OVERLAP
+A3_SHAPE = (4764, 3368)
+
+def box(left, top, right, bottom):
+    return [[left, top], [right, top], [right, bottom], [left, bottom]]
+
+def read_tiles(shape, words):
+    """Tile-local results as each tile would read the words fully inside it"""
+    tile_results = []
+    for tile in split_tiles(shape):
+        x0, y0, x1, y1 = tile
+        results = [(box(left - x0, top - y0, right - x0, bottom - y0), text, confidence)
+                   for (left, top, right, bottom), text, confidence in words
+                   if left >= x0 and right <= x1 and top >= y0 and bottom <= y1]
+        tile_results.append((tile, results))
+    return tile_results
+
+def test_tiles_cover_page_not_multiple_of_tile_size():
+    tiles = split_tiles(A3_SHAPE)
+    height, width = A3_SHAPE
+    assert all(x1 - x0 <= OCR_TILE_SIZE and y1 - y0 <= OCR_TILE_SIZE for x0, y0, x1, y1 in tiles)
+    assert max(x1 for _, _, x1, _ in tiles) == width
+    assert max(y1 for _, _, _, y1 in tiles) == height
+
+def test_word_in_wide_overlap_is_kept_once():
+    words = [
+        ((1000, 100, 1200, 140), "Ramgarh", 0.9),   # read by both tiles of the first row
+        ((100, 100, 300, 140), "Village", 0.9),     # only in the first tile
+        ((3000, 3000, 3200, 3040), "Survey", 0.8)   # only in the last tile
+    ]
+    merged = merge_tile_results(read_tiles(A3_SHAPE, words), A3_SHAPE)
+    texts = [text for _, text, _ in merged]
+    assert sorted(texts) == ["Ramgarh", "Survey", "Village"]
+
+def test_overlap_duplicate_keeps_most_confident_reading():
+    tiles = split_tiles(A3_SHAPE)
+    first, second = tiles[0], tiles[1]
+    tile_results = [(tile, []) for tile in tiles]
+    tile_results[0] = (first, [(box(1000, 100, 1200, 140), "Ramgarh", 0.6)])
+    tile_results[1] = (second, [(box(1000 - second[0], 100, 1200 - second[0], 140), "Ramgarh", 0.9)])
+    merged = merge_tile_results(tile_results, A3_SHAPE)
+    assert [(text, confidence) for _, text, confidence in merged] == [("Ramgarh", 0.9)]
+
+def test_transform_undoes_deskew_then_scale():
+    import cv2
+    import numpy as np
+    from tiling import PageTransform, rescale_results
+
+    matrix = cv2.getRotationMatrix2D((500, 400), 3.0, 1.0)
+    x, y = 620.0, 310.0
+    rotated = matrix @ np.array([x, y, 1.0])
+    results = [([[rotated[0], rotated[1]]] * 4, "Ramgarh", 0.9)]
+    (bbox, _, _), = rescale_results(results, PageTransform(0.5, cv2.invertAffineTransform(matrix)))
+    assert np.allclose(bbox[0], [x / 0.5, y / 0.5])
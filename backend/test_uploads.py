@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for bounded spooling of uploads and the pixel limit
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+
+import uploads
+from uploads import spool_file, check_pixels, MAX_IMAGE_PIXELS
+
+def test_small_upload_stays_in_memory():
+    data = b"%PDF-1.4 small claim"
+    upload = spool_file(io.BytesIO(data), "claim.pdf", "application/pdf")
+    assert upload.in_memory
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    with upload.buffer() as buffer:
+        assert bytes(buffer) == data
+
+def test_large_upload_is_spooled_to_a_temporary_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_BYTES", 1024)
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 512)
+    monkeypatch.setattr(uploads, "UPLOAD_TMP_DIR", str(tmp_path))
+    data = os.urandom(4096)
+    upload = spool_file(io.BytesIO(data), "scan.png", "image/png")
+    assert not upload.in_memory
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    with upload.buffer() as buffer:
+        assert buffer[:] == data
+    path = upload.path
+    upload.close()
+    assert not os.path.exists(path)
+
+def test_oversized_upload_is_rejected_without_leaving_a_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_BYTES", 1024)
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 512)
+    monkeypatch.setattr(uploads, "UPLOAD_TMP_DIR", str(tmp_path))
+    with pytest.raises(HTTPException) as error:
+        spool_file(io.BytesIO(os.urandom(4096)), "scan.png", "image/png", max_bytes=2048)
+    assert error.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+def test_images_beyond_the_pixel_limit_are_rejected():
+    check_pixels(1000, 1000)
+    with pytest.raises(HTTPException) as error:
+        check_pixels(MAX_IMAGE_PIXELS, 2)
+    assert error.value.status_code == 413
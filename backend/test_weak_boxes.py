@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for selective re-OCR of weakly recognized words
+"""
+
+import numpy as np
+import pytest
+
+from weak_boxes import apply_readings, build_canvas, weak_indices, Slot, WEAK_BOX_UPSCALE, CANVAS_GAP
+
+def quad(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+RESULTS = [
+    (quad(10, 10, 90, 30), "Village", 0.95),
+    (quad(100, 10, 180, 30), "Rarngarh", 0.2),
+    (quad(10, 50, 60, 70), "l04/4", 0.35),
+    (quad(100, 50, 150, 70), "2.5", 0.6)
+]
+
+def test_weakest_results_below_the_threshold_are_picked_first():
+    assert weak_indices(RESULTS, threshold=0.4, limit=48) == [1, 2]
+    assert weak_indices(RESULTS, threshold=0.4, limit=1) == [1]
+
+def test_weak_crops_are_stacked_on_one_canvas():
+    image = np.full((100, 200, 3), 255, dtype=np.uint8)
+    canvas, boxes, slots = build_canvas(image, RESULTS, [1, 2])
+    assert [slot.index for slot in slots] == [1, 2]
+    # Each crop is padded, upscaled and separated from the next by a white gap
+    first_height = slots[0].bottom - slots[0].top
+    assert first_height == int((20 + 2 * 4) * WEAK_BOX_UPSCALE)
+    assert slots[1].top == slots[0].bottom + CANVAS_GAP
+    assert [box[2:] for box in boxes] == [[slot.top, slot.bottom] for slot in slots]
+    assert canvas.ndim == 2 and canvas.shape[0] >= slots[1].bottom
+
+def test_crops_at_the_page_edge_are_clipped():
+    image = np.full((40, 40, 3), 255, dtype=np.uint8)
+    canvas, boxes, slots = build_canvas(image, [(quad(-5, -5, 30, 45), "Ram", 0.1)], [0])
+    assert boxes[0][1] <= 40 * WEAK_BOX_UPSCALE
+    assert slots[0].bottom - slots[0].top <= 40 * WEAK_BOX_UPSCALE
+
+def test_more_confident_readings_replace_the_text_only():
+    slots = [Slot(1, 0, 56), Slot(2, 72, 128)]
+    readings = [
+        (quad(90, 10, 150, 40), "garh", 0.8),
+        (quad(0, 10, 80, 40), "Ram", 0.9),
+        (quad(0, 80, 60, 120), "104/4", 0.3),
+        (quad(70, 80, 90, 120), " ", 0.99)
+    ]
+    results = apply_readings(RESULTS, slots, readings)
+    bbox, text, confidence = results[1]
+    assert (bbox, text) == (RESULTS[1][0], "Ram garh")
+    assert confidence == pytest.approx(0.85)
+    # A weaker re-reading (and blank text) leaves the first reading in place
+    assert results[2] == RESULTS[2]
+    assert results[0] == RESULTS[0] and results[3] == RESULTS[3]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Embedded text layer of born-digital PDF pages: words and boxes are read
+directly with PyMuPDF instead of rasterizing and OCRing the page
+"""
+
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# Set to false to OCR every PDF page
+PDF_TEXT_LAYER = os.getenv("PDF_TEXT_LAYER", "true").lower() == "true"
+# Pages with fewer non-space characters in their text layer are OCRed
+TEXT_LAYER_MIN_CHARS = int(os.getenv("PDF_TEXT_LAYER_MIN_CHARS", 20))
+# Pages where images cover at least this fraction of the page are scans (any
+# text layer on them is a previous OCR pass of unknown quality)
+TEXT_LAYER_MAX_IMAGE_COVERAGE = 0.8
+# Fonts without a Unicode mapping extract as U+FFFD or private-use characters;
+# above this fraction of them the text layer is unusable
+TEXT_LAYER_MAX_GARBAGE = 0.05
+
+TEXT_LAYER_CONFIG: Dict[str, Any] = {
+    "enabled": PDF_TEXT_LAYER,
+    "min_chars": TEXT_LAYER_MIN_CHARS,
+    "max_image_coverage": TEXT_LAYER_MAX_IMAGE_COVERAGE,
+    "max_garbage": TEXT_LAYER_MAX_GARBAGE
+}
+
+class TextLayerPage(NamedTuple):
+    """Words of a page in reading order, with boxes in rendered-page pixels"""
+    words: List[str]
+    boxes: np.ndarray  # (N, 4) x, y, width, height
+
+def _is_garbage(ch: str) -> bool:
+    return ch == "�" or 0xE000 <= ord(ch) <= 0xF8FF
+
+def image_coverage(page) -> float:
+    """Fraction of the page area covered by images (overlaps counted twice, capped at 1)"""
+    area = page.rect.width * page.rect.height
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        covered += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    return min(1.0, covered / area)
+
+def read_text_layer(page, zoom: float) -> Optional[TextLayerPage]:
+    """
+    The page's words with boxes scaled by zoom into the coordinates of the
+    page rendered at that zoom (so they match OCR boxes), or None when the
+    page has no usable text layer and has to be OCRed
+    """
+    words = page.get_text("words", sort=True)
+    letters = [ch for word in words for ch in word[4] if not ch.isspace()]
+    if len(letters) < TEXT_LAYER_MIN_CHARS:
+        return None
+    if sum(1 for ch in letters if _is_garbage(ch)) > TEXT_LAYER_MAX_GARBAGE * len(letters):
+        return None
+    if image_coverage(page) >= TEXT_LAYER_MAX_IMAGE_COVERAGE:
+        return None
+
+    # Words are in unrotated page space; the rendered page is rotated
+    m = page.rotation_matrix
+    corners = np.array([word[:4] for word in words], dtype=np.float64)
+    xs = np.stack([corners[:, 0], corners[:, 2]], axis=1)
+    ys = np.stack([corners[:, 1], corners[:, 3]], axis=1)
+    rotated_x = (m.a * xs + m.c * ys + m.e) * zoom
+    rotated_y = (m.b * xs + m.d * ys + m.f) * zoom
+    low = np.stack([rotated_x.min(axis=1), rotated_y.min(axis=1)], axis=1)
+    high = np.stack([rotated_x.max(axis=1), rotated_y.max(axis=1)], axis=1)
+    return TextLayerPage([word[4] for word in words], np.hstack([low, high - low]))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Resolution capping and overlapping tiles for OCR of very large scans
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Pages are downscaled so that their longer side never exceeds this
+OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", 8000))
+# EasyOCR's detector shrinks anything larger than its 2560px canvas, which
+# loses small text, so large pages are split into tiles of this size instead
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", 2560))
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", 200))
+# Pages up to this factor above the tile size are still OCR'd in one piece
+TILE_SLACK = 1.25
+# Boxes whose intersection covers this fraction of the smaller box are duplicates
+DUPLICATE_OVERLAP = 0.5
+
+TILING_CONFIG: Dict[str, int] = {
+    "max_dimension": OCR_MAX_DIMENSION,
+    "tile_size": OCR_TILE_SIZE,
+    "tile_overlap": OCR_TILE_OVERLAP
+}
+
+Tile = Tuple[int, int, int, int]  # x0, y0, x1, y1
+
+class PageTransform(NamedTuple):
+    """Maps boxes of the working image back to page coordinates"""
+    scale: float = 1.0
+    # 2x3 affine undoing a deskew of the working image, applied before the scale
+    unrotate: Optional[np.ndarray] = None
+
+def cap_resolution(image: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Downscale an image whose longer side exceeds OCR_MAX_DIMENSION"""
+    longest = max(image.shape[:2])
+    if longest <= OCR_MAX_DIMENSION:
+        return image, 1.0
+    scale = OCR_MAX_DIMENSION / longest
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+def needs_tiling(shape: Sequence[int]) -> bool:
+    return max(shape[:2]) > OCR_TILE_SIZE * TILE_SLACK
+
+def _axis_starts(length: int) -> List[int]:
+    if length <= OCR_TILE_SIZE:
+        return [0]
+    step = OCR_TILE_SIZE - OCR_TILE_OVERLAP
+    starts = list(range(0, length - OCR_TILE_SIZE, step))
+    starts.append(length - OCR_TILE_SIZE)
+    return starts
+
+def split_tiles(shape: Sequence[int]) -> List[Tile]:
+    """Overlapping tiles covering an image of the given shape"""
+    height, width = shape[:2]
+    return [
+        (x0, y0, min(x0 + OCR_TILE_SIZE, width), min(y0 + OCR_TILE_SIZE, height))
+        for y0 in _axis_starts(height)
+        for x0 in _axis_starts(width)
+    ]
+
+def _extent(bbox) -> Tuple[float, float, float, float]:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _overlap_fraction(a, b) -> float:
+    """Intersection area divided by the area of the smaller box"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return (width * height) / smaller if smaller > 0 else 0.0
+
+def merge_tile_results(tile_results: List[Tuple[Tile, List]], shape: Sequence[int],
+                       transform: PageTransform = PageTransform()) -> List:
+    """
+    Shift tile-local EasyOCR results into page coordinates, drop duplicates
+    read twice along tile seams and map back to the original resolution
+    """
+    height, width = shape[:2]
+    tiles = [tile for tile, _ in tile_results]
+    seam_candidates = []
+    merged = []
+
+    for tile, results in tile_results:
+        x0, y0, x1, y1 = tile
+        # The last tile on an axis is pinned to the page edge, so its overlap
+        # with the previous one can be much wider than OCR_TILE_OVERLAP
+        neighbours = [other for other in tiles if other != tile and _overlap_fraction(tile, other) > 0]
+        for bbox, text, confidence in results:
+            points = [[point[0] + x0, point[1] + y0] for point in bbox]
+            left, top, right, bottom = _extent(points)
+            # A box touching an inner tile edge may be cut off by the seam
+            cut = ((x0 > 0 and left <= x0 + 2) or (x1 < width and right >= x1 - 2) or
+                   (y0 > 0 and top <= y0 + 2) or (y1 < height and bottom >= y1 - 2))
+            # Anything reaching into a neighbouring tile may have been read by it too
+            in_overlap = any(left < nx1 and right > nx0 and top < ny1 and bottom > ny0
+                             for nx0, ny0, nx1, ny1 in neighbours)
+            entry = (points, text, confidence)
+            if in_overlap:
+                seam_candidates.append((cut, -confidence, (left, top, right, bottom), entry))
+            else:
+                merged.append(entry)
+
+    # Greedy suppression near seams, preferring complete, confident readings
+    kept_extents = []
+    for cut, _, extent, entry in sorted(seam_candidates, key=lambda item: (item[0], item[1])):
+        if all(_overlap_fraction(extent, other) < DUPLICATE_OVERLAP for other in kept_extents):
+            kept_extents.append(extent)
+            merged.append(entry)
+
+    return sort_reading_order(rescale_results(merged, transform))
+
+def rescale_results(results: List, transform: PageTransform) -> List:
+    """Map EasyOCR results from a deskewed or downscaled working image back to the original"""
+    if transform.unrotate is not None:
+        (a, b, c), (d, e, f) = transform.unrotate.tolist()
+        results = [
+            ([[a * point[0] + b * point[1] + c, d * point[0] + e * point[1] + f] for point in bbox], text, confidence)
+            for bbox, text, confidence in results
+        ]
+    scale = transform.scale
+    if scale == 1.0:
+        return results
+    return [
+        ([[point[0] / scale, point[1] / scale] for point in bbox], text, confidence)
+        for bbox, text, confidence in results
+    ]
+
+def sort_reading_order(results: List) -> List:
+    """Order EasyOCR results line by line, top to bottom and left to right"""
+    if not results:
+        return results
+    extents = [_extent(bbox) for bbox, _, _ in results]
+    line_height = max(1.0, float(np.median([bottom - top for _, top, _, bottom in extents])))
+    order = sorted(
+        range(len(results)),
+        key=lambda i: (int(((extents[i][1] + extents[i][3]) / 2) // line_height), extents[i][0])
+    )
+    return [results[i] for i in order]
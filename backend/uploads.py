@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Bounded spooling of uploaded files: small uploads stay in memory, larger
+ones are streamed to a temporary file that PDFs and images are read from
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from metrics import stage
+
+# Largest accepted upload in bytes
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_FILE_SIZE", 50 * 1024 * 1024))
+# Largest accepted PDF in pages
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 200))
+# Largest image (or rendered PDF page) in pixels that is decoded
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", 100_000_000))
+# Uploads up to this size are kept in memory instead of a temporary file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+# Directory of spooled uploads (default: the system temporary directory)
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+CHUNK_BYTES = 1024 * 1024
+
+def _too_large(limit: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the limit of {limit}")
+
+class SpooledUpload:
+    """
+    An uploaded file with its size and SHA-256, held either as bytes (small
+    uploads) or as a file on disk that is read through a memory map
+    """
+
+    def __init__(self, filename: Optional[str], content_type: Optional[str], size: int, sha256: str,
+                 data: Optional[bytes] = None, path: Optional[str] = None, owned: bool = True):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+        self.data = data
+        self.path = path
+        # Owned temporary files are deleted by close()
+        self.owned = owned
+
+    @classmethod
+    def from_path(cls, path: str, filename: Optional[str], content_type: Optional[str]) -> "SpooledUpload":
+        """Wrap an existing file (e.g. a queued job's payload) without copying it"""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return cls(filename, content_type, size, digest.hexdigest(), path=path, owned=False)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def open(self) -> BinaryIO:
+        return io.BytesIO(self.data) if self.in_memory else open(self.path, "rb")
+
+    @contextmanager
+    def buffer(self) -> Iterator[Union[bytes, mmap.mmap]]:
+        """The upload's bytes; files are memory-mapped rather than read"""
+        if self.in_memory:
+            yield self.data
+            return
+        if self.size == 0:
+            yield b""
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def save_to(self, path: str):
+        if self.in_memory:
+            with open(path, "wb") as f:
+                f.write(self.data)
+        else:
+            shutil.copyfile(self.path, path)
+
+    def close(self):
+        if self.owned and self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+def spool_file(source: BinaryIO, filename: Optional[str], content_type: Optional[str],
+               max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """
+    Copy an upload in fixed-size chunks, hashing it on the way, into memory
+    or a temporary file; raises 413 as soon as it exceeds max_bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = bytearray()
+    target = None
+    try:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(CHUNK_BYTES), b""):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(f"{max_bytes // (1024 * 1024)} MB")
+            digest.update(chunk)
+            if target is None and len(head) + len(chunk) <= UPLOAD_SPOOL_BYTES:
+                head += chunk
+                continue
+            if target is None:
+                target = tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_TMP_DIR, delete=False)
+                target.write(head)
+                head = bytearray()
+            target.write(chunk)
+    except BaseException:
+        if target is not None:
+            target.close()
+            os.remove(target.name)
+        raise
+
+    if target is None:
+        return SpooledUpload(filename, content_type, size, digest.hexdigest(), data=bytes(head))
+    target.close()
+    return SpooledUpload(filename, content_type, size, digest.hexdigest(), path=target.name)
+
+async def spool_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """Spool a FastAPI upload without reading it into memory at once"""
+    with stage("upload_read"):
+        return await run_in_threadpool(spool_file, file.file, file.filename, file.content_type, max_bytes)
+
+def check_pixels(width: float, height: float, what: str = "Image"):
+    """Reject images whose decoded size would exceed MAX_IMAGE_PIXELS"""
+    if width * height > MAX_IMAGE_PIXELS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{what} of {int(width)}x{int(height)} pixels exceeds the limit of {MAX_IMAGE_PIXELS:,} pixels"
+        )
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Selective re-OCR of weakly recognized words: only their crops get heavy
+preprocessing (upscale, denoise, binarize) and are recognized again in one
+batch, keeping whichever reading is more confident
+"""
+
+import os
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from metrics import metrics
+from preprocessing import enhance_crop
+
+# Set to false to keep first readings as they are
+WEAK_BOX_REFINEMENT = os.getenv("OCR_REFINE_WEAK_BOXES", "true").lower() == "true"
+# Words recognized with less confidence are re-read
+WEAK_BOX_CONFIDENCE = float(os.getenv("OCR_WEAK_BOX_CONFIDENCE", 0.4))
+# At most this many words per page (or tile) are re-read, the weakest first
+WEAK_BOX_LIMIT = int(os.getenv("OCR_WEAK_BOX_LIMIT", 48))
+# Crops are upscaled by this factor before denoising and binarization
+WEAK_BOX_UPSCALE = 2.0
+# Margin around a word's box, in pixels of the working image
+CROP_PADDING = 4
+# White rows between crops stacked on the batch canvas
+CANVAS_GAP = 16
+
+WEAK_BOX_CONFIG: Dict[str, Any] = {
+    "enabled": WEAK_BOX_REFINEMENT,
+    "confidence": WEAK_BOX_CONFIDENCE,
+    "limit": WEAK_BOX_LIMIT,
+    "upscale": WEAK_BOX_UPSCALE
+}
+
+weak_boxes_total = metrics.counter(
+    "ocr_weak_boxes_total", "Weakly recognized words re-read from enhanced crops, by outcome (improved or kept)"
+)
+
+class Slot(NamedTuple):
+    """Where the crop of results[index] sits on the batch canvas"""
+    index: int
+    top: int
+    bottom: int
+
+def _extent(bbox) -> Tuple[float, float, float, float]:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def weak_indices(results: List, threshold: float = WEAK_BOX_CONFIDENCE, limit: int = WEAK_BOX_LIMIT) -> List[int]:
+    """Indices of the weakest results below threshold"""
+    weak = [index for index, (_, _, confidence) in enumerate(results) if confidence < threshold]
+    return sorted(weak, key=lambda index: results[index][2])[:limit]
+
+def build_canvas(image: np.ndarray, results: List, indices: List[int]) -> Tuple[np.ndarray, List, List[Slot]]:
+    """
+    Enhance the crop of each weak result and stack the crops on one white
+    greyscale canvas, so that they are recognized in a single batch. Returns
+    the canvas, the recognition boxes ([x_min, x_max, y_min, y_max]) and the
+    slot of each crop.
+    """
+    height, width = image.shape[:2]
+    crops = []
+    for index in indices:
+        x0, y0, x1, y1 = _extent(results[index][0])
+        x0, y0 = max(0, int(x0) - CROP_PADDING), max(0, int(y0) - CROP_PADDING)
+        x1, y1 = min(width, int(np.ceil(x1)) + CROP_PADDING), min(height, int(np.ceil(y1)) + CROP_PADDING)
+        if x1 > x0 and y1 > y0:
+            crops.append((index, enhance_crop(image[y0:y1, x0:x1], WEAK_BOX_UPSCALE)))
+    if not crops:
+        return np.zeros((0, 0), dtype=np.uint8), [], []
+
+    canvas = np.full((sum(crop.shape[0] + CANVAS_GAP for _, crop in crops), max(crop.shape[1] for _, crop in crops)),
+                     255, dtype=np.uint8)
+    boxes, slots = [], []
+    top = 0
+    for index, crop in crops:
+        crop_height, crop_width = crop.shape
+        canvas[top:top + crop_height, :crop_width] = crop
+        boxes.append([0, crop_width, top, top + crop_height])
+        slots.append(Slot(index, top, top + crop_height))
+        top += crop_height + CANVAS_GAP
+    return canvas, boxes, slots
+
+def apply_readings(results: List, slots: List[Slot], readings: List) -> List:
+    """
+    Replace the text and confidence of each weak result by its re-reading
+    when that is more confident; boxes keep their first-pass coordinates
+    """
+    by_slot: Dict[int, List] = {}
+    for bbox, text, confidence in readings:
+        if not text.strip():
+            continue
+        _, top, _, bottom = _extent(bbox)
+        centre = (top + bottom) / 2
+        for slot in slots:
+            if slot.top <= centre <= slot.bottom:
+                by_slot.setdefault(slot.index, []).append((bbox, text, confidence))
+                break
+
+    results = list(results)
+    for slot in slots:
+        slot_readings = sorted(by_slot.get(slot.index, []), key=lambda reading: _extent(reading[0])[0])
+        bbox, text, confidence = results[slot.index]
+        if slot_readings:
+            new_confidence = float(np.mean([reading[2] for reading in slot_readings]))
+            if new_confidence > confidence:
+                results[slot.index] = (bbox, " ".join(reading[1] for reading in slot_readings), new_confidence)
+                weak_boxes_total.inc(outcome="improved")
+                continue
+        weak_boxes_total.inc(outcome="kept")
+    return results
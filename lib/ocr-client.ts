@@ -7,46 +7,92 @@ export class OCRService {
     this.baseUrl = process.env.NEXT_PUBLIC_OCR_SERVICE_URL || "http://localhost:8000";
   }
 
-  private async processDocumentWithWebSocket(documentId: string): Promise<void> {
-    return new Promise((resolve, reject) => {
+  private subscribeToDocument(documentId: string): Promise<{ completed: Promise<void>; close: () => void }> {
+    return new Promise((resolveSubscribed, rejectSubscribed) => {
       const ws = new WebSocket(`${this.baseUrl.replace("http", "ws")}/ws/${documentId}`);
+      let opened = false;
+      let settled = false;
+      let resolveCompleted: () => void = () => {};
+      let rejectCompleted: (error: unknown) => void = () => {};
+
+      const completed = new Promise<void>((resolve, reject) => {
+        resolveCompleted = () => {
+          settled = true;
+          resolve();
+        };
+        rejectCompleted = (error) => {
+          settled = true;
+          reject(error);
+        };
+      });
+      // Nobody waits for completion when the request itself fails
+      completed.catch(() => {});
 
       ws.onmessage = (event) => {
         const message = JSON.parse(event.data);
         if (message.type === "status_update") {
           const status = message.data as ProcessingStatus;
           if (status.status === "completed") {
+            resolveCompleted();
             ws.close();
-            resolve();
           } else if (status.status === "failed") {
+            rejectCompleted(new Error(status.message));
             ws.close();
-            reject(new Error(status.message));
           }
         }
       };
 
+      ws.onopen = () => {
+        opened = true;
+        resolveSubscribed({ completed, close: () => ws.close() });
+      };
+
+      // A socket dropped before the final status would otherwise leave
+      // processDocument waiting forever
+      ws.onclose = (event) => {
+        if (!opened) {
+          rejectSubscribed(new Error(`Status WebSocket closed before opening (code ${event.code})`));
+        } else if (!settled) {
+          rejectCompleted(new Error(`Status WebSocket closed before processing finished (code ${event.code})`));
+        }
+      };
+
       ws.onerror = (error) => {
-        reject(error);
+        if (opened) {
+          rejectCompleted(error);
+        } else {
+          rejectSubscribed(error);
+        }
       };
     });
   }
 
   async processDocument(documentId: string, file: File): Promise<OCRResult> {
-    const formData = new FormData();
-    formData.append("file", file);
-
-    const response = await fetch(`${this.baseUrl}/ocr/extract-text`, {
-      method: "POST",
-      body: formData,
-    });
-
-    if (!response.ok) {
-      const error = await response.text();
-      throw new Error(error || "Failed to process document");
+    // The service only sends status updates to subscribers of this id, so
+    // subscribe before posting and tell the service which id to use
+    const id = documentId || crypto.randomUUID();
+    const subscription = await this.subscribeToDocument(id);
+
+    try {
+      const formData = new FormData();
+      formData.append("file", file);
+      formData.append("document_id", id);
+
+      const response = await fetch(`${this.baseUrl}/ocr/extract-text`, {
+        method: "POST",
+        body: formData,
+      });
+
+      if (!response.ok) {
+        const error = await response.text();
+        throw new Error(error || "Failed to process document");
+      }
+
+      const [result] = await Promise.all([response.json() as Promise<OCRResult>, subscription.completed]);
+      return result;
+    } finally {
+      subscription.close();
     }
-
-    await this.processDocumentWithWebSocket(documentId);
-    return response.json();
   }
 
   async analyzeClaimWithOCR(file: File): Promise<{
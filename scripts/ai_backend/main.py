@@ -24,6 +24,14 @@ import numpy as np
 from transformers import pipeline
 import torch
 
+# Shared FRA entity engine (backend/fra_entities.py, copied next to main.py in the Docker image)
+try:
+    from fra_entities import FRAEntityEngine
+except ImportError:
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend"))
+    from fra_entities import FRAEntityEngine
+
 # Database imports
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -75,6 +83,19 @@ except Exception as e:
     logger.error(f"Failed to load AI models: {e}")
     # Continue without models for development
 
+# Output types of extract_fra_entities, keyed by the engine's entity type
+FRA_ENTITY_TYPES = {
+    "CLAIM_NUMBER": "CLAIM_NUMBER",
+    "SURVEY_NUMBER": "SURVEY_NUMBER",
+    "AREA": "FOREST_AREA",
+    "VILLAGE": "LOCATION_VILLAGE",
+    "DISTRICT": "LOCATION_DISTRICT",
+    "TEHSIL": "LOCATION_TEHSIL",
+    "BLOCK": "LOCATION_BLOCK",
+    "PANCHAYAT": "LOCATION_PANCHAYAT"
+}
+fra_entity_engine = FRAEntityEngine(types=list(FRA_ENTITY_TYPES))
+
 # Pydantic models
 class OCRRequest(BaseModel):
     document_id: int
@@ -247,47 +268,19 @@ def extract_entities_from_text(text: str, document_type: str = "general") -> Dic
 def extract_fra_entities(text: str) -> List[Dict[str, Any]]:
     """
     Extract FRA-specific entities like claim numbers, forest areas, etc.
+    in a single pass, with normalized values (hectares, survey numbers)
     """
-    import re
-    
-    entities = []
-    
-    # Claim number pattern (FRA followed by year and number)
-    claim_pattern = r'FRA\d{4}\d{3,6}'
-    for match in re.finditer(claim_pattern, text):
-        entities.append({
-            "text": match.group(),
-            "start": match.start(),
-            "end": match.end(),
-            "type": "CLAIM_NUMBER",
-            "confidence": 0.95
-        })
-    
-    # Forest area pattern (hectares)
-    area_pattern = r'(\d+\.?\d*)\s*(hectare|hectares|ha)'
-    for match in re.finditer(area_pattern, text, re.IGNORECASE):
-        entities.append({
-            "text": match.group(),
-            "start": match.start(),
-            "end": match.end(),
-            "type": "FOREST_AREA",
-            "confidence": 0.9
-        })
-    
-    # Village/District patterns
-    location_keywords = ['village', 'district', 'tehsil', 'block', 'panchayat']
-    for keyword in location_keywords:
-        pattern = rf'(\w+)\s+{keyword}'
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            entities.append({
-                "text": match.group(),
-                "start": match.start(),
-                "end": match.end(),
-                "type": f"LOCATION_{keyword.upper()}",
-                "confidence": 0.8
-            })
-    
-    return entities
+    return [
+        {
+            "text": match.text,
+            "start": match.start,
+            "end": match.end,
+            "type": FRA_ENTITY_TYPES[match.type],
+            "confidence": match.confidence,
+            "normalized": match.normalized
+        }
+        for match in fra_entity_engine.finditer(text)
+    ]
 
 # Decision Support System
 @app.post("/api/ai/decision", response_model=DecisionResponse)